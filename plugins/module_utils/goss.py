@@ -1,10 +1,25 @@
 """goss module utilities"""
 
+import atexit
+import concurrent.futures
+import contextlib
+import glob
+import heapq
+import http.client
 import json
+import os
+import queue
+import re
+import signal
+import subprocess
+import tempfile
+import time
 import warnings
 from pathlib import Path
 from typing import Final
 
+import yaml
+
 from ansible_collections.mschuchard.general.plugins.module_utils import universal
 
 
@@ -15,6 +30,13 @@ FLAGS_MAP: Final[dict[str, dict[str, str]]] = {
 
 # dictionary that maps input args to goss args
 GLOBAL_ARGS_MAP: Final[dict[str, str]] = {'log_level': '-L', 'package': '--package', 'vars': '--vars', 'vars_inline': '--vars-inline'}
+# encoded vars inline payloads larger than this are passed in a vars file instead of the argv (linux limits a single argument to 128KiB)
+VARS_INLINE_MAX_BYTES: Final[int] = 32768
+# top level gossfile resource block, and its include path keys, within gossfile content which is not valid yaml before template rendering
+GOSSFILE_BLOCK: Final[re.Pattern] = re.compile(r'^gossfile:[ \t]*\n((?:[ \t]+\S.*\n?|[ \t]*\n)*)', re.MULTILINE)
+GOSSFILE_INCLUDE: Final[re.Pattern] = re.compile(r"""^([ \t]+)(?:"([^"]+)"|'([^']+)'|([^\s#'"][^#]*?))[ \t]*:(?:[ \t]|$)""", re.MULTILINE)
+# suffixes of the gossfiles which a templated include path may resolve to
+GOSSFILE_SUFFIXES: Final[tuple[str, ...]] = ('.yaml', '.yml')
 ARGS_MAP: Final[dict[str, dict[str, str]]] = {
     'serve': {
         'cache': '-c',
@@ -33,6 +55,13 @@ ARGS_MAP: Final[dict[str, dict[str, str]]] = {
     },
 }
 
+# goss serve content negotiation media types for the health query formats
+HEALTH_ACCEPT: Final[dict[str, str]] = {'json': 'application/vnd.goss-json', 'prometheus': 'application/vnd.goss-prometheus'}
+
+# prometheus text exposition format sample and label
+PROMETHEUS_SAMPLE: Final[re.Pattern] = re.compile(r'^(?P<name>[A-Za-z_:][\w:]*)(?:\{(?P<labels>.*)\})?\s+(?P<value>\S+)')
+PROMETHEUS_LABEL: Final[re.Pattern] = re.compile(r'([A-Za-z_]\w*)="((?:[^"\\]|\\.)*)"')
+
 
 def cmd(action: str, flags: set[str] = set(), args: dict[str, str | int | dict] = {}, gossfile: Path = Path.cwd()) -> list[str]:
     """constructs a list representing the goss command to execute"""
@@ -110,10 +139,15 @@ def global_args_to_cmd(args: dict = {}, gossfile: Path = Path.cwd()) -> list[str
         # validate the conversion of the vars inline param value to a json string and extend command
         vars_inline_values: dict = args['vars_inline']
         try:
-            command.extend([GLOBAL_ARGS_MAP['vars_inline'], json.dumps(vars_inline_values)])
+            vars_inline_json: str = json.dumps(vars_inline_values)
         except TypeError as exc:
             warnings.warn(f'The vars_inline parameter values {vars_inline_values} could not be encoded to a JSON format string', SyntaxWarning)
             raise TypeError(exc) from exc
+        # large payloads slow process creation and can exceed the argument size limit, and so are spilled to a vars file
+        if len(vars_inline_json.encode('UTF-8')) > VARS_INLINE_MAX_BYTES:
+            command.extend([GLOBAL_ARGS_MAP['vars'], str(spill_vars_inline(vars_inline_json))])
+        else:
+            command.extend([GLOBAL_ARGS_MAP['vars_inline'], vars_inline_json])
         # remove vars_inline from args to avoid doublecheck with action args
         del args['vars_inline']
 
@@ -139,3 +173,453 @@ def global_args_to_cmd(args: dict = {}, gossfile: Path = Path.cwd()) -> list[str
             raise FileNotFoundError(f'GoSSfile does not exist or is invalid: {gossfile}')
 
     return command
+
+
+# spilled vars files of this process keyed by payload digest
+_SPILLED_VARS: dict[str, Path] = {}
+
+
+def spill_vars_inline(vars_inline_json: str, file: Path | None = None) -> Path:
+    """write the json encoded vars inline payload to a vars file readable only by the owner
+    without a file the payload is written once per process to a temporary file which is removed at interpreter exit"""
+    if file is not None:
+        Path(file).parent.mkdir(parents=True, exist_ok=True)
+        universal.atomic_write(Path(file), vars_inline_json, mode=0o600)
+        return Path(file)
+
+    # reuse the temporary file for identical payloads e.g. many commands for the same vars
+    digest: str = universal.cache_key(vars_inline_json)
+    if digest not in _SPILLED_VARS:
+        file_descriptor, temp_file = tempfile.mkstemp(prefix='goss_vars_', suffix='.json')
+        with os.fdopen(file_descriptor, 'w', encoding='UTF-8') as file_handle:
+            file_handle.write(vars_inline_json)
+        atexit.register(Path(temp_file).unlink, missing_ok=True)
+        _SPILLED_VARS[digest] = Path(temp_file)
+
+    return _SPILLED_VARS[digest]
+
+
+def parse_results(stdout: str, slowest: int = 10) -> dict:
+    """parse the output of the goss json format into per-resource results, summary totals, and the slowest checks
+    goss durations are in nanoseconds, and are converted to seconds"""
+    report: dict = json.loads(stdout)
+
+    # convert each check result
+    results: list[dict] = [
+        {
+            'resource_type': result.get('resource-type'),
+            'resource_id': result.get('resource-id'),
+            'property': result.get('property'),
+            'title': result.get('title', ''),
+            'success': bool(result.get('successful')),
+            'skipped': bool(result.get('skipped')),
+            'duration': result.get('duration', 0) / 1e9,
+            'summary_line': result.get('summary-line', ''),
+            'err': result.get('err'),
+        }
+        for result in report.get('results') or []
+    ]
+
+    # summary totals
+    summary: dict = report.get('summary', {})
+    totals: dict = {
+        'test_count': summary.get('test-count', len(results)),
+        'failed_count': summary.get('failed-count', sum(not result['success'] and not result['skipped'] for result in results)),
+        'skipped_count': summary.get('skipped-count', sum(result['skipped'] for result in results)),
+        'duration': summary.get('total-duration', 0) / 1e9,
+    }
+
+    return {
+        'results': results,
+        'summary': totals,
+        'slowest': heapq.nlargest(slowest, results, key=lambda result: result['duration']) if slowest > 0 else [],
+    }
+
+
+def gossfiles_concurrency(cpu_budget: int | None, gossfiles: int) -> int:
+    """determine the number of concurrent goss processes for the gossfiles within the cpu budget
+    each process schedules its own max concurrent checks, and so the budget bounds the processes and defaults to the number of cpu cores"""
+    return max(1, min(gossfiles, cpu_budget or os.cpu_count() or 1))
+
+
+def validate_gossfiles(commands: dict[str, list[str]], workers: int, slowest: int = 10) -> dict[str, dict]:
+    """execute the json format validate command for each gossfile concurrently with a bounded pool of workers
+    returns the structured results of each gossfile keyed by the gossfile"""
+
+    def run(gossfile: str) -> dict:
+        """validate with a single gossfile and parse its report"""
+        try:
+            result = subprocess.run(commands[gossfile], cwd=Path(gossfile).parent, capture_output=True, text=True, check=False)
+        except OSError as exc:
+            return {'return_code': 1, 'success': False, 'error': str(exc), 'stderr': ''}
+
+        report: dict = {'return_code': result.returncode, 'success': result.returncode == 0, 'stderr': result.stderr}
+        try:
+            report.update(parse_results(result.stdout, slowest))
+        # goss errors before validation (e.g. invalid gossfile) produce no report
+        except ValueError:
+            report['error'] = result.stderr.strip() or result.stdout.strip()
+        return report
+
+    # validations are external processes, and so threads suffice to drive them concurrently
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        return dict(zip(commands, executor.map(run, commands)))
+
+
+def merge_reports(reports: dict[str, dict], slowest: int = 10) -> dict:
+    """sum the summary totals of the structured results of many gossfiles, and determine the slowest checks across all gossfiles"""
+    totals: dict = {'test_count': 0, 'failed_count': 0, 'skipped_count': 0, 'duration': 0.0}
+    for report in reports.values():
+        for total, value in report.get('summary', {}).items():
+            totals[total] += value
+
+    # attribute each check to its gossfile
+    checks: list[dict] = [result | {'gossfile': gossfile} for gossfile, report in reports.items() for result in report.get('slowest', [])]
+    return {'summary': totals, 'slowest': heapq.nlargest(slowest, checks, key=lambda result: result['duration']) if slowest > 0 else []}
+
+
+def prometheus_labels(labels: dict[str, str]) -> str:
+    """return the prometheus text exposition format label set with escaped values"""
+    # label values escape backslashes, double quotes, and newlines
+    escaped: dict[str, str] = {name: str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for name, value in labels.items()}
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped.items()) + '}'
+
+
+def textfile_metrics(reports: dict[str, dict], run_duration: float, timestamp: float | None = None) -> str:
+    """return the structured results of each gossfile as node_exporter textfile collector gauges
+    checks with identical labels (e.g. many matchers for one property) are combined so every sample is unique"""
+    # combine the checks per label set into success, skipped, and duration
+    checks: dict[str, tuple[int, int, float]] = {}
+    for gossfile, report in reports.items():
+        for result in report.get('results', []):
+            labels: str = prometheus_labels(
+                {'gossfile': gossfile, 'resource_type': result['resource_type'], 'resource_id': result['resource_id'], 'property': result['property']}
+            )
+            success, skipped, duration = checks.get(labels, (1, 1, 0.0))
+            checks[labels] = (min(success, int(result['success'] or result['skipped'])), min(skipped, int(result['skipped'])), duration + result['duration'])
+    gossfiles: dict[str, dict] = {prometheus_labels({'gossfile': gossfile}): report for gossfile, report in reports.items()}
+
+    # gauge name mapped to its help and samples of label set and value
+    gauges: dict[str, tuple[str, list[tuple[str, float]]]] = {
+        'goss_check_success': ('Whether all matchers of the goss check passed or were skipped.', [(labels, check[0]) for labels, check in checks.items()]),
+        'goss_check_skipped': ('Whether all matchers of the goss check were skipped.', [(labels, check[1]) for labels, check in checks.items()]),
+        'goss_check_duration_seconds': ('Duration of the goss check.', [(labels, check[2]) for labels, check in checks.items()]),
+        'goss_validate_success': ('Whether the goss validation passed.', [(labels, int(report.get('success', False))) for labels, report in gossfiles.items()]),
+        'goss_validate_tests': ('Number of goss checks.', [(labels, report.get('summary', {}).get('test_count', 0)) for labels, report in gossfiles.items()]),
+        'goss_validate_failed': (
+            'Number of failed goss checks.',
+            [(labels, report.get('summary', {}).get('failed_count', 0)) for labels, report in gossfiles.items()],
+        ),
+        'goss_validate_skipped': (
+            'Number of skipped goss checks.',
+            [(labels, report.get('summary', {}).get('skipped_count', 0)) for labels, report in gossfiles.items()],
+        ),
+        'goss_validate_duration_seconds': (
+            'Duration of the goss validation.',
+            [(labels, report.get('summary', {}).get('duration', 0)) for labels, report in gossfiles.items()],
+        ),
+        'goss_validate_run_duration_seconds': ('Duration of the entire validation run including retries.', [('', run_duration)]),
+        'goss_validate_last_run_timestamp_seconds': (
+            'Unix time of the completion of the validation run.',
+            [('', time.time() if timestamp is None else timestamp)],
+        ),
+    }
+
+    lines: list[str] = []
+    for name, (description, samples) in gauges.items():
+        lines.extend([f'# HELP {name} {description}', f'# TYPE {name} gauge'])
+        lines.extend(f'{name}{labels} {value}' for labels, value in samples)
+
+    return '\n'.join(lines) + '\n'
+
+
+def write_textfile(textfile: Path, metrics: str) -> None:
+    """atomically write the metrics to the textfile so the node_exporter textfile collector never scrapes a partial file
+    the temporary file is hidden and lacks the .prom suffix, and so is ignored by the collector"""
+    universal.atomic_write(Path(textfile), metrics, mode=0o644)
+
+
+def failed_checks(results: list[dict]) -> set[tuple[str, str]]:
+    """return the resource type and resource id of each resource with at least one failed check"""
+    return {(result['resource_type'], result['resource_id']) for result in results if not result['success'] and not result['skipped']}
+
+
+def filter_gossfile(rendered: dict, resources: set[tuple[str, str]]) -> dict | None:
+    """return a gossfile containing only the resources from a rendered gossfile
+    returns None if a resource cannot be located in the rendered gossfile"""
+    gossfile: dict[str, dict] = {}
+
+    for resource_type, resource_id in resources:
+        # result resource types are camel case (e.g. KernelParam) while gossfile keys are kebab case (e.g. kernel-param)
+        key: str | None = next((key for key in rendered if key.replace('-', '').lower() == resource_type.lower()), None)
+        if key is None or resource_id not in (rendered[key] or {}):
+            return None
+        gossfile.setdefault(key, {})[resource_id] = rendered[key][resource_id]
+
+    return gossfile
+
+
+def merge_attempt(results: list[dict], retried: list[dict], resources: set[tuple[str, str]], duration: float, slowest: int = 10) -> dict:
+    """replace the results of the retried resources with the results of the retry, and recompute the summary totals with the total duration, and the slowest checks"""
+    merged: list[dict] = [result for result in results if (result['resource_type'], result['resource_id']) not in resources] + retried
+
+    return {
+        'results': merged,
+        'summary': {
+            'test_count': len(merged),
+            'failed_count': sum(not result['success'] and not result['skipped'] for result in merged),
+            'skipped_count': sum(result['skipped'] for result in merged),
+            'duration': duration,
+        },
+        'slowest': heapq.nlargest(slowest, merged, key=lambda result: result['duration']) if slowest > 0 else [],
+    }
+
+
+def gossfile_tree(gossfile: Path) -> list[Path]:
+    """return the gossfile and every gossfile it includes recursively through gossfile resources
+    the includes of a gossfile which is not valid yaml before template rendering are extracted from its gossfile resource block instead
+    a templated include path contributes every gossfile within the directory of its including gossfile"""
+    tree: dict[Path, None] = {}
+    pending: list[Path] = [Path(gossfile).resolve()]
+
+    while pending:
+        current: Path = pending.pop()
+        if current in tree or not current.is_file():
+            continue
+        tree[current] = None
+
+        text: str = current.read_text(encoding='UTF-8')
+        includes: list[str] = []
+        try:
+            content = yaml.safe_load(text)
+            if isinstance(content, dict) and isinstance(content.get('gossfile'), dict):
+                includes = [str(include) for include in content['gossfile']]
+        except yaml.YAMLError:
+            includes = gossfile_includes(text)
+
+        # included gossfile paths and globs are relative to the including gossfile
+        for include in includes:
+            # templated include paths cannot be determined without rendering templates
+            if '{{' in include:
+                pending.extend(sorted(file for file in current.parent.iterdir() if file.is_file() and file.name.endswith(GOSSFILE_SUFFIXES)))
+            else:
+                pending.extend(Path(match).resolve() for match in glob.glob(str(current.parent / include)))
+
+    return sorted(tree)
+
+
+def gossfile_includes(text: str) -> list[str]:
+    """extract the include paths from the top level gossfile resource block of gossfile content which is not valid yaml before template rendering"""
+    includes: list[str] = []
+    for block in GOSSFILE_BLOCK.findall(text):
+        # only the keys at the indentation of the first key are include paths, and the deeper keys are their attributes
+        indent: str = ''
+        for match in GOSSFILE_INCLUDE.finditer(block):
+            indent = indent or match.group(1)
+            if match.group(1) == indent:
+                includes.append(next(group for group in match.groups()[1:] if group))
+
+    return includes
+
+
+def render_fingerprint(gossfile: Path, vars_file: Path | None = None, vars_inline: dict | None = None, **options: str | bool | None) -> str:
+    """return a fingerprint of the content of the gossfile and its includes, the vars payload, and the render options"""
+    return universal.cache_key(
+        [[str(file), universal.file_digest(file)] for file in gossfile_tree(gossfile)],
+        universal.file_digest(vars_file) if vars_file else None,
+        vars_inline or {},
+        options,
+    )
+
+
+def server_pid(pid_file: Path) -> int | None:
+    """return the pid of the goss server recorded in the pid file if the process is still a running goss server, or None otherwise"""
+    try:
+        pid: int = int(Path(pid_file).read_text(encoding='UTF-8').strip())
+        # signal zero verifies existence without affecting the process
+        os.kill(pid, 0)
+    except (OSError, ValueError):
+        return None
+
+    # guard against pid reuse by an unrelated process where the process command line is available
+    cmdline: Path = Path('/proc') / str(pid) / 'cmdline'
+    if cmdline.is_file() and b'goss' not in cmdline.read_bytes():
+        return None
+
+    return pid
+
+
+def server_fingerprint(pid_file: Path) -> str | None:
+    """return the fingerprint of the goss server configuration recorded alongside the pid file, or None if it is not recorded"""
+    try:
+        return Path(pid_file).with_suffix('.fingerprint').read_text(encoding='UTF-8').strip()
+    except OSError:
+        return None
+
+
+def start_server(command: list[str], cwd: Path, pid_file: Path, fingerprint: str | None = None) -> int:
+    """launch the goss server detached in its own session with output to a log file alongside the pid file, and record its pid
+    the fingerprint of the server configuration (by default the command and cwd) is recorded alongside the pid file to detect configuration changes
+    returns the pid of the server"""
+    Path(pid_file).parent.mkdir(parents=True, exist_ok=True)
+
+    with Path(pid_file).with_suffix('.log').open('a', encoding='UTF-8') as log:
+        process = subprocess.Popen(command, cwd=cwd, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+    universal.atomic_write(Path(pid_file).with_suffix('.fingerprint'), f'{fingerprint or universal.cache_key(command, str(cwd))}\n', mode=0o644)
+    universal.atomic_write(Path(pid_file), f'{process.pid}\n', mode=0o644)
+
+    return process.pid
+
+
+def wait_ready(pid: int, port: int, endpoint: str, timeout: float, interval: float = 0.2) -> float:
+    """poll the goss server endpoint until it responds with any http status, which includes failing validations
+    returns the seconds waited, and raises an error if the server exits or the timeout elapses first"""
+    start: float = time.monotonic()
+
+    while True:
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=max(interval, 1.0))
+        try:
+            connection.request('GET', endpoint)
+            connection.getresponse().read()
+            return time.monotonic() - start
+        except OSError:
+            pass
+        finally:
+            connection.close()
+
+        # the server exited e.g. port conflict or invalid gossfile
+        try:
+            if os.waitpid(pid, os.WNOHANG)[0] == pid:
+                raise RuntimeError(f'GoSS server exited before it was ready with pid: {pid}')
+        # the server is not a child of this process
+        except ChildProcessError:
+            try:
+                os.kill(pid, 0)
+            except OSError as exc:
+                raise RuntimeError(f'GoSS server exited before it was ready with pid: {pid}') from exc
+
+        if time.monotonic() - start >= timeout:
+            raise TimeoutError(f'GoSS server was not ready within {timeout} seconds at 127.0.0.1:{port}{endpoint}')
+        time.sleep(interval)
+
+
+def stop_server(pid_file: Path, timeout: float = 10.0) -> bool:
+    """terminate the goss server recorded in the pid file, and forcibly kill it if it has not exited within the timeout
+    returns whether a running server was stopped"""
+    pid: int | None = server_pid(pid_file)
+    Path(pid_file).unlink(missing_ok=True)
+    Path(pid_file).with_suffix('.fingerprint').unlink(missing_ok=True)
+    if pid is None:
+        return False
+
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return True
+    deadline: float = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            # reap the server if it is a child of this process, and otherwise verify its existence
+            if os.waitpid(pid, os.WNOHANG)[0] == pid:
+                return True
+        except ChildProcessError:
+            try:
+                os.kill(pid, 0)
+            except OSError:
+                return True
+        time.sleep(0.1)
+
+    with contextlib.suppress(ProcessLookupError):
+        os.kill(pid, signal.SIGKILL)
+    return True
+
+
+def parse_prometheus(text: str) -> dict:
+    """parse the goss prometheus format into its metric samples, and the check outcome totals of the goss_tests_outcomes_total counter"""
+    metrics: list[dict] = []
+    outcomes: dict[str, int] = {}
+
+    for line in text.splitlines():
+        line = line.strip()
+        # skip blank lines and help and type comments
+        if not line or line.startswith('#'):
+            continue
+        match = PROMETHEUS_SAMPLE.match(line)
+        if match is None:
+            raise ValueError(f'Invalid Prometheus exposition format line: {line}')
+
+        # label values escape backslashes, double quotes, and newlines
+        labels: dict[str, str] = {
+            name: re.sub(r'\\(.)', lambda escape: '\n' if escape.group(1) == 'n' else escape.group(1), value)
+            for name, value in PROMETHEUS_LABEL.findall(match['labels'] or '')
+        }
+        value: float = float(match['value'])
+        metrics.append({'name': match['name'], 'labels': labels, 'value': value})
+
+        if match['name'] == 'goss_tests_outcomes_total':
+            outcome: str = labels.get('outcome', 'unknown')
+            outcomes[outcome] = outcomes.get(outcome, 0) + int(value)
+
+    return {'metrics': metrics, 'outcomes': outcomes}
+
+
+def query_health(host: str, targets: list[tuple[int, str]], format: str = 'json', timeout: float = 10.0, workers: int = 4, slowest: int = 10) -> list[dict]:
+    """query the goss serve endpoint of each port and endpoint target concurrently, reusing a pool of keep-alive connections per port
+    returns the http status, health, and parsed report of each target in the order of the targets"""
+    pools: dict[int, queue.SimpleQueue] = {port: queue.SimpleQueue() for port, _ in targets}
+    headers: dict[str, str] = {'Accept': HEALTH_ACCEPT[format], 'Connection': 'keep-alive'}
+
+    def request(port: int, endpoint: str) -> tuple[int, str]:
+        """request the endpoint over an idle pooled connection to the port if available, and otherwise a new connection"""
+        try:
+            connection, reused = pools[port].get_nowait(), True
+        except queue.Empty:
+            connection, reused = http.client.HTTPConnection(host, port, timeout=timeout), False
+
+        while True:
+            try:
+                connection.request('GET', endpoint, headers=headers)
+                response = connection.getresponse()
+                body: str = response.read().decode('UTF-8')
+                break
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                # the server may have closed an idle pooled connection, and so retry once with a new connection
+                if not reused:
+                    raise
+                connection, reused = http.client.HTTPConnection(host, port, timeout=timeout), False
+
+        # return the connection to the pool unless the server closes it
+        if response.will_close:
+            connection.close()
+        else:
+            pools[port].put(connection)
+        return response.status, body
+
+    def query(target: tuple[int, str]) -> dict:
+        """query a single target and parse its report"""
+        port, endpoint = target
+        report: dict = {'url': f'http://{host}:{port}{endpoint}', 'port': port, 'endpoint': endpoint}
+        start: float = time.monotonic()
+        try:
+            status, body = request(port, endpoint)
+        except (OSError, http.client.HTTPException) as exc:
+            return report | {'status': None, 'healthy': False, 'duration': time.monotonic() - start, 'error': str(exc) or type(exc).__name__}
+
+        # goss serve responds with 200 if all checks pass and 503 otherwise
+        report.update({'status': status, 'healthy': status == 200, 'duration': time.monotonic() - start})
+        try:
+            report.update(parse_results(body, slowest) if format == 'json' else parse_prometheus(body))
+        # responses which are not goss reports e.g. wrong endpoint or goss error
+        except (AttributeError, TypeError, ValueError):
+            report['error'] = body.strip()
+        return report
+
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            return list(executor.map(query, targets))
+    finally:
+        # close the idle pooled connections
+        for pool in pools.values():
+            while not pool.empty():
+                pool.get_nowait().close()
@@ -1,12 +1,52 @@
 """packer module utilities"""
 
+import collections
+import concurrent.futures
+import contextlib
+import copy
+import fnmatch
+import glob
+import os
+import platform
+import re
+import shlex
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
 import warnings
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 from typing import Final
 
 from ansible_collections.mschuchard.general.plugins.module_utils import universal
 
 
+# build name prefixing packer ui messages e.g. "==> docker.ubuntu: Creating container..."
+UI_BUILD: Final[re.Pattern] = re.compile(r'^(?:==> |--> |\s*)([\w-]+\.[\w-]+)(?: \([\w-]+\))?: ')
+# packer ui messages beginning a provisioner or post-processor step of a build
+UI_STEP: Final[re.Pattern] = re.compile(r'^(?:Provisioning with (?P<provisioner>.+?)|Running post-processor: (?:\(type )?(?P<post_processor>[^)]+?)\)?)\.*$')
+# packer ui messages reporting the final status of a build
+UI_BUILD_STATUS: Final[re.Pattern] = re.compile(r"^Build '([^']+)' (finished|errored)(?: after [^:]*)?(?:: (.*))?")
+
+# source blocks within hcl2 templates e.g. source "docker" "ubuntu" {
+HCL_SOURCE: Final[re.Pattern] = re.compile(r'^\s*source\s+"([^"]+)"\s+"([^"]+)"', re.MULTILINE)
+# required plugin entries within hcl2 required_plugins blocks e.g. docker = { version = "~> 1.0" source = "github.com/hashicorp/docker" }
+HCL_REQUIRED_PLUGIN: Final[re.Pattern] = re.compile(r'([\w-]+)\s*=\s*\{([^{}]*)\}')
+# version constraint e.g. ">= 1.2.0"
+VERSION_CONSTRAINT: Final[re.Pattern] = re.compile(r'^\s*(~>|>=|<=|!=|=|>|<)?\s*v?(\d+(?:\.\d+)*)\s*$')
+# installed plugin binary e.g. packer-plugin-docker_v1.0.8_x5.0_linux_amd64
+PLUGIN_BINARY: Final[re.Pattern] = re.compile(r'^packer-plugin-[\w-]+?_v(\d+(?:\.\d+)*)_x[\d.]+_(\w+)_(\w+)(?:\.exe)?$')
+# packer hcl2 files processed by fmt
+FMT_SUFFIXES: Final[tuple[str, ...]] = ('.pkr.hcl', '.pkrvars.hcl')
+# suffixes of the template and variable definition files loaded by packer from a template directory
+TEMPLATE_SUFFIXES: Final[tuple[str, ...]] = ('.pkr.hcl', '.pkr.json', '.pkrvars.hcl', '.pkrvars.json')
+# patterns of the build output directories and files written by packer into a template directory
+BUILD_OUTPUTS: Final[tuple[str, ...]] = ('output-*', 'packer_cache', 'crash.log')
+# assumed peak memory consumption in bytes of a single local build (e.g. qemu or docker) for parallel_builds auto mode
+AUTO_BUILD_MEMORY: Final[int] = 2 * 1024**3
+
 # dictionary that maps input args to packer flags
 FLAGS_MAP: Final[dict[str, dict[str, str]]] = {
     'build': {
@@ -103,3 +143,576 @@ def ansible_to_packer(args: dict) -> None:
             # int to str
             case 'parallel_builds':
                 args['parallel_builds'] = str(arg_value)
+
+
+def machine_readable_events(lines: Iterable[str]) -> Iterator[tuple[int, str, str, list[str]]]:
+    """lazily parse packer machine-readable output lines into timestamp, target, type, and data events
+    lines that are not machine-readable (e.g. continuation lines) are skipped"""
+    for line in lines:
+        fields: list[str] = line.rstrip('\r\n').split(',')
+        # verify line is machine-readable
+        if len(fields) < 3 or not fields[0].isdigit():
+            continue
+
+        # unescape data fields according to the packer machine-readable format
+        yield (
+            int(fields[0]),
+            fields[1],
+            fields[2],
+            [field.replace('%!(PACKER_COMMA)', ',').replace('\\n', '\n').replace('\\r', '\r') for field in fields[3:]],
+        )
+
+
+def summarize_events(events: Iterable[tuple[int, str, str, list[str]]]) -> dict:
+    """consume packer machine-readable events into per-build start and end timestamps, errors, and structured artifacts, and the time spans of the builder, provisioner, and post-processor steps of each build
+    only the summary is retained, and so memory usage is independent of the volume of ui output"""
+    builds: dict[str, dict] = {}
+    errors: list[str] = []
+    steps: list[dict] = []
+    # the step currently executing for each build
+    current: dict[str, dict] = {}
+
+    def build(name: str, timestamp: int) -> dict:
+        """return the summary for the build, and extend its time span and that of its current step to the timestamp"""
+        summary: dict = builds.setdefault(name, {'start': timestamp, 'end': timestamp, 'duration': 0, 'artifacts': [], 'errors': []})
+        summary['end'] = max(summary['end'], timestamp)
+        summary['duration'] = summary['end'] - summary['start']
+        if name in current:
+            current[name]['end'] = max(current[name]['end'], timestamp)
+            current[name]['duration'] = current[name]['end'] - current[name]['start']
+        return summary
+
+    def step(name: str, timestamp: int, step_type: str, step_name: str) -> None:
+        """end the current step of the build at the timestamp, and begin a new step"""
+        build(name, timestamp)
+        current[name] = {'build': name, 'type': step_type, 'name': step_name, 'start': timestamp, 'end': timestamp, 'duration': 0}
+        steps.append(current[name])
+
+    for timestamp, target, event_type, data in events:
+        match event_type:
+            # artifact events are "<index>,<subtype>,<values>"
+            case 'artifact' if target and len(data) >= 2:
+                artifacts: list[dict] = build(target, timestamp)['artifacts']
+                index: int = int(data[0])
+                while len(artifacts) <= index:
+                    artifacts.append({'builder_id': None, 'id': None, 'string': None, 'files': []})
+                match data[1]:
+                    case 'builder-id' | 'id' | 'string' if len(data) > 2:
+                        artifacts[index][data[1].replace('-', '_')] = data[2]
+                    case 'file' if len(data) > 3:
+                        artifacts[index]['files'].append(data[3])
+            case 'error' if target and data:
+                build(target, timestamp)['errors'].append(data[0])
+            case 'ui' if len(data) >= 2:
+                message: str = data[1]
+                status = UI_BUILD_STATUS.match(message)
+                # final status of a build
+                if status:
+                    summary: dict = build(status.group(1), timestamp)
+                    current.pop(status.group(1), None)
+                    if status.group(2) == 'errored' and status.group(3):
+                        summary['errors'].append(status.group(3))
+                    continue
+
+                prefix = UI_BUILD.match(message)
+                # ui message for a specific build
+                if prefix:
+                    name: str = prefix.group(1)
+                    boundary = UI_STEP.match(message[prefix.end() :])
+                    # provisioner or post-processor step begins
+                    if boundary:
+                        if boundary.group('provisioner'):
+                            step(name, timestamp, 'provisioner', boundary.group('provisioner'))
+                        else:
+                            step(name, timestamp, 'post-processor', boundary.group('post_processor'))
+                    # all messages preceding the first provisioner belong to the builder
+                    elif name not in builds:
+                        step(name, timestamp, 'builder', name.split('.')[0])
+                    summary = build(name, timestamp)
+                    if data[0] == 'error':
+                        summary['errors'].append(message[prefix.end() :])
+                # ui error unrelated to a specific build e.g. invalid template
+                elif data[0] == 'error':
+                    errors.append(message)
+            case _ if target:
+                build(target, timestamp)
+
+    return {'builds': builds, 'errors': errors, 'steps': steps}
+
+
+def timing_profile(summary: dict) -> list[dict]:
+    """return the build and step time spans of a summary sorted by descending duration"""
+    profile: list[dict] = [
+        {'build': name, 'type': 'build', 'name': name, 'start': build['start'], 'end': build['end'], 'duration': build['duration']}
+        for name, build in summary['builds'].items()
+    ]
+    return sorted(profile + summary.get('steps', []), key=lambda span: span['duration'], reverse=True)
+
+
+def run_machine_readable(command: list[str], cwd: Path, tail: int | None = None) -> tuple[int, dict, str, str]:
+    """execute a packer command and summarize its machine-readable output as it arrives
+    only the last tail lines of stdout are retained if tail is specified
+    returns the return code, the summary, the stdout or its tail, and the stderr"""
+    stdout_lines: collections.deque[str] = collections.deque(maxlen=tail)
+
+    # stderr is spooled to a file to avoid a pipe deadlock while stdout is streamed
+    with tempfile.TemporaryFile(mode='w+', encoding='UTF-8') as stderr_file:
+        with subprocess.Popen(command, cwd=cwd, stdout=subprocess.PIPE, stderr=stderr_file, text=True) as process:
+            # stdout is always a pipe here so assert for typing
+            assert process.stdout is not None
+
+            def lines() -> Iterator[str]:
+                """tee the stdout lines into the retained output"""
+                for line in process.stdout:
+                    stdout_lines.append(line)
+                    yield line
+
+            summary: dict = summarize_events(machine_readable_events(lines()))
+            return_code: int = process.wait()
+
+        stderr_file.seek(0)
+        stderr: str = stderr_file.read()
+
+    return return_code, summary, ''.join(stdout_lines), stderr
+
+
+def build_fingerprint(
+    config_dir: Path, var: dict | None = None, var_file: list[Path] | None = None, only: list[str] | None = None, excepts: list[str] | None = None
+) -> str:
+    """return a fingerprint of the packer template files content, the variable values and files content, and the build selection
+    only the template files are fingerprinted since builds write their output (e.g. output-* disk images) into the template directory"""
+    return universal.cache_key(
+        [(file.name, universal.file_digest(file)) for file in template_files(config_dir)],
+        var or {},
+        [universal.file_digest(file) for file in var_file or []],
+        sorted(only or []),
+        sorted(excepts or []),
+    )
+
+
+def template_files(config_dir: Path) -> list[Path]:
+    """return the template file, or the template and variable definition files loaded by packer from the template directory"""
+    if Path(config_dir).is_file():
+        return [Path(config_dir)]
+
+    return sorted(file for file in Path(config_dir).glob('*') if file.is_file() and file.name.endswith(TEMPLATE_SUFFIXES))
+
+
+def artifact_exists(artifact: dict, probe: str | None = None, cwd: Path | None = None) -> bool:
+    """determine if a build artifact still exists
+    the probe is a command where {id} is replaced with the artifact id e.g. "docker image inspect {id}", and a zero return code denotes existence
+    otherwise the artifact files are checked for existence, and artifacts without files are assumed to exist"""
+    cwd = cwd or Path.cwd()
+    if probe:
+        result: subprocess.CompletedProcess = subprocess.run(
+            [arg.replace('{id}', str(artifact.get('id'))) for arg in shlex.split(probe)], cwd=cwd, capture_output=True, check=False
+        )
+        return result.returncode == 0
+
+    return all((Path(cwd) / file).exists() for file in artifact.get('files', []))
+
+
+def matrix_commands(flags: set[str], args: dict, config_dir: Path, matrix: list[dict]) -> list[dict]:
+    """construct the packer build command for each matrix combination of var and var_file sets
+    combination var values override the base var values, and combination var files are appended to the base var files
+    args should be the unconverted module args"""
+    combinations: list[dict] = []
+
+    for index, combination in enumerate(matrix):
+        # merge the combination inputs into a copy of the base args
+        combination_args: dict = copy.deepcopy(args)
+        if combination.get('var'):
+            combination_args['var'] = combination_args.get('var', {}) | combination['var']
+        if combination.get('var_file'):
+            combination_args['var_file'] = combination_args.get('var_file', []) + combination['var_file']
+        # var files must be absolute since each combination executes in its own working directory
+        if combination_args.get('var_file'):
+            combination_args['var_file'] = [str(Path(var_file).resolve()) for var_file in combination_args['var_file']]
+
+        ansible_to_packer(combination_args)
+        combinations.append(
+            {
+                'name': combination.get('name') or str(index),
+                'var': combination.get('var') or {},
+                'var_file': combination.get('var_file') or [],
+                'command': cmd(action='build', flags=flags, args=combination_args, target_dir=Path(config_dir).resolve()),
+            }
+        )
+
+    return combinations
+
+
+def run_matrix(combinations: list[dict], work_dir: Path, workers: int) -> list[dict]:
+    """execute the matrix combination packer builds with a bounded pool of workers
+    each combination executes against its own copy of the template directory within the work_dir to isolate relative paths and build outputs
+    the copy excludes the build outputs of previous builds since only the sources (e.g. templates and provisioner scripts) are needed
+    returns the combinations updated with their working directory, return code, duration, builds, errors, and stderr"""
+
+    def run(index: int) -> dict:
+        """copy the templates for the combination and execute its build"""
+        combination: dict = combinations[index]
+        template: Path = Path(combination['command'][-1])
+        working_dir: Path = Path(work_dir) / str(index)
+        # copy the template directory, or the directory of the template file, without its build outputs
+        shutil.copytree(
+            template if template.is_dir() else template.parent, working_dir, symlinks=True, ignore=shutil.ignore_patterns(*BUILD_OUTPUTS), dirs_exist_ok=True
+        )
+        command: list[str] = combination['command'][:-1] + [str(working_dir if template.is_dir() else working_dir / template.name)]
+
+        start: float = time.monotonic()
+        try:
+            return_code, summary, _, stderr = run_machine_readable(command, cwd=working_dir, tail=100)
+        except OSError as exc:
+            return_code, summary, stderr = 1, {'builds': {}, 'errors': [str(exc)]}, str(exc)
+
+        return combination | {
+            'command': command,
+            'working_dir': str(working_dir),
+            'return_code': return_code,
+            'duration': time.monotonic() - start,
+            'failed': return_code != 0,
+            'stderr': stderr,
+            'builds': summary['builds'],
+            'errors': summary['errors'],
+            'profile': timing_profile(summary),
+        }
+
+    # copying templates into a working directory within themselves would recurse
+    for combination in combinations:
+        template_dir: Path = Path(combination['command'][-1]).resolve()
+        if Path(work_dir).resolve().is_relative_to(template_dir if template_dir.is_dir() else template_dir.parent):
+            raise ValueError(f'Matrix working directory must not be within the template directory: {work_dir}')
+
+    # builds are external processes, and so threads suffice to drive them concurrently
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        return list(executor.map(run, range(len(combinations))))
+
+
+def count_sources(config_dir: Path, only: list[str] | None = None, excepts: list[str] | None = None) -> int | None:
+    """count the hcl2 template sources selected by the only or excepts glob patterns
+    returns None if no sources are found e.g. legacy json templates"""
+    templates: list[Path] = [Path(config_dir)] if Path(config_dir).is_file() else sorted(Path(config_dir).glob('*.pkr.hcl'))
+    sources: set[str] = {f'{source_type}.{name}' for template in templates for source_type, name in HCL_SOURCE.findall(template.read_text(encoding='UTF-8'))}
+
+    if not sources:
+        return None
+    # only and excepts patterns may also be prefixed with the build name e.g. my_build.docker.ubuntu
+    if only:
+        sources = {source for source in sources if any(fnmatch.fnmatchcase(source, pattern) or pattern.endswith(f'.{source}') for pattern in only)}
+    if excepts:
+        sources = {source for source in sources if not any(fnmatch.fnmatchcase(source, pattern) or pattern.endswith(f'.{source}') for pattern in excepts)}
+
+    return len(sources)
+
+
+def memory_info() -> tuple[int | None, int | None]:
+    """return the total and available system memory in bytes, or None for each value that cannot be determined"""
+    meminfo: dict[str, int] = {}
+    try:
+        # linux reports accurate available memory including reclaimable caches
+        with open('/proc/meminfo', encoding='UTF-8') as file_handle:
+            for line in file_handle:
+                field, _, value = line.partition(':')
+                meminfo[field] = int(value.split()[0]) * 1024
+    except (OSError, ValueError, IndexError):
+        # otherwise fall back to posix sysconf free pages
+        try:
+            page_size: int = os.sysconf('SC_PAGE_SIZE')
+            return os.sysconf('SC_PHYS_PAGES') * page_size, os.sysconf('SC_AVPHYS_PAGES') * page_size
+        except (OSError, ValueError):
+            return None, None
+
+    return meminfo.get('MemTotal'), meminfo.get('MemAvailable', meminfo.get('MemFree'))
+
+
+def auto_parallel_builds(sources: int | None, cores: int | None, available_memory: int | None, build_memory: int = AUTO_BUILD_MEMORY) -> int:
+    """derive a parallel builds limit from the number of selected sources, cpu cores, and available memory"""
+    limit: int = cores or 1
+    if sources is not None:
+        limit = min(limit, sources)
+    if available_memory is not None:
+        limit = min(limit, available_memory // build_memory)
+
+    # at least one build must always execute
+    return max(1, limit)
+
+
+@contextlib.contextmanager
+def sample_resources(interval: float = 1.0) -> Iterator[dict]:
+    """sample the system load average and memory usage in a background thread for the duration of the context
+    yields a dict that is updated with the peak one minute load average and peak memory used in bytes"""
+    usage: dict = {'peak_load_average': 0.0, 'peak_memory_used': 0, 'samples': 0}
+    stop = threading.Event()
+
+    def sample() -> None:
+        """sample until stopped"""
+        while True:
+            usage['peak_load_average'] = max(usage['peak_load_average'], os.getloadavg()[0])
+            total, available = memory_info()
+            if total is not None and available is not None:
+                usage['peak_memory_used'] = max(usage['peak_memory_used'], total - available)
+            usage['samples'] += 1
+            if stop.wait(interval):
+                return
+
+    thread = threading.Thread(target=sample, daemon=True)
+    thread.start()
+    try:
+        yield usage
+    finally:
+        stop.set()
+        thread.join()
+
+
+def required_plugins(config_dir: Path) -> dict[str, dict[str, str]]:
+    """parse the required_plugins blocks from the hcl2 templates into the name, source, and version constraint of each plugin"""
+    templates: list[Path] = [Path(config_dir)] if Path(config_dir).is_file() else sorted(Path(config_dir).glob('*.pkr.hcl'))
+    plugins: dict[str, dict[str, str]] = {}
+    # packer init also fails without a template
+    if not templates:
+        raise FileNotFoundError(f'No HCL2 Packer templates found: {config_dir}')
+
+    for template in templates:
+        content: str = template.read_text(encoding='UTF-8')
+        # iterate through required_plugins blocks
+        for block in re.finditer(r'required_plugins\s*\{', content):
+            # find the matching closing brace of the block
+            depth: int = 1
+            index: int = block.end()
+            while depth > 0 and index < len(content):
+                depth += {'{': 1, '}': -1}.get(content[index], 0)
+                index += 1
+
+            # parse the plugin attributes
+            for name, attributes in HCL_REQUIRED_PLUGIN.findall(content[block.end() : index - 1]):
+                plugin: dict[str, str] = dict(re.findall(r'(source|version)\s*=\s*"([^"]*)"', attributes))
+                plugins[name] = {'source': plugin.get('source', ''), 'version': plugin.get('version', '')}
+
+    return plugins
+
+
+def plugin_dir() -> Path:
+    """return the directory within which packer installs plugins"""
+    if os.environ.get('PACKER_PLUGIN_PATH'):
+        return Path(os.environ['PACKER_PLUGIN_PATH'])
+    if os.environ.get('PACKER_CONFIG_DIR'):
+        return Path(os.environ['PACKER_CONFIG_DIR']) / 'plugins'
+    return Path.home() / '.config' / 'packer' / 'plugins'
+
+
+def version_satisfies(version: str, constraints: str) -> bool:
+    """determine if a version satisfies a comma-delimited list of version constraints e.g. ">= 1.0, < 2.0" or "~> 1.2"
+    an empty constraint is satisfied by any version"""
+
+    def parse(value: str) -> tuple[int, ...]:
+        """convert a version string to a comparable tuple padded to three components"""
+        parts: list[int] = [int(part) for part in value.split('.')]
+        return tuple(parts + [0] * (3 - len(parts)))
+
+    current: tuple[int, ...] = parse(version)
+    for constraint in filter(str.strip, constraints.split(',')):
+        match = VERSION_CONSTRAINT.match(constraint)
+        # unparseable constraints cannot be verified as satisfied
+        if match is None:
+            return False
+
+        operator: str = match.group(1) or '='
+        target: tuple[int, ...] = parse(match.group(2))
+        match operator:
+            case '=' if current != target:
+                return False
+            case '!=' if current == target:
+                return False
+            case '>' if current <= target:
+                return False
+            case '>=' if current < target:
+                return False
+            case '<' if current >= target:
+                return False
+            case '<=' if current > target:
+                return False
+            case '~>':
+                # pessimistic constraint permits increments of only the rightmost specified component
+                specified: int = len(match.group(2).split('.'))
+                prefix: int = max(specified - 1, 1)
+                if current < target or current[:prefix] != target[:prefix]:
+                    return False
+
+    return True
+
+
+def installed_plugin_versions(source: str, directory: Path | None = None) -> list[str]:
+    """return the versions of a plugin installed for this platform whose binaries match their recorded sha256 checksums"""
+    system: str = platform.system().lower()
+    machine: str = {'x86_64': 'amd64', 'aarch64': 'arm64', 'i386': '386', 'i686': '386'}.get(platform.machine().lower(), platform.machine().lower())
+    versions: list[str] = []
+
+    source_dir: Path = (directory or plugin_dir()) / source
+    if not source_dir.is_dir():
+        return versions
+
+    for binary in source_dir.iterdir():
+        match = PLUGIN_BINARY.match(binary.name)
+        checksum: Path = binary.with_name(f'{binary.name}_SHA256SUM')
+        # verify platform and checksum
+        if (
+            match
+            and match.group(2) == system
+            and match.group(3) == machine
+            and checksum.is_file()
+            and checksum.read_text(encoding='UTF-8').split()[0].lower() == universal.file_digest(binary)
+        ):
+            versions.append(match.group(1))
+
+    return versions
+
+
+def plugins_satisfied(config_dir: Path, directory: Path | None = None) -> dict[str, str] | None:
+    """determine if every required plugin of the templates has an installed and verified version satisfying its constraint
+    returns the satisfying installed version of each plugin, or None if any plugin is unsatisfied"""
+    satisfied: dict[str, str] = {}
+
+    for name, plugin in required_plugins(config_dir).items():
+        # a plugin without a source cannot be located
+        if not plugin['source']:
+            return None
+        versions: list[str] = [version for version in installed_plugin_versions(plugin['source'], directory) if version_satisfies(version, plugin['version'])]
+        if not versions:
+            return None
+        satisfied[name] = max(versions, key=lambda version: tuple(int(part) for part in version.split('.')))
+
+    return satisfied
+
+
+def fmt_files(config_dir: Path, recursive: bool = False) -> list[Path]:
+    """return the packer hcl2 files processed by fmt for a file or directory target"""
+    if Path(config_dir).is_file():
+        return [Path(config_dir)]
+
+    files: Iterable[Path] = Path(config_dir).rglob('*') if recursive else Path(config_dir).glob('*')
+    return sorted(file for file in files if file.is_file() and file.name.endswith(FMT_SUFFIXES))
+
+
+def fmt_batches(command: list[str], files: list[Path], batch_size: int = 256) -> tuple[int, list[Path], str, str]:
+    """format a subset of files with one packer execution per batch
+    packer fmt accepts only a single target, so each batch of files is copied into a temporary staging directory which is then the target, and rewritten files are copied back
+    returns the first non-zero return code (or zero), the rewritten (or unformatted if not writing) files, and the stdout and stderr with staging paths mapped to the original files"""
+    return_code: int = 0
+    rewritten: list[Path] = []
+    stdout: list[str] = []
+    stderr: list[str] = []
+
+    for start in range(0, len(files), batch_size):
+        with tempfile.TemporaryDirectory(prefix='packer_fmt_') as stage_dir:
+            # stage the batch with unique flat names retaining the file suffixes
+            staged: dict[str, Path] = {}
+            for index, file in enumerate(files[start : start + batch_size]):
+                stage_file: Path = Path(stage_dir) / f'{index}_{file.name}'
+                shutil.copyfile(file, stage_file)
+                staged[str(stage_file)] = file
+
+            result = subprocess.run(command + [stage_dir], capture_output=True, text=True, check=False)
+            if result.returncode != 0 and return_code == 0:
+                return_code = result.returncode
+
+            # packer lists each file which was rewritten, or which is unformatted if not writing
+            listed: set[str] = {line.strip() for line in result.stdout.splitlines()}
+            for stage_file, file in staged.items():
+                changed: bool = universal.file_digest(Path(stage_file)) != universal.file_digest(file)
+                if changed:
+                    # overwrite the content only so the original file ownership and mode are retained
+                    shutil.copyfile(stage_file, file)
+                if changed or stage_file in listed:
+                    rewritten.append(file)
+
+            # map staging paths back to original paths in the output
+            batch_stdout: str = result.stdout
+            batch_stderr: str = result.stderr
+            for stage_file, file in sorted(staged.items(), key=lambda item: len(item[0]), reverse=True):
+                batch_stdout = batch_stdout.replace(stage_file, str(file))
+                batch_stderr = batch_stderr.replace(stage_file, str(file))
+            stdout.append(batch_stdout)
+            stderr.append(batch_stderr)
+
+    return return_code, rewritten, ''.join(stdout), ''.join(stderr)
+
+
+def expand_config_dirs(patterns: list[str]) -> list[Path]:
+    """expand a list of config directories or files, and glob patterns thereof, into a deduplicated list of targets"""
+    targets: dict[Path, None] = {}
+
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches: list[str] = sorted(glob.glob(pattern))
+            if not matches:
+                raise FileNotFoundError(f'No Packer config directories or files match the pattern: {pattern}')
+            targets.update(dict.fromkeys(Path(match) for match in matches))
+        else:
+            targets[Path(pattern)] = None
+
+    return list(targets)
+
+
+def validate_templates(command: list[str], config_dirs: list[Path], workers: int) -> dict[str, dict]:
+    """validate many templates concurrently with a bounded pool of workers
+    the command is the packer validate command without a target, and each config directory or file is appended to it
+    returns the validation result of each target keyed by the target"""
+
+    def run(config_dir: Path) -> dict:
+        """validate a single target and summarize its streamed machine-readable output"""
+        target_command: list[str] = command + [str(config_dir)]
+        start: float = time.monotonic()
+        try:
+            return_code, summary, _, stderr = run_machine_readable(target_command, cwd=config_dir if config_dir.is_dir() else config_dir.parent, tail=100)
+        except OSError as exc:
+            return_code, summary, stderr = 1, {'builds': {}, 'errors': [str(exc)]}, str(exc)
+
+        # flatten template and build errors, and fall back to stderr if the output contained none
+        errors: list[str] = summary['errors'] + [error for build in summary['builds'].values() for error in build['errors']]
+        if return_code != 0 and not errors:
+            errors = stderr.splitlines()
+
+        return {
+            'command': target_command,
+            'return_code': return_code,
+            'passed': return_code == 0,
+            'duration': time.monotonic() - start,
+            'errors': errors,
+        }
+
+    # validations are external processes, and so threads suffice to drive them concurrently
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        return dict(zip((str(config_dir) for config_dir in config_dirs), executor.map(run, config_dirs)))
+
+
+def validate_fingerprint(
+    config_dir: Path,
+    flags: set[str],
+    var: dict | None = None,
+    var_file: list[Path] | None = None,
+    only: list[str] | None = None,
+    excepts: list[str] | None = None,
+) -> str:
+    """return a fingerprint of the inputs to a validation: the template content, variables, build selection, flags, and installed versions of the required plugins"""
+    try:
+        plugins: dict[str, list[str]] = {
+            name: sorted(installed_plugin_versions(plugin['source'])) for name, plugin in required_plugins(config_dir).items() if plugin['source']
+        }
+    # legacy json templates have no required plugins
+    except FileNotFoundError:
+        plugins = {}
+
+    return universal.cache_key(build_fingerprint(config_dir, var, var_file, only, excepts), sorted(flags), plugins)
+
+
+def validate_cache_read(key: str, now: float | None = None, cache_dir: Path | None = None) -> dict | None:
+    """return the cached validation result for the fingerprint key, or None if there is no cached result or it has expired"""
+    cached: dict | None = universal.cache_read('packer_validate', key, cache_dir)
+    if cached is None or (cached.get('expires') is not None and (now or time.time()) >= cached['expires']):
+        return None
+    return cached['result']
+
+
+def validate_cache_write(key: str, result: dict, ttl: int | None = None, now: float | None = None, cache_dir: Path | None = None) -> None:
+    """cache the validation result for the fingerprint key, and expire it after the ttl seconds if specified"""
+    universal.cache_write('packer_validate', key, {'expires': None if ttl is None else (now or time.time()) + ttl, 'result': result}, cache_dir)
@@ -1,9 +1,18 @@
 """puppet agent module utilities"""
 
+import collections
+import contextlib
+import heapq
+import os
+import shutil
+import time
 import warnings
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 from typing import Final
 
+import yaml
+
 from ansible_collections.mschuchard.general.plugins.module_utils import universal
 
 
@@ -51,6 +60,12 @@ ARGS_MAP: Final[dict[str, dict[str, str]]] = {
     },
 }
 
+# top-level keys required within a json catalog
+CATALOG_KEYS: Final[frozenset[str]] = frozenset({'resources', 'edges', 'version'})
+
+# puppet agent message when the catalog run lock is held by another run
+RUN_IN_PROGRESS: Final[str] = 'Run of Puppet configuration client already in progress'
+
 
 def cmd(
     action: str,
@@ -94,22 +109,334 @@ def cmd(
         # handle catalog option
         elif catalog:
             # validate catalog file exists
-            if Path(catalog).is_file() and universal.validate_json_yaml_file(catalog):
+            if Path(catalog).is_file() and validate_catalog(catalog):
                 command.extend(['--catalog', str(catalog)])
             # otherwise error if it does not exist
             else:
                 raise FileNotFoundError(f'Puppet catalog file does not exist or is invalid: {catalog}')
         # handle manifest option
         elif manifest:
-            # validate manifest file exists
-            if Path(manifest).is_file():
+            # validate manifest file exists, or manifest directory contains manifests
+            if Path(manifest).is_file() or (Path(manifest).is_dir() and manifest_files(manifest)):
                 command.extend([str(manifest)])
 
             # otherwise error if it does not exist
             else:
-                raise FileNotFoundError(f'Puppet manifest is not a file or does not exist: {manifest}')
+                raise FileNotFoundError(f'Puppet manifest is not a file or a directory containing manifests, or does not exist: {manifest}')
         # one of these options must be provided (typically caught before this point)
         else:
             raise RuntimeError('One of manifest, execute, or catalog must be provided for apply action')
 
     return command
+
+
+# libyaml c parser when available, which is far faster for large reports
+SAFE_LOADER: Final[type] = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+class ReportLoader(SAFE_LOADER):
+    """safe yaml loader which constructs the ruby tagged objects of puppet state files as plain yaml types"""
+
+
+def construct_ruby(loader: ReportLoader, suffix: str, node: yaml.Node) -> dict | list | str:
+    """construct a ruby tagged node (e.g. !ruby/object:Puppet::Transaction::Report or !ruby/sym) as its untagged yaml type"""
+    if isinstance(node, yaml.MappingNode):
+        return loader.construct_mapping(node, deep=True)
+    if isinstance(node, yaml.SequenceNode):
+        return loader.construct_sequence(node, deep=True)
+    return loader.construct_scalar(node)
+
+
+ReportLoader.add_multi_constructor('!ruby/', construct_ruby)
+
+
+def manifest_files(directory: Path) -> list[Path]:
+    """return the manifest files within a directory in the order puppet applies them as a single main manifest"""
+    return sorted(file for file in Path(directory).rglob('*.pp') if file.is_file())
+
+
+def stage_manifests(manifests: list[Path], directory: Path) -> dict[str, str]:
+    """copy many manifests into a directory applied as a single main manifest, with file names preserving their order
+    a manifest directory is expanded into its manifest files in the order puppet applies them
+    returns the path of each staged manifest file mapped to its original manifest file"""
+    files: list[Path] = []
+
+    for manifest in manifests:
+        # verify manifest file exists, or manifest directory contains manifests
+        if Path(manifest).is_dir() and (directory_files := manifest_files(manifest)):
+            files.extend(directory_files)
+        elif Path(manifest).is_file():
+            files.append(Path(manifest))
+        else:
+            raise FileNotFoundError(f'Puppet manifest is not a file or a directory containing manifests, or does not exist: {manifest}')
+
+    staged: dict[str, str] = {}
+    for index, file in enumerate(files):
+        # prefix the order to preserve it and to disambiguate manifests with the same file name
+        staged_file: Path = Path(directory) / f'{index:04d}_{file.name}'
+        if staged_file.suffix != '.pp':
+            staged_file = staged_file.with_name(f'{staged_file.name}.pp')
+        shutil.copyfile(file, staged_file)
+        # puppet reports the file as located, and so also map the resolved path in case the directory is behind a symlink
+        for path in {staged_file.absolute(), staged_file.resolve()}:
+            staged[str(path)] = str(file)
+
+    return staged
+
+
+def manifest_attribution(statuses: Iterable[tuple[str, dict]], manifests: dict[str, str], attribution: list[dict]) -> Iterator[tuple[str, dict]]:
+    """attribute the resource statuses of a puppet report to the manifest files declaring the resources, and yield the statuses unchanged
+    the statuses are passed through so that another consumer (e.g. slowest_resources) shares the single pass over the report, and the attribution is extended once they are exhausted
+    manifests maps the path of each applied manifest file to the manifest to report, and resources declared elsewhere (e.g. within modules) are attributed to a null manifest"""
+    entries: dict[str | None, dict] = {
+        manifest: {'manifest': manifest, 'resources': 0, 'out_of_sync': 0, 'changed': [], 'failed': []} for manifest in [*manifests.values(), None]
+    }
+
+    for name, status in statuses:
+        entry: dict = entries[manifests.get(str(status.get('file')))]
+        entry['resources'] += 1
+        entry['out_of_sync'] += int(bool(status.get('out_of_sync')))
+        if status.get('changed'):
+            entry['changed'].append(name)
+        if status.get('failed'):
+            entry['failed'].append(name)
+        yield name, status
+
+    # omit the null manifest if every resource is declared within the manifests
+    attribution.extend(entry for manifest, entry in entries.items() if manifest is not None or entry['resources'] > 0)
+
+
+def validate_catalog(catalog: Path, cache_dir: Path | None = None) -> bool:
+    """verify a json catalog has a balanced structure with the required top-level keys by incrementally scanning it without decoding its values
+    verified catalogs are cached by content digest, and a catalog which is not a json object is validated as a yaml or json file instead"""
+    key: str = universal.file_digest(catalog)
+    if universal.cache_read('puppet_catalog', key, cache_dir) is not None:
+        return True
+
+    with Path(catalog).open('r', encoding='UTF-8') as file_handle:
+        # determine the format from the first non-whitespace character
+        head: str = file_handle.read(4096).lstrip()
+        file_handle.seek(0)
+        if not head.startswith('{'):
+            return universal.validate_json_yaml_file(catalog)
+
+        try:
+            keys: set[str] = set(universal.json_stream_keys(file_handle))
+        except ValueError as exc:
+            raise ValueError(f'Puppet catalog is not valid JSON: {catalog}: {exc}') from exc
+
+    if missing := CATALOG_KEYS - keys:
+        raise ValueError(f'Puppet catalog is missing required top-level keys {", ".join(sorted(missing))}: {catalog}')
+
+    # the cache is only an optimization
+    with contextlib.suppress(OSError):
+        universal.cache_write('puppet_catalog', key, {'keys': sorted(keys)}, cache_dir)
+    return True
+
+
+def state_dir() -> Path:
+    """return the default puppet state directory containing the last run summary and report for the current user"""
+    if os.geteuid() == 0:
+        return Path('/opt/puppetlabs/puppet/cache/state')
+    return Path.home() / '.puppetlabs' / 'opt' / 'puppet' / 'cache' / 'state'
+
+
+def run_lock_pid(lockfile: Path) -> int | None:
+    """return the pid of the agent run holding the catalog run lock (agent_catalog_run_lockfile), or None if it is unlocked or the lock is stale"""
+    try:
+        pid: int = int(Path(lockfile).read_text(encoding='UTF-8').strip())
+    except (OSError, ValueError):
+        return None
+
+    try:
+        # signal zero verifies existence without affecting the process
+        os.kill(pid, 0)
+    # the process exists but belongs to another user e.g. a root agent daemon checked by a non-root task
+    except PermissionError:
+        return pid
+    except OSError:
+        return None
+
+    return pid
+
+
+def wait_run_lock(lockfile: Path, timeout: float, interval: float = 0.5, max_interval: float = 10.0) -> float:
+    """wait with exponential backoff until the catalog run lock is released
+    returns the seconds waited, and raises an error if the lock is still held after the timeout"""
+    start: float = time.monotonic()
+
+    while (pid := run_lock_pid(lockfile)) is not None:
+        remaining: float = timeout - (time.monotonic() - start)
+        if remaining <= 0:
+            raise TimeoutError(f'{RUN_IN_PROGRESS} with pid {pid} after waiting {time.monotonic() - start:.1f} seconds: {lockfile}')
+        time.sleep(min(interval, remaining))
+        interval = min(interval * 2, max_interval)
+
+    return time.monotonic() - start
+
+
+def load_state_file(file: Path) -> dict:
+    """load a puppet state file (e.g. last_run_summary.yaml) with ruby tagged objects"""
+    # the loader derives from the safe loader, and so arbitrary ruby objects are never instantiated
+    try:
+        with Path(file).open('r', encoding='UTF-8') as file_handle:
+            content = yaml.load(file_handle, Loader=ReportLoader)
+    except yaml.YAMLError as exc:
+        raise ValueError(f'Puppet state file does not contain valid YAML: {file}') from exc
+
+    if isinstance(content, dict):
+        return content
+    raise ValueError(f'Puppet state file does not contain a YAML mapping: {file}')
+
+
+def run_summary(summary: dict) -> dict:
+    """return the resource counts, event counts, change total, and phase timings in seconds of a puppet last run summary"""
+    timings: dict[str, float] = dict(summary.get('time') or {})
+
+    return {
+        'resources': dict(summary.get('resources') or {}),
+        'events': dict(summary.get('events') or {}),
+        'changes': (summary.get('changes') or {}).get('total', 0),
+        'last_run': timings.pop('last_run', None),
+        'timings': timings,
+    }
+
+
+def compose_event_node(loader: yaml.SafeLoader, anchors: dict[str, yaml.Node]) -> yaml.Node:
+    """compose the yaml node beginning at the next parser event, and record its anchor for subsequent aliases
+    this is equivalent to the composer of the pure python loader, which the libyaml loader does not expose for partial documents"""
+    event = loader.get_event()
+
+    node: yaml.Node
+    match event:
+        case yaml.AliasEvent():
+            if event.anchor not in anchors:
+                raise ValueError(f'Puppet report contains an alias to an undefined anchor: {event.anchor}')
+            return anchors[event.anchor]
+        case yaml.ScalarEvent():
+            tag: str | None = event.tag if event.tag not in (None, '!') else loader.resolve(yaml.ScalarNode, event.value, event.implicit)
+            node = yaml.ScalarNode(tag, event.value, event.start_mark, event.end_mark, style=event.style)
+        case yaml.SequenceStartEvent():
+            node = yaml.SequenceNode(
+                event.tag if event.tag not in (None, '!') else loader.resolve(yaml.SequenceNode, None, event.implicit), [], event.start_mark, None
+            )
+        case yaml.MappingStartEvent():
+            node = yaml.MappingNode(
+                event.tag if event.tag not in (None, '!') else loader.resolve(yaml.MappingNode, None, event.implicit), [], event.start_mark, None
+            )
+        case _:
+            raise ValueError(f'Unexpected YAML event in Puppet report: {event}')
+
+    # record the anchor before composing the children since they may alias their ancestor
+    if event.anchor is not None:
+        anchors[event.anchor] = node
+
+    if isinstance(node, yaml.SequenceNode):
+        while not loader.check_event(yaml.SequenceEndEvent):
+            node.value.append(compose_event_node(loader, anchors))
+        node.end_mark = loader.get_event().end_mark
+    elif isinstance(node, yaml.MappingNode):
+        while not loader.check_event(yaml.MappingEndEvent):
+            node.value.append((compose_event_node(loader, anchors), compose_event_node(loader, anchors)))
+        node.end_mark = loader.get_event().end_mark
+
+    return node
+
+
+def skip_event_node(loader: yaml.SafeLoader, anchors: dict[str, yaml.Node]) -> None:
+    """consume the parser events of the next yaml node without constructing it
+    only the anchored nodes within it are composed and recorded, since aliases elsewhere in the document may refer to them"""
+    depth: int = 0
+    while True:
+        event = loader.peek_event()
+        if isinstance(event, (yaml.ScalarEvent, yaml.SequenceStartEvent, yaml.MappingStartEvent)) and event.anchor is not None:
+            compose_event_node(loader, anchors)
+        else:
+            loader.get_event()
+            if isinstance(event, (yaml.SequenceStartEvent, yaml.MappingStartEvent)):
+                depth += 1
+            elif isinstance(event, (yaml.SequenceEndEvent, yaml.MappingEndEvent)):
+                depth -= 1
+        if depth == 0:
+            return
+
+
+def stream_resource_statuses(file: Path, loader: type = ReportLoader) -> Iterator[tuple[str, dict]]:
+    """incrementally yield the name and status (e.g. events and evaluation time) of each resource within a puppet report from the parser events
+    only one resource status at a time is ever constructed, and all other report sections (e.g. logs and metrics) are skipped without construction, so memory usage is independent of report size
+    the anchored nodes of the whole document are retained (but not constructed) for aliases, which psych emits only for shared objects"""
+    with Path(file).open('r', encoding='UTF-8') as file_handle:
+        parser = loader(file_handle)
+        anchors: dict[str, yaml.Node] = {}
+        try:
+            # stream start, document start, and top-level report mapping start
+            for event_type in (yaml.StreamStartEvent, yaml.DocumentStartEvent, yaml.MappingStartEvent):
+                if not parser.check_event(event_type):
+                    raise ValueError(f'Puppet report does not contain a YAML mapping: {file}')
+                parser.get_event()
+
+            while not parser.check_event(yaml.MappingEndEvent):
+                key = parser.get_event()
+                if not (isinstance(key, yaml.ScalarEvent) and key.value == 'resource_statuses' and parser.check_event(yaml.MappingStartEvent)):
+                    skip_event_node(parser, anchors)
+                    continue
+
+                parser.get_event()
+                while not parser.check_event(yaml.MappingEndEvent):
+                    name = parser.construct_object(compose_event_node(parser, anchors), deep=True)
+                    status = parser.construct_object(compose_event_node(parser, anchors), deep=True)
+                    # release the constructed objects of the resource
+                    parser.constructed_objects = {}
+                    yield str(name), status if isinstance(status, dict) else {}
+                parser.get_event()
+        except yaml.YAMLError as exc:
+            raise ValueError(f'Puppet report does not contain valid YAML: {file}') from exc
+        finally:
+            parser.dispose()
+
+
+def slowest_resources(statuses: Iterable[tuple[str, dict]], slowest: int = 10) -> list[dict]:
+    """return the resources with the longest evaluation times in descending order from the resource statuses of a puppet report
+    the statuses are consumed incrementally, and so only the slowest resources are retained"""
+    resources: Iterator[dict] = (
+        {
+            'resource': name,
+            'resource_type': status.get('resource_type'),
+            'title': status.get('title'),
+            'file': status.get('file'),
+            'line': status.get('line'),
+            'evaluation_time': float(status.get('evaluation_time') or 0.0),
+            'changed': bool(status.get('changed')),
+            'failed': bool(status.get('failed')),
+            'out_of_sync': bool(status.get('out_of_sync')),
+        }
+        for name, status in statuses
+    )
+
+    return heapq.nlargest(slowest, resources, key=lambda resource: resource['evaluation_time'])
+
+
+def run_results(directory: Path, slowest: int = 0, since: float | None = None, manifests: dict[str, str] | None = None) -> dict:
+    """return the parsed last run summary within the puppet state directory, and the slowest resources from the last run report if slowest is positive
+    the resource changes from the last run report are also attributed to the manifests if specified (see manifest_attribution)
+    raises an error if the summary was not written since the specified epoch time (truncated for coarse filesystem timestamps) e.g. the run failed before completion"""
+    summary_file: Path = Path(directory) / 'last_run_summary.yaml'
+    if not summary_file.is_file() or (since is not None and summary_file.stat().st_mtime < int(since)):
+        raise FileNotFoundError(f'Puppet last run summary was not written by this run: {summary_file}')
+
+    results: dict = {'summary': run_summary(load_state_file(summary_file))}
+    if slowest > 0 or manifests:
+        # the report is streamed once, and so the statuses are attributed to the manifests as they pass through to the slowest resources
+        statuses: Iterable[tuple[str, dict]] = stream_resource_statuses(Path(directory) / 'last_run_report.yaml')
+        attribution: list[dict] = []
+        if manifests:
+            statuses = manifest_attribution(statuses, manifests, attribution)
+        if slowest > 0:
+            results['slowest_resources'] = slowest_resources(statuses, slowest)
+        else:
+            # exhaust the statuses for the attribution alone
+            collections.deque(statuses, maxlen=0)
+        if manifests:
+            results['manifests'] = attribution
+
+    return results
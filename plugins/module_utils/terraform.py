@@ -1,13 +1,25 @@
 """terraform module utilities"""
 
+import contextlib
+import fcntl
+import fnmatch
 import itertools
+import os
+import random
+import subprocess
+import tempfile
+import time
 import warnings
+from collections.abc import Callable, Generator, Iterator
 from pathlib import Path
 from typing import Final
 
 from ansible_collections.mschuchard.general.plugins.module_utils import universal
 
 
+# substring of terraform stderr denoting a state lock held by another process
+LOCK_ERROR: Final[str] = 'Error acquiring the state lock'
+
 # dictionary that maps input args to terraform flags
 FLAGS_MAP: Final[dict[str, dict[str, str]]] = {
     'apply': {
@@ -24,6 +36,9 @@ FLAGS_MAP: Final[dict[str, dict[str, str]]] = {
         'upgrade': '-upgrade',
     },
     'plan': {'destroy': '-destroy', 'refresh_only': '-refresh-only'},
+    'show': {
+        'json': '-json',
+    },
     'test': {
         'json': '-json',
     },
@@ -61,6 +76,7 @@ ARGS_MAP: Final[dict[str, dict[str, str]]] = {
         'var': '',
         'var_file': '',
     },
+    'show': {},
     'test': {
         'cloud_run': '-cloud-run=',
         'filter': '',
@@ -86,8 +102,8 @@ def cmd(action: str, flags: set[str] = set(), args: dict[str, str | list[str] |
 
     # change directory if target_dir is not cwd (must be arg to base command)
     if target_dir != Path.cwd():
-        # first check if this is an apply action
-        if action == 'apply':
+        # first check if this is an apply or show action
+        if action in ['apply', 'show']:
             # check if existing target directory
             if Path(target_dir).is_dir():
                 command.append(f'-chdir={target_dir}')
@@ -135,7 +151,7 @@ def cmd(action: str, flags: set[str] = set(), args: dict[str, str | list[str] |
             warnings.warn(f'Unsupported Terraform arg specified: {arg}', RuntimeWarning)
 
     # append plan file if applicable
-    if action == 'apply' and Path(target_dir).is_file():
+    if action in ['apply', 'show'] and Path(target_dir).is_file():
         command.append(str(target_dir))
 
     return command
@@ -204,3 +220,130 @@ def ansible_to_terraform(args: dict) -> None:
             case 'var_file':
                 # assign converted value to var_file key
                 args['var_file'] = universal.var_files_converter(arg_value)
+
+
+def resource_change_matches(
+    resource_change: dict, addresses: list[str] | None = None, types: list[str] | None = None, actions: list[str] | None = None
+) -> bool:
+    """determine if a plan resource change matches all of the specified address (glob), type, and action filters
+    an empty filter matches everything"""
+    # address filters support shell-style globs e.g. module.network.*
+    if addresses and not any(fnmatch.fnmatchcase(resource_change.get('address', ''), address) for address in addresses):
+        return False
+    if types and resource_change.get('type') not in types:
+        return False
+    # a replacement has both delete and create actions, so match if any action is requested
+    return not actions or bool(set(resource_change.get('change', {}).get('actions', [])) & set(actions))
+
+
+def stream_show_json(command: list[str], cwd: Path, key: str, match: Callable[[dict], bool] = lambda _: True) -> tuple[int, list[dict], str]:
+    """execute a terraform show json command and incrementally extract the elements of a top-level array (e.g. resource_changes) that satisfy the match
+    the json document is never fully materialized in memory, and terraform is terminated as soon as the array (even if empty) has been read
+    returns the return code, the matching elements, and the stderr"""
+    matches: list[dict] = []
+    found: bool = False
+
+    # stderr is spooled to a file to avoid a pipe deadlock while stdout is streamed
+    with tempfile.TemporaryFile(mode='w+', encoding='UTF-8') as stderr_file:
+        with subprocess.Popen(
+            command, cwd=cwd, stdout=subprocess.PIPE, stderr=stderr_file, text=True, env=os.environ | {'TF_IN_AUTOMATION': 'true'}
+        ) as process:
+            # stdout is always a pipe here so assert for typing
+            assert process.stdout is not None
+            elements: Generator = universal.json_stream_array(process.stdout, key)
+            while True:
+                try:
+                    element = next(elements)
+                except StopIteration as stop:
+                    # otherwise the document was read to its end
+                    found = stop.value
+                    break
+                if match(element):
+                    matches.append(element)
+
+            # the remainder of the document is unneeded once the array has been read, and terraform would otherwise block writing it to the pipe
+            process.stdout.close()
+            if process.poll() is None:
+                process.terminate()
+            return_code: int = process.wait()
+
+        stderr_file.seek(0)
+        stderr: str = stderr_file.read()
+
+    # early termination is expected and not an error if the array was consumed
+    return 0 if found else return_code, matches, stderr
+
+
+def drift_changes(resource_drift: dict) -> dict:
+    """convert a plan resource drift element into its address, actions, and attribute-level before and after differences"""
+    change: dict = resource_drift.get('change', {})
+    # deleted or created objects have null before or after values
+    before: dict = change.get('before') or {}
+    after: dict = change.get('after') or {}
+
+    return {
+        'address': resource_drift.get('address'),
+        'actions': change.get('actions', []),
+        'attributes': {
+            attribute: {'before': before.get(attribute), 'after': after.get(attribute)}
+            for attribute in sorted(before.keys() | after.keys())
+            if before.get(attribute) != after.get(attribute)
+        },
+    }
+
+
+def stale_addresses(index: dict[str, dict], addresses: list[str], max_age: int, now: float) -> list[str]:
+    """determine the state addresses requiring a drift refresh according to the drift index
+    an address is stale if it has not been checked within max_age seconds, was drifted when last checked, or is absent from the index"""
+    return [address for address in addresses if address not in index or index[address].get('drifted', True) or now - index[address].get('checked', 0) > max_age]
+
+
+def update_drift_index(index: dict[str, dict], checked: list[str], drifted: list[str], now: float) -> dict[str, dict]:
+    """record the drift check timestamp and result for the checked addresses within the drift index"""
+    # in this function index dict is mutable pseudo-reference and also returned
+    for address in checked:
+        index[address] = {'checked': now, 'drifted': address in drifted}
+
+    return index
+
+
+@contextlib.contextmanager
+def config_lock(config_dir: Path, lock_dir: Path | None = None) -> Iterator[float]:
+    """serialize terraform executions on the same host for the same root module config directory with an exclusive file lock
+    the lock directory defaults to the locks directory within the cache directory
+    yields the seconds waited in the queue to acquire the lock"""
+    lock_dir = lock_dir or universal.CACHE_DIR / 'locks'
+    Path(lock_dir).mkdir(mode=0o700, parents=True, exist_ok=True)
+    lock_file: Path = Path(lock_dir) / f'{universal.cache_key(str(Path(config_dir).resolve()))}.lock'
+
+    start: float = time.monotonic()
+    with lock_file.open('a') as file_handle:
+        # blocks until other same host callers release the lock
+        fcntl.flock(file_handle, fcntl.LOCK_EX)
+        try:
+            yield time.monotonic() - start
+        finally:
+            fcntl.flock(file_handle, fcntl.LOCK_UN)
+
+
+def retry_state_lock(
+    run_command: Callable[..., tuple[int, str, str]], command: list[str], cwd: Path, retries: int = 0, backoff: float = 1.0
+) -> tuple[int, str, str, float]:
+    """execute a terraform command, and retry with jittered exponential backoff while the state lock is held by another process
+    run_command should be AnsibleModule.run_command
+    returns the return code, stdout, stderr, and the seconds waited between retries"""
+    waited: float = 0.0
+
+    for attempt in range(retries + 1):
+        return_code, stdout, stderr = run_command(command, cwd=cwd, environ_update={'TF_IN_AUTOMATION': 'true'})
+
+        # success, unrelated failure, or retries exhausted
+        if return_code == 0 or LOCK_ERROR not in stderr or attempt == retries:
+            break
+
+        # full jitter spreads out concurrent callers contending for the same lock
+        delay: float = random.uniform(0, backoff * 2**attempt)
+        time.sleep(delay)
+        waited += delay
+
+    return return_code, stdout, stderr, waited
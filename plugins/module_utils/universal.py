@@ -1,11 +1,29 @@
 """universal module utilities"""
 
+import hashlib
 import json
+import os
+import re
+import tempfile
 import warnings
+from collections.abc import Generator, Iterator
 from pathlib import Path
+from typing import IO, Final
 
 import yaml
 
+# default location for module result caches on the target system
+CACHE_DIR: Final[Path] = Path.home() / '.ansible' / 'cache' / 'mschuchard.general'
+
+# json structural characters relevant to the stream scanner
+JSON_STRUCTURE: Final[re.Pattern] = re.compile(r'[{}\[\]",]')
+JSON_STRING_END: Final[re.Pattern] = re.compile(r'["\\]')
+JSON_WHITESPACE: Final[re.Pattern] = re.compile(r'[ \t\r\n]*')
+# characters which may continue a json number split across chunks
+JSON_NUMBER_TAIL: Final[re.Pattern] = re.compile(r'[0-9.eE+-]+')
+# longest json token which may be split across chunks (i.e. a \uXXXX escape), so decode errors before it are conclusive
+JSON_TOKEN_TAIL: Final[int] = 6
+
 
 def action_flags_command(command: list[str], flags: set[str] = set(), action_flags_map: dict[str, str] = {}) -> list[str]:
     """convert action flags dict into list of command strings
@@ -107,3 +125,262 @@ def params_to_flags_args(params: dict, spec: dict[str, dict]) -> tuple[set[str],
                     args.update({param: attribute})
 
     return flags, args
+
+
+def file_digest(file: Path, chunk_size: int = 1048576) -> str:
+    """return the sha256 hex digest of a file read in chunks so memory usage is independent of file size"""
+    digest = hashlib.sha256()
+
+    with Path(file).open('rb') as file_handle:
+        # iterate through file chunks until exhausted
+        for chunk in iter(lambda: file_handle.read(chunk_size), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def cache_key(*components: str | dict | list | None) -> str:
+    """return a deterministic sha256 hex digest for the input components (e.g. file digests and module params)"""
+    return hashlib.sha256(json.dumps(components, sort_keys=True, default=str).encode('UTF-8')).hexdigest()
+
+
+def cache_read(namespace: str, key: str, cache_dir: Path | None = None) -> dict | None:
+    """return the cached content for the namespace and key, or None if there is no valid cache entry
+    the cache directory defaults to CACHE_DIR"""
+    cache_file: Path = Path(cache_dir or CACHE_DIR) / namespace / f'{key}.json'
+
+    try:
+        return json.loads(cache_file.read_text(encoding='UTF-8'))
+    # cache miss or corrupted cache entry are both treated as a miss
+    except (OSError, ValueError):
+        return None
+
+
+def atomic_write(file: Path, content: str, mode: int | None = None) -> None:
+    """atomically write the content to the file so concurrent readers never observe a partial file"""
+    # write to a temporary file in the same directory and then rename
+    file_descriptor, temp_file = tempfile.mkstemp(dir=Path(file).parent, prefix=f'.{Path(file).name}.', suffix='.tmp')
+    try:
+        with os.fdopen(file_descriptor, 'w', encoding='UTF-8') as file_handle:
+            file_handle.write(content)
+        # mkstemp creates files readable only by the owner
+        if mode is not None:
+            os.chmod(temp_file, mode)
+        os.replace(temp_file, file)
+    except BaseException:
+        Path(temp_file).unlink(missing_ok=True)
+        raise
+
+
+def cache_write(namespace: str, key: str, content: dict, cache_dir: Path | None = None) -> None:
+    """atomically write the content to the cache for the namespace and key
+    the cache directory defaults to CACHE_DIR"""
+    namespace_dir: Path = Path(cache_dir or CACHE_DIR) / namespace
+    namespace_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+    atomic_write(namespace_dir / f'{key}.json', json.dumps(content))
+
+
+def json_stream_array(stream: IO[str], key: str, chunk_size: int = 65536) -> Generator[str | int | float | bool | list | dict | None, None, bool]:
+    """incrementally yield the elements of the array value for a key in a top-level json object
+    only one array element at a time is ever materialized, and all other values are skipped without decoding, so memory usage is independent of document size
+    iteration ends after the array is exhausted, and the remainder of the stream is not read
+    returns whether the array was found, and otherwise the stream was read to its end"""
+    decoder = json.JSONDecoder()
+    buffer: str = ''
+    index: int = 0
+    depth: int = 0
+    eof: bool = False
+    # top-level object key state
+    expect_key: bool = False
+    current_key: str | None = None
+
+    def refill() -> bool:
+        """discard the consumed buffer and read the next chunk; returns False at end of stream"""
+        nonlocal buffer, index, eof
+        chunk: str = stream.read(chunk_size)
+        buffer = buffer[index:] + chunk
+        index = 0
+        eof = len(chunk) == 0
+        return not eof
+
+    while True:
+        match = JSON_STRUCTURE.search(buffer, index)
+        # no structural characters remain in the buffer
+        if match is None:
+            index = len(buffer)
+            if not refill():
+                return False
+            continue
+
+        index = match.end()
+        char: str = match.group()
+
+        # strings are scanned until their closing quote, and captured only if they are keys of the top-level object
+        if char == '"':
+            capture: bool = depth == 1 and expect_key
+            text: list[str] = []
+            while True:
+                end = JSON_STRING_END.search(buffer, index)
+                if end is None or (end.group() == '\\' and end.end() >= len(buffer)):
+                    # incomplete string in buffer so retain only a trailing escape for the next chunk
+                    retained: int = len(buffer) if end is None else end.start()
+                    if capture:
+                        text.append(buffer[index:retained])
+                    index = retained
+                    if not refill():
+                        raise ValueError(f'Unterminated string in JSON stream while searching for key: {key}')
+                    continue
+                if capture:
+                    text.append(buffer[index : end.start()])
+                if end.group() == '"':
+                    index = end.end()
+                    break
+                # skip escaped character
+                if capture:
+                    text.append(buffer[end.start() : end.end() + 1])
+                index = end.end() + 1
+
+            if capture:
+                current_key = json.loads(f'"{"".join(text)}"')
+                expect_key = False
+        elif char in '{[':
+            # found the array value for the requested key
+            if depth == 1 and char == '[' and current_key == key:
+                while True:
+                    # skip whitespace and delimiters between elements
+                    while index < len(buffer) and buffer[index] in ' \t\r\n,':
+                        index += 1
+                    if index >= len(buffer):
+                        if not refill():
+                            raise ValueError(f'Unterminated array in JSON stream for key: {key}')
+                        continue
+                    if buffer[index] == ']':
+                        return True
+
+                    try:
+                        element, element_end = decoder.raw_decode(buffer, index)
+                    except ValueError:
+                        element_end = len(buffer)
+                    # an element is only complete if further content follows it in the buffer
+                    if element_end >= len(buffer):
+                        if not refill():
+                            raise ValueError(f'Unterminated array in JSON stream for key: {key}')
+                        continue
+
+                    index = element_end
+                    yield element
+
+            depth += 1
+            expect_key = depth == 1 and char == '{'
+        elif char in '}]':
+            depth -= 1
+        # comma delimits the top-level object members
+        elif depth == 1:
+            expect_key = True
+
+
+def json_stream_keys(stream: IO[str], chunk_size: int = 65536) -> Iterator[str]:
+    """incrementally yield the keys of a top-level json object while validating the entire document
+    array and object values are decoded one element or member at a time and then discarded, so memory usage is bounded by the largest element, member, or other value rather than the document size
+    the stream is read in chunks which double for a value exceeding the buffer, so each value is re-decoded at most logarithmically many times, and invalid content fails at the first chunk containing it"""
+    decoder = json.JSONDecoder()
+    buffer: str = ''
+    index: int = 0
+
+    def refill(grow: bool = False) -> bool:
+        """discard the consumed buffer and read the next chunk, or as much as is pending if growing for an incomplete value; returns False at end of stream"""
+        nonlocal buffer, index
+        chunk: str = stream.read(max(chunk_size, len(buffer) - index) if grow else chunk_size)
+        buffer = buffer[index:] + chunk
+        index = 0
+        return len(chunk) > 0
+
+    def peek() -> str:
+        """skip whitespace and return the next character, or an empty string at end of stream"""
+        nonlocal index
+        while True:
+            index = JSON_WHITESPACE.match(buffer, index).end()
+            if index < len(buffer):
+                return buffer[index]
+            if not refill():
+                return ''
+
+    def consume(expected: str) -> str:
+        """consume and return the next character, which must be one of the expected characters"""
+        nonlocal index
+        char: str = peek()
+        if not char:
+            raise ValueError('Unterminated object in JSON stream')
+        if char not in expected:
+            raise ValueError(f'Expected one of {" ".join(expected)} but found {char} in JSON stream')
+        index += 1
+        return char
+
+    def decode(terminators: str) -> str | int | float | bool | list | dict | None:
+        """decode the json value following the index, which is complete once one of the terminators follows it"""
+        nonlocal index
+        peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, index)
+            except json.JSONDecodeError as exc:
+                # only an unterminated string or a token split at the end of the buffer may be completed by the next chunk
+                if not exc.msg.startswith('Unterminated string') and exc.pos < len(buffer) - JSON_TOKEN_TAIL:
+                    raise
+                if not refill(grow=True):
+                    raise
+                continue
+            # a number followed only by number characters may continue in the next chunk
+            following: int = JSON_WHITESPACE.match(buffer, end).end()
+            if following >= len(buffer) or (buffer[following] not in terminators and JSON_NUMBER_TAIL.fullmatch(buffer, end)):
+                if not refill(grow=True):
+                    raise ValueError('Unterminated object in JSON stream')
+                continue
+            index = end
+            return value
+
+    def decode_members(close: str) -> None:
+        """decode the elements or members of the array or object following the index one at a time"""
+        nonlocal index
+        index += 1
+        if peek() == close:
+            index += 1
+            return
+        while True:
+            if close == '}':
+                if peek() != '"':
+                    consume('"')
+                decode(':')
+                consume(':')
+            decode(f',{close}')
+            if consume(f',{close}') == close:
+                return
+
+    if peek() != '{':
+        raise ValueError('JSON stream does not contain an object')
+    index += 1
+
+    if peek() == '}':
+        index += 1
+    else:
+        while True:
+            if peek() != '"':
+                consume('"')
+            yield decode(':')
+            consume(':')
+
+            # decode arrays and objects one element or member at a time
+            match peek():
+                case '[':
+                    decode_members(']')
+                case '{':
+                    decode_members('}')
+                case _:
+                    decode(',}')
+
+            if consume(',}') == '}':
+                break
+
+    # only whitespace may follow the top-level object
+    if peek():
+        raise ValueError('Unexpected content after object in JSON stream')
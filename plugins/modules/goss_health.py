@@ -0,0 +1,133 @@
+#!/usr/bin/python
+
+# Copyright (c) Matthew Schuchard
+# MIT License (see LICENSE or https://opensource.org/license/mit)
+"""ansible module for goss health"""
+
+DOCUMENTATION = r"""
+---
+module: goss_health
+
+short_description: Module to query a GoSS health endpoint.
+
+version_added: "1.4.3"
+
+description: Query the health endpoints of running GoSS servers (e.g. launched with M(mschuchard.general.goss_serve)) instead of re-executing the validations. Every combination of O(ports) and O(endpoints) is queried concurrently, and connections are kept alive and reused for the queries to the same port. The reports are requested in the O(format) through content negotiation and parsed into structured results. The task fails if any endpoint is unreachable or unhealthy.
+
+options:
+    endpoints:
+        description: Endpoints to query on each port.
+        required: false
+        default: ['/healthz']
+        type: list
+        elements: str
+    format:
+        description: Format of the report to request and parse. V(json) returns the per-check results, summary totals, and slowest checks, and V(prometheus) returns the metric samples and check outcome totals.
+        required: false
+        default: json
+        type: str
+        choices: ['json', 'prometheus']
+    host:
+        description: Address of the GoSS servers.
+        required: false
+        default: 127.0.0.1
+        type: str
+    ports:
+        description: Ports of the GoSS servers to query.
+        required: false
+        default: [8080]
+        type: list
+        elements: int
+    slowest:
+        description: Number of slowest checks to return for each endpoint with the json format.
+        required: false
+        default: 10
+        type: int
+    timeout:
+        description: Seconds to wait for each endpoint to respond.
+        required: false
+        default: 10
+        type: int
+    workers:
+        description: Maximum number of endpoints to query concurrently.
+        required: false
+        default: 4
+        type: int
+
+requirements:
+    - goss >= 0.4.0
+
+author: Matthew Schuchard (@mschuchard)
+"""
+
+EXAMPLES = r"""
+# query the default health endpoint at localhost:8080/healthz
+- name: Query the default health endpoint at localhost:8080/healthz
+  mschuchard.general.goss_health:
+
+# query the health endpoints of two servers on ports 8765 and 8766 in the prometheus format
+- name: Query the health endpoints of two servers on ports 8765 and 8766 in the prometheus format
+  mschuchard.general.goss_health:
+    format: prometheus
+    ports:
+    - 8765
+    - 8766
+"""
+
+RETURN = r"""
+healthy:
+    description: Whether every endpoint responded and reported all checks passing.
+    type: bool
+    returned: always
+results:
+    description: The report of each endpoint with its url, port, endpoint, http status, health, query duration in seconds, the parsed report contents of the format, and the error if the endpoint was unreachable or did not respond with a GoSS report.
+    type: list
+    elements: dict
+    returned: always
+    sample: [{'url': 'http://127.0.0.1:8080/healthz', 'port': 8080, 'endpoint': '/healthz', 'status': 200, 'healthy': true, 'duration': 0.012, 'results': [], 'summary': {'test_count': 1, 'failed_count': 0, 'skipped_count': 0, 'duration': 0.004}, 'slowest': []}]
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.mschuchard.general.plugins.module_utils import goss
+
+
+def main() -> None:
+    """primary function for goss health module"""
+    # instanstiate ansible module
+    module = AnsibleModule(
+        argument_spec={
+            'endpoints': {'type': 'list', 'elements': 'str', 'required': False, 'default': ['/healthz']},
+            'format': {'type': 'str', 'required': False, 'default': 'json', 'choices': ['json', 'prometheus']},
+            'host': {'type': 'str', 'required': False, 'default': '127.0.0.1'},
+            'ports': {'type': 'list', 'elements': 'int', 'required': False, 'default': [8080]},
+            'slowest': {'type': 'int', 'required': False, 'default': 10},
+            'timeout': {'type': 'int', 'required': False, 'default': 10},
+            'workers': {'type': 'int', 'required': False, 'default': 4},
+        },
+        supports_check_mode=True,
+    )
+
+    # initialize
+    targets: list[tuple[int, str]] = [(port, endpoint) for port in module.params.get('ports') for endpoint in module.params.get('endpoints')]
+
+    # query the endpoints; this is read-only and so also executes in check mode
+    results: list[dict] = goss.query_health(
+        module.params.get('host'),
+        targets,
+        format=module.params.get('format'),
+        timeout=module.params.get('timeout'),
+        workers=module.params.get('workers'),
+        slowest=module.params.get('slowest'),
+    )
+    healthy: bool = all(result['healthy'] for result in results)
+
+    # post-process
+    if healthy:
+        module.exit_json(changed=False, healthy=healthy, results=results)
+    else:
+        unhealthy: list[str] = [result['url'] for result in results if not result['healthy']]
+        module.fail_json(msg=f'GoSS health endpoints are unreachable or unhealthy: {", ".join(unhealthy)}', healthy=healthy, results=results)
+
+
+if __name__ == '__main__':
+    main()
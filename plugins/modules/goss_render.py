@@ -15,11 +15,22 @@ version_added: "1.0.0"
 description: Render a single valid parsed JSON/YAML gossfile.
 
 options:
+    cache:
+        description: Cache the rendered gossfile keyed by the content of the gossfile and every included gossfile, the vars payload, and the other parameters. If the key matches a previous render, then the cached rendered gossfile is returned without executing GoSS.
+        required: false
+        default: false
+        type: bool
+        new_in_version: "1.4.3"
     debug:
         description: Additionally render the golang template prior to rendering the gossfile.
         required: false
         default: false
         type: bool
+    dest:
+        description: Location of a file to which the rendered gossfile is written. The module reports changed only if the rendered gossfile differs from the current content of this file.
+        required: false
+        type: path
+        new_in_version: "1.4.3"
     gossfile:
         description: The specific gossfile used for rendering the output.
         required: false
@@ -40,7 +51,7 @@ options:
         required: false
         type: path
     vars_inline:
-        description: Variables for the template.
+        description: Variables for the template. Payloads larger than 32KiB when encoded are passed to GoSS in a temporary vars file readable only by the owner, which is removed when the module exits.
         required: false
         type: dict
 
@@ -67,9 +78,21 @@ EXAMPLES = r"""
     vars_inline:
       my_service: httpd
       my_package: apache
+
+# render a gossfile to /path/to/rendered.yaml and only re-render when the gossfile, its includes, or the vars change
+- name: Render a gossfile to /path/to/rendered.yaml and only re-render when the gossfile, its includes, or the vars change
+  mschuchard.general.goss_render:
+    gossfile: /path/to/my_gossfile.yaml
+    vars: /path/to/vars.yaml
+    cache: true
+    dest: /path/to/rendered.yaml
 """
 
 RETURN = r"""
+cached:
+    description: Whether the rendered gossfile was returned from the cache instead of GoSS.
+    type: bool
+    returned: cache is true
 command:
     description: The raw GoSS command executed by Ansible.
     type: str
@@ -82,12 +105,27 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.mschuchard.general.plugins.module_utils import goss, universal
 
 
+def write_dest(module: AnsibleModule, dest: str, rendered: str) -> bool:
+    """write the rendered gossfile to the destination file if its content differs, and return whether it differed"""
+    try:
+        if Path(dest).is_file() and Path(dest).read_text(encoding='UTF-8') == rendered:
+            return False
+        if not module.check_mode:
+            # retain the mode of an existing destination file
+            universal.atomic_write(Path(dest), rendered, mode=Path(dest).stat().st_mode & 0o777 if Path(dest).is_file() else 0o644)
+    except OSError as exc:
+        module.fail_json(msg=f'Unable to write rendered gossfile to {dest}: {exc}')
+    return True
+
+
 def main() -> None:
     """primary function for goss render module"""
     # instanstiate ansible module
     module = AnsibleModule(
         argument_spec={
+            'cache': {'type': 'bool', 'required': False, 'default': False, 'new_in_version': '1.4.3'},
             'debug': {'type': 'bool', 'required': False},
+            'dest': {'type': 'path', 'required': False, 'new_in_version': '1.4.3'},
             'gossfile': {'type': 'path', 'required': False, 'default': Path.cwd()},
             'log_level': {'type': 'str', 'required': False, 'new_in_version': '1.4.3'},
             'package': {'type': 'str', 'required': False},
@@ -100,6 +138,8 @@ def main() -> None:
 
     # initialize
     changed: bool = False
+    cache: bool = module.params.pop('cache')
+    dest: str | None = module.params.pop('dest')
     vars: Path = module.params.get('vars')
     vars_inline: dict = module.params.get('vars_inline')
     package: str = module.params.get('package')
@@ -124,6 +164,22 @@ def main() -> None:
     # determine goss command
     command: list[str] = goss.cmd(action='render', flags=flags_args[0], args=args, gossfile=gossfile)
 
+    # return the cached render for an unchanged gossfile tree and vars
+    key: str = ''
+    if cache:
+        key = goss.render_fingerprint(
+            gossfile if gossfile != Path.cwd() else gossfile / 'goss.yaml',
+            Path(vars) if vars else None,
+            vars_inline,
+            package=package,
+            log_level=loglevel,
+            debug=module.params.get('debug'),
+        )
+        cached: dict | None = universal.cache_read('goss_render', key)
+        if cached is not None:
+            changed = write_dest(module, dest, cached['stdout']) if dest else False
+            module.exit_json(changed=changed, cached=True, stdout=cached['stdout'], stderr='', command=command)
+
     # exit early for check mode
     if module.check_mode:
         module.exit_json(changed=False, command=command)
@@ -135,11 +191,16 @@ def main() -> None:
     return_code, stdout, stderr = module.run_command(command, cwd=cwd)
 
     # check idempotence
-    if len(stdout) > 0:
+    if dest and return_code == 0:
+        changed = write_dest(module, dest, stdout)
+    elif len(stdout) > 0:
         changed = True
 
     # post-process
     if return_code == 0:
+        if key:
+            universal.cache_write('goss_render', key, {'stdout': stdout})
+            module.exit_json(changed=changed, cached=False, stdout=stdout, stderr=stderr, command=command)
         module.exit_json(changed=changed, stdout=stdout, stderr=stderr, command=command)
     else:
         module.fail_json(
@@ -12,7 +12,7 @@ short_description: Module to serve a GoSS health endpoint.
 
 version_added: "1.0.0"
 
-description: Serve a GoSS health endpoint for validating systems.
+description: Serve a GoSS health endpoint for validating systems. By default the server executes in the foreground of the task. With O(state) the server is instead managed in the background, and persists between tasks so that its results cache remains warm.
 
 options:
     cache:
@@ -56,17 +56,34 @@ options:
         description: The package type to use.
         required: false
         type: str
+    pid_file:
+        description: Location of the file recording the pid of the background server when O(state) is specified. The server output is logged to a file with the same path and a .log suffix. Defaults to a file per port within the Ansible cache directory of the target system.
+        required: false
+        type: path
+        new_in_version: "1.4.3"
     port:
         description: Address to listen on.
         required: false
         default: 8080
         type: int
+    ready_timeout:
+        description: Seconds to wait for a started background server to respond on its endpoint before failing.
+        required: false
+        default: 30
+        type: int
+        new_in_version: "1.4.3"
+    state:
+        description: Manage the server in the background. V(started) launches the server detached if it is not already running and waits until it is ready, and restarts a running server which was launched with a different command or O(vars_inline), V(stopped) terminates a running server, and V(restarted) always terminates and then launches the server.
+        required: false
+        type: str
+        choices: ['started', 'stopped', 'restarted']
+        new_in_version: "1.4.3"
     vars:
         description: Path to YAML or JSON format file containing variables for template.
         required: false
         type: path
     vars_inline:
-        description: Variables for the template.
+        description: Variables for the template. Payloads larger than 32KiB when encoded are passed to GoSS in a temporary vars file readable only by the owner, which is removed when the module exits. With O(state) the file is instead located alongside the O(pid_file) so that it persists for the background server, and it is written only when the server is launched and removed when the server is stopped.
         required: false
         type: dict
 
@@ -103,6 +120,20 @@ EXAMPLES = r"""
     vars_inline:
       my_service: httpd
       my_package: apache
+
+# serve a health endpoint in the background on port 8765 with results cached for one minute
+- name: Serve a health endpoint in the background on port 8765 with results cached for one minute
+  mschuchard.general.goss_serve:
+    gossfile: /path/to/my_gossfile.yaml
+    cache: 1m
+    port: 8765
+    state: started
+
+# stop the background health endpoint server on port 8765
+- name: Stop the background health endpoint server on port 8765
+  mschuchard.general.goss_serve:
+    port: 8765
+    state: stopped
 """
 
 RETURN = r"""
@@ -110,12 +141,70 @@ command:
     description: The raw GoSS command executed by Ansible.
     type: str
     returned: always
+pid:
+    description: The pid of the background server, or null if it is stopped.
+    type: int
+    returned: state is specified
+pid_file:
+    description: The location of the file recording the pid of the background server.
+    type: str
+    returned: state is specified
+ready_wait:
+    description: Seconds waited for a launched background server to respond on its endpoint.
+    type: float
+    returned: state is started or restarted
+url:
+    description: The local url of the background server endpoint.
+    type: str
+    returned: state is specified
+    sample: 'http://127.0.0.1:8080/healthz'
 """
 
+import json
 from pathlib import Path
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible_collections.mschuchard.general.plugins.module_utils import goss
+from ansible_collections.mschuchard.general.plugins.module_utils import goss, universal
+
+
+def manage_server(
+    module: AnsibleModule, command: list[str], cwd: Path, pid_file: Path, port: int, endpoint: str, fingerprint: str, vars_spill: str | None
+) -> None:
+    """start, stop, or restart the server in the background, and exit the module
+    the vars spill is the json encoded vars inline payload which is written to the vars file of the command only when the server is launched"""
+    # initialize
+    state: str = module.params.get('state')
+    pid: int | None = goss.server_pid(pid_file)
+    result: dict = {'command': command, 'pid_file': str(pid_file), 'url': f'http://127.0.0.1:{port}{endpoint}'}
+
+    # determine whether the server state changes, and restart a running server whose configuration differs
+    changed: bool = (
+        state == 'restarted' or (state == 'started') != (pid is not None) or (state == 'started' and goss.server_fingerprint(pid_file) != fingerprint)
+    )
+    if module.check_mode or not changed:
+        module.exit_json(changed=changed, pid=pid, **result)
+
+    try:
+        # stop the running server
+        if pid is not None:
+            goss.stop_server(pid_file)
+        if state == 'stopped':
+            pid_file.with_suffix('.vars.json').unlink(missing_ok=True)
+            module.exit_json(changed=changed, pid=None, **result)
+
+        # launch the server and wait until it responds
+        if vars_spill is not None:
+            goss.spill_vars_inline(vars_spill, pid_file.with_suffix('.vars.json'))
+        pid = goss.start_server(command, cwd, pid_file, fingerprint)
+        ready_wait: float = goss.wait_ready(pid, port, endpoint, timeout=module.params.get('ready_timeout'))
+    except (OSError, RuntimeError) as exc:
+        # a server which never became ready is not left running
+        if pid is not None:
+            goss.stop_server(pid_file)
+        log: Path = pid_file.with_suffix('.log')
+        module.fail_json(msg=str(exc), cmd=command, log=log.read_text(encoding='UTF-8')[-4096:] if log.is_file() else '', **result)
+
+    module.exit_json(changed=changed, pid=pid, ready_wait=ready_wait, **result)
 
 
 def main() -> None:
@@ -135,7 +224,10 @@ def main() -> None:
             'log_level': {'type': 'str', 'required': False, 'new_in_version': '1.4.3'},
             'max_concur': {'type': 'int', 'required': False},
             'package': {'type': 'str', 'required': False},
+            'pid_file': {'type': 'path', 'required': False, 'new_in_version': '1.4.3'},
             'port': {'type': 'int', 'required': False},
+            'ready_timeout': {'type': 'int', 'required': False, 'default': 30, 'new_in_version': '1.4.3'},
+            'state': {'type': 'str', 'required': False, 'choices': ['started', 'stopped', 'restarted'], 'new_in_version': '1.4.3'},
             'vars': {'type': 'path', 'required': False},
             'vars_inline': {'type': 'dict', 'required': False},
         },
@@ -157,6 +249,7 @@ def main() -> None:
     port: int = module.params.get('port')
     gossfile: Path = Path(module.params.get('gossfile'))
     cwd: Path = Path.cwd() if gossfile == Path.cwd() else gossfile.parent
+    pid_file: Path = Path(module.params.get('pid_file') or universal.CACHE_DIR / 'goss_serve' / f'{port or 8080}.pid')
 
     # check args
     args: dict = {}
@@ -176,13 +269,27 @@ def main() -> None:
         args.update({'package': package})
     if port:
         args.update({'port': port})
+    vars_spill: str | None = None
     if vars:
         args.update({'vars': Path(vars)})
     elif vars_inline:
-        args.update({'vars_inline': vars_inline})
+        # a background server outlives the temporary vars file of a large payload, and so it is instead spilled alongside the pid file
+        if module.params.get('state') and len(json.dumps(vars_inline).encode('UTF-8')) > goss.VARS_INLINE_MAX_BYTES:
+            vars_spill = json.dumps(vars_inline)
+        else:
+            args.update({'vars_inline': vars_inline})
 
     # determine goss command
     command: list[str] = goss.cmd(action='serve', args=args, gossfile=gossfile)
+    # the spilled vars file is a global arg, and is only written if the server is launched
+    if vars_spill is not None:
+        command[1:1] = [goss.GLOBAL_ARGS_MAP['vars'], str(pid_file.with_suffix('.vars.json'))]
+
+    # manage the server in the background
+    if module.params.get('state'):
+        # the vars file path of a spilled payload is constant, and so the payload itself is fingerprinted
+        fingerprint: str = universal.cache_key(command, str(cwd), vars_spill)
+        manage_server(module, command, cwd, pid_file, port or 8080, endpoint or '/healthz', fingerprint, vars_spill)
 
     # exit early for check mode
     if module.check_mode:
@@ -15,6 +15,11 @@ version_added: "1.0.0"
 description: Validate a system with a gossfile or gossfiles.
 
 options:
+    cpu_budget:
+        description: Maximum number of GoSS processes run concurrently for O(gossfiles), each of which runs at most O(max_concur) checks concurrently. Defaults to the number of CPU cores.
+        required: false
+        type: int
+        new_in_version: "1.4.3"
     format:
         description: Output format for validation report.
         required: false
@@ -31,6 +36,12 @@ options:
         required: false
         default: goss.yaml
         type: path
+    gossfiles:
+        description: The gossfiles used for validating concurrently with a bounded pool of GoSS processes. This implies O(structured), and the structured results are returned per gossfile. Mutually exclusive with gossfile and format.
+        required: false
+        type: list
+        elements: path
+        new_in_version: "1.4.3"
     log_level:
         description: GoSS log verbosity level.
         required: false
@@ -46,6 +57,18 @@ options:
         description: The package type to use.
         required: false
         type: str
+    retries:
+        description: Number of times to retry only the failed checks with exponential backoff. Each retry validates a temporary gossfile containing only the resources with failed checks from the rendered gossfile. This implies O(structured). Mutually exclusive with format and retry_timeout.
+        required: false
+        default: 0
+        type: int
+        new_in_version: "1.4.3"
+    retry_backoff:
+        description: Seconds to wait before the first retry, which doubles for each subsequent retry.
+        required: false
+        default: 1.0
+        type: float
+        new_in_version: "1.4.3"
     retry_timeout:
         description: Retry on failure so long as elapsed plus sleep time is less than this.
         required: false
@@ -56,12 +79,29 @@ options:
         required: false
         default: 1s
         type: str
+    slowest:
+        description: Number of the slowest checks to return when O(structured) is true.
+        required: false
+        default: 10
+        type: int
+        new_in_version: "1.4.3"
+    structured:
+        description: Force the json output format, and parse the report into structured per-resource results with durations, summary totals, and the slowest checks. Mutually exclusive with format.
+        required: false
+        default: false
+        type: bool
+        new_in_version: "1.4.3"
+    textfile:
+        description: Location of a node_exporter textfile collector file (e.g. /var/lib/node_exporter/goss.prom) to atomically write the structured results to as Prometheus gauges. These include the success, skipped, and duration of each check, the summary totals of each gossfile, and the duration of the entire validation run including retries. This implies O(structured). Mutually exclusive with format.
+        required: false
+        type: path
+        new_in_version: "1.4.3"
     vars:
         description: Path to YAML or JSON format file containing variables for template.
         required: false
         type: path
     vars_inline:
-        description: Variables for the template.
+        description: Variables for the template. Payloads larger than 32KiB when encoded are passed to GoSS in a temporary vars file readable only by the owner, which is removed when the module exits.
         required: false
         type: dict
 
@@ -97,21 +137,184 @@ EXAMPLES = r"""
     vars_inline:
       my_service: apache2
       my_package: apache2
+
+# validate a system and return structured results including the five slowest checks
+- name: Validate a system and return structured results including the five slowest checks
+  mschuchard.general.goss_validate:
+    gossfile: /path/to/my_gossfile.yaml
+    structured: true
+    slowest: 5
+
+# validate a system and retry only the failed checks up to five times starting with a two second backoff
+- name: Validate a system and retry only the failed checks up to five times starting with a two second backoff
+  mschuchard.general.goss_validate:
+    gossfile: /path/to/my_gossfile.yaml
+    retries: 5
+    retry_backoff: 2
+
+# validate a system with many role gossfiles concurrently with at most four checks in each of two goss processes
+- name: Validate a system with many role gossfiles concurrently with at most four checks in each of two goss processes
+  mschuchard.general.goss_validate:
+    gossfiles:
+    - /path/to/web.yaml
+    - /path/to/db.yaml
+    - /path/to/monitoring.yaml
+    cpu_budget: 2
+    max_concur: 4
+
+# validate a system and export the results for the node_exporter textfile collector
+- name: Validate a system and export the results for the node_exporter textfile collector
+  mschuchard.general.goss_validate:
+    gossfile: /path/to/my_gossfile.yaml
+    textfile: /var/lib/node_exporter/goss.prom
 """
 
 RETURN = r"""
+attempts:
+    description: The number of checks, the number of failed checks, the duration in seconds, and the preceding backoff delay in seconds for the initial validation and each retry.
+    type: list
+    elements: dict
+    returned: retries is greater than zero
+    sample: [{'attempt': 0, 'checks': 120, 'failed': 1, 'duration': 4.2, 'delay': 0}, {'attempt': 1, 'checks': 1, 'failed': 0, 'duration': 0.1, 'delay': 1.0}]
 command:
-    description: The raw GoSS command executed by Ansible.
-    type: str
+    description: The raw GoSS command executed by Ansible. For O(gossfiles) this is the list of commands executed for each gossfile in the same order.
+    type: raw
     returned: always
+    sample: ['goss', '-g', '/path/to/web.yaml', 'validate', '--no-color', '-f', 'json', '--max-concurrent', '4']
+gossfiles:
+    description: The structured results of each gossfile including its return code, success, results, summary, and slowest checks.
+    type: dict
+    returned: gossfiles is specified
+results:
+    description: The result of each check including its resource type, resource id, property, success, and duration in seconds.
+    type: list
+    elements: dict
+    returned: structured is true
+    sample: [{'resource_type': 'File', 'resource_id': '/etc', 'property': 'exists', 'title': '', 'success': true, 'skipped': false, 'duration': 0.0001, 'summary_line': 'File: /etc: exists: matches expectation: true', 'err': null}]
+slowest:
+    description: The slowest checks in descending order of duration. For O(gossfiles) these are the slowest checks across all gossfiles including the gossfile of each check.
+    type: list
+    elements: dict
+    returned: structured is true or gossfiles is specified
+summary:
+    description: The total number of checks, failed checks, and skipped checks, and the total duration in seconds. For O(gossfiles) these are the totals across all gossfiles.
+    type: dict
+    returned: structured is true or gossfiles is specified
+    sample: {'test_count': 6, 'failed_count': 1, 'skipped_count': 0, 'duration': 0.012}
 """
 
+import tempfile
+import time
 from pathlib import Path
 
+import yaml
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.mschuchard.general.plugins.module_utils import goss
 
 
+def export_textfile(module: AnsibleModule, reports: dict[str, dict], start: float) -> None:
+    """write the structured results of each gossfile to the node_exporter textfile if specified"""
+    textfile: str | None = module.params.get('textfile')
+    if textfile:
+        try:
+            goss.write_textfile(Path(textfile), goss.textfile_metrics(reports, time.monotonic() - start))
+        except OSError as exc:
+            module.fail_json(msg=f'Unable to write node_exporter textfile: {exc}')
+
+
+def validate_many(module: AnsibleModule, args: dict, gossfiles: list[str], cpu_budget: int | None, slowest: int) -> None:
+    """concurrently validate many gossfiles, and exit the module with the structured results keyed by gossfile"""
+    # bound the concurrent processes by the cpu budget
+    workers: int = goss.gossfiles_concurrency(cpu_budget, len(gossfiles))
+
+    # determine goss commands with json format
+    # copy the args per command because goss.cmd consumes the global args
+    commands: dict[str, list[str]] = {}
+    try:
+        for gossfile in gossfiles:
+            commands[str(gossfile)] = goss.cmd(action='validate', args=args | {'format': 'json'}, gossfile=Path(gossfile))
+    except (FileNotFoundError, TypeError, ValueError) as exc:
+        module.fail_json(msg=str(exc))
+
+    # exit early for check mode
+    if module.check_mode:
+        module.exit_json(changed=False, command=list(commands.values()))
+
+    # execute goss
+    start: float = time.monotonic()
+    reports: dict[str, dict] = goss.validate_gossfiles(commands, workers=workers, slowest=slowest)
+    merged: dict = goss.merge_reports(reports, slowest)
+    export_textfile(module, reports, start)
+
+    # post-process
+    failed: list[str] = [gossfile for gossfile, report in reports.items() if not report['success']]
+    if failed:
+        module.fail_json(msg=f'GoSS validation failed for gossfiles: {", ".join(failed)}', gossfiles=reports, command=list(commands.values()), **merged)
+    module.exit_json(changed=False, gossfiles=reports, command=list(commands.values()), **merged)
+
+
+def retry_failed(module: AnsibleModule, args: dict, gossfile: Path, cwd: Path, report: dict, retries: int, backoff: float) -> tuple[int, dict]:
+    """retry only the resources with failed checks with exponential backoff until they pass or the retries are exhausted
+    returns the final return code, and the report with the results of the retried resources replaced by their latest results"""
+    # render the gossfile to resolve templates and includes
+    # vars are consumed by the render, and so are omitted from the retry validations
+    render_command: list[str] = goss.cmd(action='render', args={arg: value for arg, value in args.items() if arg in goss.GLOBAL_ARGS_MAP}, gossfile=gossfile)
+    return_code, stdout, stderr = module.run_command(render_command, cwd=cwd)
+    try:
+        rendered: dict = yaml.safe_load(stdout) if return_code == 0 else {}
+    except yaml.YAMLError:
+        rendered = {}
+    validate_args: dict = {arg: value for arg, value in args.items() if arg not in ['vars', 'vars_inline']}
+
+    return_code = 1
+    slowest: int = module.params.get('slowest')
+    total: float = sum(attempt['duration'] for attempt in report['attempts'])
+    with tempfile.TemporaryDirectory(prefix='goss_validate_') as temp_dir:
+        for attempt in range(1, retries + 1):
+            resources: set[tuple[str, str]] = goss.failed_checks(report['results'])
+            # a failure without failed checks (e.g. goss error) cannot be isolated for retry
+            if not resources:
+                break
+            retry_gossfile: dict | None = goss.filter_gossfile(rendered or {}, resources)
+            # unlocatable resources require retrying the entire gossfile
+            if retry_gossfile is None:
+                retry_gossfile = rendered or None
+                resources = {(result['resource_type'], result['resource_id']) for result in report['results']}
+            if retry_gossfile is None:
+                module.fail_json(msg=f'Unable to render GoSS gossfile for retries: {stderr.rstrip()}', cmd=render_command, **report)
+
+            # write the gossfile of the failed resources
+            retry_path: Path = Path(temp_dir) / f'retry_{attempt}.yaml'
+            retry_path.write_text(yaml.safe_dump(retry_gossfile), encoding='UTF-8')
+            command: list[str] = goss.cmd(action='validate', args=validate_args.copy(), gossfile=retry_path)
+
+            # exponential backoff
+            delay: float = backoff * 2 ** (attempt - 1)
+            time.sleep(delay)
+
+            start: float = time.monotonic()
+            return_code, stdout, stderr = module.run_command(command, cwd=cwd)
+            duration: float = time.monotonic() - start
+            total += duration
+            try:
+                retried: list[dict] = goss.parse_results(stdout, 0)['results']
+            except ValueError as exc:
+                module.fail_json(msg=f'Unable to parse GoSS json report: {exc}', return_code=return_code, cmd=command, stdout=stdout, stderr=stderr, **report)
+
+            # replace the results of the retried resources
+            attempts: list[dict] = report['attempts']
+            report = goss.merge_attempt(report['results'], retried, resources, total, slowest)
+            report['attempts'] = attempts + [
+                {'attempt': attempt, 'checks': len(retried), 'failed': report['summary']['failed_count'], 'duration': duration, 'delay': delay}
+            ]
+
+            # exit early once the failed checks pass
+            if return_code == 0:
+                break
+
+    return return_code, report
+
+
 def main() -> None:
     """primary function for goss validate module"""
     # instanstiate ansible module
@@ -123,16 +326,31 @@ def main() -> None:
                 'choices': ['documentation', 'json', 'junit', 'nagios', 'prometheus', 'rspecish', 'silent', 'structured', 'tap'],
             },
             'format_opts': {'type': 'str', 'required': False, 'choices': ['perfdata', 'pretty', 'verbose']},
+            'cpu_budget': {'type': 'int', 'required': False, 'new_in_version': '1.4.3'},
             'gossfile': {'type': 'path', 'required': False, 'default': Path.cwd()},
+            'gossfiles': {'type': 'list', 'elements': 'path', 'required': False, 'new_in_version': '1.4.3'},
             'log_level': {'type': 'str', 'required': False, 'new_in_version': '1.4.3'},
             'max_concur': {'type': 'int', 'required': False},
             'package': {'type': 'str', 'required': False},
+            'retries': {'type': 'int', 'required': False, 'default': 0, 'new_in_version': '1.4.3'},
+            'retry_backoff': {'type': 'float', 'required': False, 'default': 1.0, 'new_in_version': '1.4.3'},
             'retry_timeout': {'type': 'str', 'required': False},
             'sleep': {'type': 'str', 'required': False},
+            'slowest': {'type': 'int', 'required': False, 'default': 10, 'new_in_version': '1.4.3'},
+            'structured': {'type': 'bool', 'required': False, 'default': False, 'new_in_version': '1.4.3'},
+            'textfile': {'type': 'path', 'required': False, 'new_in_version': '1.4.3'},
             'vars': {'type': 'path', 'required': False},
             'vars_inline': {'type': 'dict', 'required': False},
         },
-        mutually_exclusive=[('vars', 'vars_inline')],
+        mutually_exclusive=[
+            ('vars', 'vars_inline'),
+            ('format', 'structured'),
+            ('gossfile', 'gossfiles'),
+            ('format', 'gossfiles'),
+            ('format', 'retries'),
+            ('format', 'textfile'),
+            ('retry_timeout', 'retries'),
+        ],
         required_by={'sleep': 'retry_timeout'},
         supports_check_mode=True,
     )
@@ -148,6 +366,8 @@ def main() -> None:
     package: str = module.params.get('package')
     retry_timeout: str = module.params.get('retry_timeout')
     sleep: str = module.params.get('sleep')
+    retries: int = module.params.get('retries')
+    structured: bool = module.params.get('structured') or retries > 0 or bool(module.params.get('textfile'))
     gossfile: Path = Path(module.params.get('gossfile'))
     cwd: Path = Path.cwd() if gossfile == Path.cwd() else gossfile.parent
 
@@ -155,6 +375,8 @@ def main() -> None:
     args: dict = {}
     if format:
         args.update({'format': format})
+    elif structured:
+        args.update({'format': 'json'})
     if format_opts:
         args.update({'format_opts': format_opts})
     if loglevel:
@@ -172,6 +394,13 @@ def main() -> None:
     elif vars_inline:
         args.update({'vars_inline': vars_inline})
 
+    # concurrently validate many gossfiles
+    if module.params.get('gossfiles'):
+        validate_many(module, args, module.params['gossfiles'], module.params.get('cpu_budget'), module.params.get('slowest'))
+
+    # retain the args for retries because goss.cmd consumes the global args
+    retry_args: dict = args.copy()
+
     # determine goss command
     command: list[str] = goss.cmd(action='validate', args=args, gossfile=gossfile)
 
@@ -183,20 +412,40 @@ def main() -> None:
     return_code: int
     stdout: str
     stderr: str
+    start: float = time.monotonic()
     return_code, stdout, stderr = module.run_command(command, cwd=cwd)
+    duration: float = time.monotonic() - start
 
+    # parse the structured report which exists for both passing and failing validations
+    report: dict = {}
+    if structured:
+        try:
+            report = goss.parse_results(stdout, module.params.get('slowest'))
+        except ValueError as exc:
+            module.fail_json(msg=f'Unable to parse GoSS json report: {exc}', return_code=return_code, cmd=command, stdout=stdout, stderr=stderr)
     # check symbolic idempotence
-    if len(stdout) > 0:
+    elif len(stdout) > 0:
         changed = True
 
+    # retry only the failed checks
+    if retries > 0:
+        report['attempts'] = [{'attempt': 0, 'checks': len(report['results']), 'failed': report['summary']['failed_count'], 'duration': duration, 'delay': 0}]
+        if return_code != 0 and report['results']:
+            return_code, report = retry_failed(module, retry_args, gossfile, cwd, report, retries, module.params.get('retry_backoff'))
+
+    # export the final results
+    if structured:
+        export_textfile(module, {str(gossfile if gossfile != Path.cwd() else cwd / 'goss.yaml'): report | {'success': return_code == 0}}, start)
+
     # post-process
     if return_code == 0:
-        module.exit_json(changed=changed, stdout=stdout, stderr=stderr, command=command)
+        module.exit_json(changed=changed, stdout=stdout, stderr=stderr, command=command, **report)
     else:
         module.fail_json(
             msg=stderr.rstrip(),
             return_code=return_code,
             cmd=command,
+            **report,
             stdout=stdout,
             stdout_lines=stdout.splitlines(),
             stderr=stderr,
@@ -15,6 +15,17 @@ version_added: "1.0.0"
 description: Will execute multiple builds in parallel as defined in the template. The various artifacts created by the template will be outputted.
 
 options:
+    cache:
+        description: Cache the build artifacts keyed by a fingerprint of the template and variable definition files content (i.e. C(*.pkr.hcl), C(*.pkr.json), C(*.pkrvars.hcl), and C(*.pkrvars.json)) within the template directory, the var and var_file values, and the only and excepts selection. If the fingerprint matches a previous successful build and its artifacts still exist, then the cached artifacts are returned without building. Ignored when force is true.
+        required: false
+        default: false
+        type: bool
+        new_in_version: "1.4.3"
+    cache_probe:
+        description: Command to verify a cached artifact still exists where C({id}) is replaced with the artifact id, and a zero return code denotes existence. By default the artifact files are checked for existence, and artifacts without files are assumed to exist.
+        required: false
+        type: str
+        new_in_version: "1.4.3"
     config_dir:
         description: Location of the directory or file containing the Packer template(s) and/or config(s).
         required: false
@@ -35,6 +46,37 @@ options:
         required: false
         default: false
         type: bool
+    matrix:
+        description: List of var and var_file sets for which the template is built. Each combination is built with its own copy of the template directory, excluding build outputs such as output-* directories, within a working directory, and with a bounded pool of concurrent workers. The combination var values override the var parameter values, and the combination var files are appended to the var_file parameter value. Mutually exclusive with cache.
+        required: false
+        type: list
+        elements: dict
+        new_in_version: "1.4.3"
+        suboptions:
+            name:
+                description: Name of the combination in the results. Defaults to the index of the combination.
+                required: false
+                type: str
+            var:
+                description: Variables for templates.
+                required: false
+                type: dict
+            var_file:
+                description: HCL2 files containing user variables.
+                required: false
+                type: list
+                elements: path
+    matrix_dir:
+        description: Directory within which the working directory for each matrix combination is created. The working directories are retained so that build output files remain available. Defaults to a new temporary directory.
+        required: false
+        type: path
+        new_in_version: "1.4.3"
+    matrix_workers:
+        description: Maximum number of matrix combinations to build concurrently.
+        required: false
+        default: 2
+        type: int
+        new_in_version: "1.4.3"
     on_error:
         description: If the build fails do clean up (default), abort, ask, or run-cleanup-provisioner
         required: false
@@ -46,10 +88,20 @@ options:
         type: list
         elements: str
     parallel_builds:
-        description: Number of builds to run in parallel. 0 denotes "no limit".
+        description: Number of builds to run in parallel. 0 denotes "no limit". The value C(auto) (new in version 1.4.3) derives the limit from the available CPU cores, the available memory, and the number of sources selected by only or excepts, and also returns the peak resource usage sampled during the build.
         required: false
         default: 0
+        type: raw
+    profile_file:
+        description: Location of a file to which the timing profile of the builds is written as JSON for later analysis. The file is written whether or not the builds succeed. For a matrix, the builds and timing profile of each combination are written under its name.
+        required: false
+        type: path
+        new_in_version: "1.4.3"
+    stdout_tail:
+        description: Return only this number of final lines of the machine-readable Packer output to bound memory usage for builds with large provisioner logs. The full output is returned by default.
+        required: false
         type: int
+        new_in_version: "1.4.3"
     timestamp_ui:
         description: Enable prefixing of each ui output with an RFC3339 timestamp.
         required: false
@@ -87,6 +139,12 @@ EXAMPLES = r"""
     parallel_builds: 1
     timestamp_ui: true
 
+# build the packer templates with a parallel builds limit derived from the available system resources
+- name: Build the packer templates with a parallel builds limit derived from the available system resources
+  mschuchard.general.packer_build:
+    config_dir: /path/to/packer_dir
+    parallel_builds: auto
+
 # build everything except the null.this and null.that builds in the packer templates without cleanup and remove any existing artifacts
 - name: Build everything except the null.this and null.that builds in the packer templates without cleanup and remove any existing artifacts
   mschuchard.general.packer_build:
@@ -107,15 +165,87 @@ EXAMPLES = r"""
     var_file:
     - one.pkrvars.hcl
     - two.pkrvars.hcl
+
+# build the packer template artifacts unless an unchanged template already built a docker image that still exists
+- name: Build the packer template artifacts unless an unchanged template already built a docker image that still exists
+  mschuchard.general.packer_build:
+    config_dir: /path/to/packer_dir
+    cache: true
+    cache_probe: docker image inspect {id}
+
+# build the packer template for two regions concurrently with a common var file
+- name: Build the packer template for two regions concurrently with a common var file
+  mschuchard.general.packer_build:
+    config_dir: /path/to/packer_dir
+    var_file:
+    - common.pkrvars.hcl
+    matrix:
+    - name: east
+      var:
+        region: us-east-1
+    - name: west
+      var:
+        region: us-west-2
+      var_file:
+      - west.pkrvars.hcl
+    matrix_workers: 2
+
+# build the packer template artifacts and write the timing profile of the provisioners for analysis
+- name: Build the packer template artifacts and write the timing profile of the provisioners for analysis
+  mschuchard.general.packer_build:
+    config_dir: /path/to/packer_dir
+    profile_file: /path/to/profile.json
 """
 
 RETURN = r"""
+builds:
+    description: The summary of each build parsed from the machine-readable output, including its start and end unix timestamps, duration in seconds, errors, and artifacts.
+    type: dict
+    returned: always
+    sample: {'docker.ubuntu': {'start': 1700000000, 'end': 1700000042, 'duration': 42, 'errors': [], 'artifacts': [{'builder_id': 'packer.docker', 'id': 'sha256:abc', 'string': 'Imported Docker image: sha256:abc', 'files': []}]}}
+cached:
+    description: Whether the builds were returned from the cache instead of Packer.
+    type: bool
+    returned: success
 command:
     description: The raw Packer command executed by Ansible.
     type: str
     returned: always
+errors:
+    description: The errors unrelated to a specific build (e.g. template errors).
+    type: list
+    elements: str
+    returned: always
+matrix:
+    description: The results for each matrix combination, including its command, working directory, return code, duration in seconds, builds, errors, and timing profile.
+    type: list
+    elements: dict
+    returned: matrix is specified
+parallel_builds:
+    description: The parallel builds limit derived from the available system resources.
+    type: int
+    returned: parallel_builds is auto
+profile:
+    description: The time spans in seconds of each build, and of the builder, provisioner, and post-processor steps within each build, derived from the timestamps of the machine-readable output and sorted by descending duration.
+    type: list
+    elements: dict
+    returned: when the builds are executed
+    sample: [{'build': 'docker.ubuntu', 'type': 'provisioner', 'name': 'shell script: /tmp/packer-shell123', 'start': 1700000005, 'end': 1700000030, 'duration': 25}]
+resource_usage:
+    description: The peak one minute load average and peak system memory used in bytes sampled during the build.
+    type: dict
+    returned: parallel_builds is auto
+    sample: {'peak_load_average': 3.2, 'peak_memory_used': 4294967296, 'samples': 42}
+stdout:
+    description: The machine-readable Packer output, or its final lines if stdout_tail is specified.
+    type: str
+    returned: always
 """
 
+import contextlib
+import json
+import os
+import tempfile
 from pathlib import Path
 
 from ansible.module_utils.basic import AnsibleModule
@@ -127,56 +257,139 @@ def main() -> None:
     # instanstiate ansible module
     module = AnsibleModule(
         argument_spec={
+            'cache': {'type': 'bool', 'required': False, 'new_in_version': '1.4.3'},
+            'cache_probe': {'type': 'str', 'required': False, 'new_in_version': '1.4.3'},
             'config_dir': {'type': 'path', 'required': False, 'default': Path.cwd()},
             'debug': {'type': 'bool', 'required': False},
             'excepts': {'type': 'list', 'elements': 'str', 'required': False},
             'force': {'type': 'bool', 'required': False},
             'on_error': {'type': 'str', 'required': False, 'choices': ['cleanup', 'abort', 'ask', 'run-cleanup-provisioner']},
+            'matrix': {
+                'type': 'list',
+                'elements': 'dict',
+                'required': False,
+                'new_in_version': '1.4.3',
+                'options': {
+                    'name': {'type': 'str', 'required': False},
+                    'var': {'type': 'dict', 'required': False},
+                    'var_file': {'type': 'list', 'elements': 'path', 'required': False},
+                },
+            },
+            'matrix_dir': {'type': 'path', 'required': False, 'new_in_version': '1.4.3'},
+            'matrix_workers': {'type': 'int', 'required': False, 'default': 2, 'new_in_version': '1.4.3'},
             'only': {'type': 'list', 'elements': 'str', 'required': False},
-            'parallel_builds': {'type': 'int', 'required': False},
+            'parallel_builds': {'type': 'raw', 'required': False},
+            'profile_file': {'type': 'path', 'required': False, 'new_in_version': '1.4.3'},
+            'stdout_tail': {'type': 'int', 'required': False, 'new_in_version': '1.4.3'},
             'timestamp_ui': {'type': 'bool', 'required': False},
             'var': {'type': 'dict', 'required': False},
             'var_file': {'type': 'list', 'elements': 'path', 'required': False},
         },
-        mutually_exclusive=[('excepts', 'only')],
+        mutually_exclusive=[('excepts', 'only'), ('cache', 'matrix')],
         supports_check_mode=True,
     )
 
     # initialize
     changed: bool = False
     config_dir: Path = Path(module.params.pop('config_dir'))
+    cache: bool = module.params.pop('cache')
+    cache_probe: str | None = module.params.pop('cache_probe')
+    matrix: list[dict] | None = module.params.pop('matrix')
+    matrix_dir: str | None = module.params.pop('matrix_dir')
+    matrix_workers: int = module.params.pop('matrix_workers')
+    profile_file: str | None = module.params.pop('profile_file')
+    stdout_tail: int | None = module.params.pop('stdout_tail')
+    fingerprint: str = ''
+
+    # validate or derive the parallel builds limit
+    parallel_builds: int | str | None = module.params.get('parallel_builds')
+    auto: bool = parallel_builds == 'auto'
+    if auto:
+        module.params['parallel_builds'] = packer.auto_parallel_builds(
+            sources=packer.count_sources(config_dir, module.params.get('only'), module.params.get('excepts')),
+            cores=os.cpu_count(),
+            available_memory=packer.memory_info()[1],
+        )
+    elif parallel_builds is not None:
+        try:
+            module.params['parallel_builds'] = int(parallel_builds)
+        except (TypeError, ValueError):
+            module.fail_json(msg=f'parallel_builds must be an integer or auto: {parallel_builds}')
+
+    # fingerprint the template and inputs before they are converted to packer args
+    if cache and not module.params.get('force'):
+        fingerprint = packer.build_fingerprint(
+            config_dir, module.params.get('var'), module.params.get('var_file'), module.params.get('only'), module.params.get('excepts')
+        )
 
     # check optional params
     flags_args: tuple[set[str], dict] = universal.params_to_flags_args(module.params, module.argument_spec)
 
+    # build each matrix combination instead
+    if matrix:
+        build_matrix(module, config_dir, flags_args, matrix, matrix_dir, matrix_workers, profile_file)
+
     # convert ansible params to packer args
     packer.ansible_to_packer(flags_args[1])
 
     # determine packer command
     command: list[str] = packer.cmd(action='build', flags=flags_args[0], args=flags_args[1], target_dir=config_dir)
 
+    # return cached builds if their artifacts still exist
+    if fingerprint:
+        cached: dict | None = universal.cache_read('packer_build', fingerprint)
+        if cached is not None and all(
+            packer.artifact_exists(artifact, cache_probe, config_dir if config_dir.is_dir() else config_dir.parent)
+            for build in cached['builds'].values()
+            for artifact in build['artifacts']
+        ):
+            module.exit_json(changed=False, cached=True, command=command, errors=[], **cached)
+
     # exit early for check mode
     if module.check_mode:
         module.exit_json(changed=False, command=command)
 
-    # execute packer
+    # execute packer and summarize the output as it streams
     return_code: int
+    summary: dict
     stdout: str
     stderr: str
-    return_code, stdout, stderr = module.run_command(command, cwd=config_dir)
+    try:
+        # resource usage is only sampled to report the effect of the derived limit
+        with packer.sample_resources() if auto else contextlib.nullcontext({}) as resource_usage:
+            return_code, summary, stdout, stderr = packer.run_machine_readable(command, cwd=config_dir, tail=stdout_tail)
+    except OSError as exc:
+        module.fail_json(msg=str(exc), cmd=command)
+
+    # replace the raw step time spans with the sorted timing profile
+    summary['profile'] = packer.timing_profile(summary)
+    del summary['steps']
+    if profile_file:
+        try:
+            Path(profile_file).write_text(json.dumps({'builds': summary['builds'], 'profile': summary['profile']}, indent=2), encoding='UTF-8')
+        except OSError as exc:
+            module.fail_json(msg=f'Unable to write profile file: {exc}', cmd=command, **summary)
+
+    # return the derived limit and its effect on resource usage
+    if auto:
+        summary.update({'parallel_builds': module.params['parallel_builds'], 'resource_usage': resource_usage})
 
     # check idempotence
-    if 'artifacts of successful builds' in stdout:
+    if any(build['artifacts'] for build in summary['builds'].values()):
         changed = True
 
     # post-process
     if return_code == 0:
-        module.exit_json(changed=changed, stdout=stdout, stderr=stderr, command=command)
+        # store the artifact manifest for the fingerprint
+        if fingerprint and changed:
+            universal.cache_write('packer_build', fingerprint, {'builds': summary['builds']})
+        module.exit_json(changed=changed, cached=False, stdout=stdout, stderr=stderr, command=command, **summary)
     else:
         module.fail_json(
             msg=stderr.rstrip(),
             return_code=return_code,
             cmd=command,
+            **summary,
             stdout=stdout,
             stdout_lines=stdout.splitlines(),
             stderr=stderr,
@@ -184,5 +397,48 @@ def main() -> None:
         )
 
 
+def build_matrix(
+    module: AnsibleModule,
+    config_dir: Path,
+    flags_args: tuple[set[str], dict],
+    matrix: list[dict],
+    matrix_dir: str | None,
+    workers: int,
+    profile_file: str | None,
+) -> None:
+    """build each matrix combination concurrently, and exit with the results for every combination"""
+    # determine packer commands
+    combinations: list[dict] = packer.matrix_commands(flags=flags_args[0], args=flags_args[1], config_dir=config_dir, matrix=matrix)
+
+    # exit early for check mode
+    if module.check_mode:
+        module.exit_json(changed=False, matrix=combinations)
+
+    # execute packer for every combination in its own working directory
+    work_dir: Path = Path(matrix_dir) if matrix_dir else Path(tempfile.mkdtemp(prefix='packer_build_matrix_'))
+    try:
+        results: list[dict] = packer.run_matrix(combinations, work_dir=work_dir, workers=workers)
+    except (OSError, ValueError) as exc:
+        module.fail_json(msg=str(exc), matrix=combinations)
+
+    # write the timing profile of every combination
+    if profile_file:
+        try:
+            Path(profile_file).write_text(
+                json.dumps({result['name']: {'builds': result['builds'], 'profile': result['profile']} for result in results}, indent=2), encoding='UTF-8'
+            )
+        except OSError as exc:
+            module.fail_json(msg=f'Unable to write profile file: {exc}', matrix=results)
+
+    # check idempotence
+    changed: bool = any(build['artifacts'] for result in results for build in result['builds'].values())
+
+    # post-process
+    failed: list[str] = [result['name'] for result in results if result['failed']]
+    if failed:
+        module.fail_json(msg=f'Packer build failed for matrix combinations: {", ".join(failed)}', changed=changed, matrix=results)
+    module.exit_json(changed=changed, matrix=results)
+
+
 if __name__ == '__main__':
     main()
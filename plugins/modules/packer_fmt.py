@@ -30,6 +30,12 @@ options:
         required: false
         default: false
         type: bool
+    incremental:
+        description: Only format the files whose content changed since they were last known to be in canonical format. The content hashes of canonical files are cached per O(config_dir), and the changed files are formatted in batches with one Packer execution per batch.
+        required: false
+        default: false
+        type: bool
+        new_in_version: "1.4.3"
     recursive:
         description: Also process files in subdirectories. By default only the given directory (or current directory) is processed.
         required: false
@@ -65,6 +71,13 @@ EXAMPLES = r"""
 - name: Recursively rewrite packer files in current directory to canonical format
   mschuchard.general.packer_fmt:
     recursive: true
+
+# recursively rewrite only the Packer files changed since the previous run in /path/to/packer_dir
+- name: Recursively rewrite only the changed packer files in /path/to/packer_dir
+  mschuchard.general.packer_fmt:
+    config_dir: /path/to/packer_dir
+    incremental: true
+    recursive: true
 """
 
 RETURN = r"""
@@ -72,12 +85,72 @@ command:
     description: The raw Packer command executed by Ansible.
     type: str
     returned: always
+files:
+    description: The files which were rewritten to canonical format, or which are not in canonical format if not writing.
+    type: list
+    elements: str
+    returned: when incremental is true
+    sample: ['/path/to/packer_dir/ubuntu.pkr.hcl']
 """
 
 from pathlib import Path
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible_collections.mschuchard.general.plugins.module_utils import packer
+from ansible_collections.mschuchard.general.plugins.module_utils import (
+    packer,
+    universal,
+)
+
+
+def incremental_fmt(module: AnsibleModule, config_dir: Path, flags: set[str], args: dict, command: list[str]) -> None:
+    """format only the files changed since they were last known to be canonical, and exit the module"""
+    # initialize
+    write: bool = 'check' not in flags and args.get('write') != 'false'
+    key: str = universal.cache_key(str(config_dir.resolve()))
+    digests: dict[str, str] = (universal.cache_read('packer_fmt', key) or {}).get('digests', {})
+
+    # determine files changed since last known canonical
+    try:
+        current: dict[Path, str] = {file: universal.file_digest(file) for file in packer.fmt_files(config_dir, recursive='recursive' in flags)}
+    except OSError as exc:
+        module.fail_json(msg=str(exc), cmd=command)
+    pending: list[Path] = [file for file, digest in current.items() if digests.get(str(file.resolve())) != digest]
+
+    # exit early if no changed files or check mode
+    if not pending or module.check_mode:
+        module.exit_json(changed=False, files=[], command=command)
+
+    # execute packer without recursion on staged batches of the changed files
+    return_code: int
+    rewritten: list[Path]
+    stdout: str
+    stderr: str
+    return_code, rewritten, stdout, stderr = packer.fmt_batches(
+        packer.cmd(action='fmt', flags=flags - {'recursive'}, args=args, target_dir=config_dir)[:-1], pending
+    )
+
+    # post-process
+    if return_code == 0:
+        # record files now in canonical format and prune files which no longer exist
+        for file in pending:
+            if write:
+                digests[str(file.resolve())] = universal.file_digest(file)
+            elif file not in rewritten:
+                digests[str(file.resolve())] = current[file]
+        universal.cache_write('packer_fmt', key, {'digests': {path: digest for path, digest in digests.items() if Path(path).is_file()}})
+
+        module.exit_json(changed=write and len(rewritten) > 0, files=[str(file) for file in rewritten], stdout=stdout, stderr=stderr, command=command)
+    else:
+        module.fail_json(
+            msg=stderr.rstrip(),
+            return_code=return_code,
+            cmd=command,
+            files=[str(file) for file in rewritten],
+            stdout=stdout,
+            stdout_lines=stdout.splitlines(),
+            stderr=stderr,
+            stderr_lines=stderr.splitlines(),
+        )
 
 
 def main() -> None:
@@ -88,6 +161,7 @@ def main() -> None:
             'check': {'type': 'bool', 'required': False},
             'config_dir': {'type': 'path', 'required': False, 'default': Path.cwd()},
             'diff': {'type': 'bool', 'required': False},
+            'incremental': {'type': 'bool', 'required': False, 'default': False, 'new_in_version': '1.4.3'},
             'recursive': {'type': 'bool', 'required': False},
             'write': {'type': 'bool', 'required': False, 'default': True},
         },
@@ -124,6 +198,10 @@ def main() -> None:
     # determine packer command
     command: list[str] = packer.cmd(action='fmt', flags=flags, args=args, target_dir=config_dir)
 
+    # format only changed files
+    if module.params.get('incremental'):
+        incremental_fmt(module, config_dir, flags, args, command)
+
     # exit early for check mode
     if module.check_mode:
         module.exit_json(changed=False, command=command)
@@ -12,7 +12,7 @@ short_description: Module to manage Packer template and config directory initial
 
 version_added: "1.0.0"
 
-description: Install all the missing plugins required in a Packer config. Note that Packer does not have a state. This is the first command that should be executed when working with a new or existing template. This command is always safe to run multiple times. Though subsequent runs may give errors, this command will never delete anything.
+description: Install all the missing plugins required in a Packer config. Note that Packer does not have a state. This is the first command that should be executed when working with a new or existing template. This command is always safe to run multiple times. Though subsequent runs may give errors, this command will never delete anything. When every plugin in the required_plugins blocks of the config is already installed with a version satisfying its constraint and a matching checksum, and O(upgrade) is disabled, then Packer is not executed, and therefore no network requests are made.
 
 options:
     config_dir:
@@ -56,6 +56,11 @@ command:
     type: str
     returned: always
     sample: 'packer init -machine-readable /home/packer'
+plugins:
+    description: The installed version of each required plugin when all required plugins were already satisfied and Packer was not executed.
+    type: dict
+    returned: when packer was not executed
+    sample: {'docker': '1.0.8'}
 """
 
 from pathlib import Path
@@ -82,6 +87,15 @@ def main() -> None:
     # determine packer command
     command: list[str] = packer.cmd(action='init', flags=flags_args[0], target_dir=config_dir)
 
+    # skip packer entirely when the local plugin index satisfies all requirements
+    if not module.params.get('upgrade'):
+        try:
+            plugins: dict[str, str] | None = packer.plugins_satisfied(config_dir)
+        except (OSError, ValueError):
+            plugins = None
+        if plugins is not None:
+            module.exit_json(changed=False, plugins=plugins, stdout='', stderr='', command=command)
+
     # exit early for check mode
     if module.check_mode:
         module.exit_json(changed=False, command=command)
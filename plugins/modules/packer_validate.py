@@ -15,11 +15,29 @@ version_added: "1.0.0"
 description: Checks the template is valid by parsing the template and also checking the configuration with the various builders, provisioners, etc. If it is not valid, the errors will be shown and the module task will exit as a failure.
 
 options:
+    cache:
+        description: Cache successful validation results keyed by a fingerprint of the template content, the var and var_file values, the only and excepts selection, the flags, and the installed versions of the required plugins. If the fingerprint matches a previous successful validation, then the cached result is returned without executing Packer.
+        required: false
+        default: false
+        type: bool
+        new_in_version: "1.4.3"
+    cache_ttl:
+        description: Seconds after which a cached result expires when O(evaluate_datasources) is true, because the data sources may have changed independently of the templates. Results without data source evaluation do not expire.
+        required: false
+        default: 3600
+        type: int
+        new_in_version: "1.4.3"
     config_dir:
         description: Location of the directory or file containing the Packer template(s) and/or config(s).
         required: false
         default: cwd
         type: str
+    config_dirs:
+        description: Locations of the directories or files containing the Packer template(s) and/or config(s), or glob patterns thereof. These are validated concurrently, and the results are aggregated per location.
+        required: false
+        type: list
+        elements: path
+        new_in_version: "1.4.3"
     evaluate_datasources:
         description: Evaluate data sources during validation (>= 1.8.5)
         required: false
@@ -54,6 +72,12 @@ options:
         required: false
         default: true
         type: bool
+    workers:
+        description: Maximum number of concurrent Packer validations for O(config_dirs).
+        required: false
+        default: 4
+        type: int
+        new_in_version: "1.4.3"
 
 requirements:
     - packer >= 1.7.0
@@ -93,13 +117,38 @@ EXAMPLES = r"""
     var_file:
     - one.pkrvars.hcl
     - two.pkrvars.hcl
+
+# concurrently validate many packer template directories
+- name: Concurrently validate many packer template directories
+  mschuchard.general.packer_validate:
+    config_dirs:
+    - /path/to/packer_dir
+    - /path/to/templates/*
+    workers: 8
+
+# validate with datasources and reuse the results for up to a day while the templates are unchanged
+- name: Validate with datasources and reuse the results for up to a day while the templates are unchanged
+  mschuchard.general.packer_validate:
+    config_dir: /path/to/packer_dir
+    evaluate_datasources: true
+    cache: true
+    cache_ttl: 86400
 """
 
 RETURN = r"""
+cached:
+    description: Whether the validation result was returned from the cache instead of Packer.
+    type: bool
+    returned: success
 command:
     description: The raw Packer command executed by Ansible.
     type: str
     returned: always
+results:
+    description: The validation result of each config directory or file when validating O(config_dirs).
+    type: dict
+    returned: when config_dirs is specified
+    sample: {'/path/to/packer_dir': {'command': ['packer', 'validate', '-machine-readable', '/path/to/packer_dir'], 'return_code': 0, 'passed': true, 'cached': false, 'duration': 1.2, 'errors': []}}
 """
 
 from pathlib import Path
@@ -108,12 +157,63 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.mschuchard.general.plugins.module_utils import packer, universal
 
 
+def fingerprint(module: AnsibleModule, config_dir: Path, flags: set[str]) -> str:
+    """return the validation cache fingerprint for the config directory or file and the module params"""
+    return packer.validate_fingerprint(
+        config_dir, flags, module.params.get('var'), module.params.get('var_file'), module.params.get('only'), module.params.get('excepts')
+    )
+
+
+def validate_many(module: AnsibleModule, flags: set[str], args: dict, config_dirs: list[str], workers: int, cache: bool, ttl: int | None) -> None:
+    """concurrently validate many templates, and exit the module with the aggregated results"""
+    # determine targets and packer command without a target
+    try:
+        targets: list[Path] = packer.expand_config_dirs(config_dirs)
+        command: list[str] = packer.cmd(action='validate', flags=flags, args=args, target_dir=targets[0])[:-1]
+        for target in targets[1:]:
+            if not target.exists():
+                raise RuntimeError(f'Targeted directory or file does not exist: {target}')
+    except (FileNotFoundError, RuntimeError) as exc:
+        module.fail_json(msg=str(exc))
+
+    # exit early for check mode
+    if module.check_mode:
+        module.exit_json(changed=False, command=command)
+
+    # return cached results for unchanged fingerprints, and validate only the remainder
+    results: dict[str, dict] = {}
+    keys: dict[str, str] = {}
+    if cache:
+        for target in targets:
+            keys[str(target)] = fingerprint(module, target, flags)
+            if packer.validate_cache_read(keys[str(target)]) is not None:
+                results[str(target)] = {'command': command + [str(target)], 'return_code': 0, 'passed': True, 'cached': True, 'duration': 0.0, 'errors': []}
+
+    # execute packer
+    validated: dict[str, dict] = packer.validate_templates(command, [target for target in targets if str(target) not in results], workers)
+    for target, result in validated.items():
+        results[target] = result | {'cached': False}
+        if cache and result['passed']:
+            packer.validate_cache_write(keys[target], {'stdout': '', 'stderr': ''}, ttl)
+    # retain the input order
+    results = {str(target): results[str(target)] for target in targets}
+
+    # post-process
+    failed: list[str] = [target for target, result in results.items() if not result['passed']]
+    if failed:
+        module.fail_json(msg=f'Packer validation failed for {len(failed)} of {len(results)} targets: {", ".join(failed)}', cmd=command, results=results)
+    module.exit_json(changed=False, results=results, command=command)
+
+
 def main() -> None:
     """primary function for packer validate module"""
     # instanstiate ansible module
     module = AnsibleModule(
         argument_spec={
+            'cache': {'type': 'bool', 'required': False, 'default': False, 'new_in_version': '1.4.3'},
+            'cache_ttl': {'type': 'int', 'required': False, 'default': 3600, 'new_in_version': '1.4.3'},
             'config_dir': {'type': 'path', 'required': False, 'default': Path.cwd()},
+            'config_dirs': {'type': 'list', 'elements': 'path', 'required': False, 'new_in_version': '1.4.3'},
             'evaluate_datasources': {'type': 'bool', 'required': False},
             'excepts': {'type': 'list', 'elements': 'str', 'required': False},
             'only': {'type': 'list', 'elements': 'str', 'required': False},
@@ -121,13 +221,18 @@ def main() -> None:
             'var': {'type': 'dict', 'required': False},
             'var_file': {'type': 'list', 'elements': 'path', 'required': False},
             'warn_undeclared_var': {'type': 'bool', 'required': False, 'default': True},
+            'workers': {'type': 'int', 'required': False, 'default': 4, 'new_in_version': '1.4.3'},
         },
-        mutually_exclusive=[('excepts', 'only')],
+        mutually_exclusive=[('excepts', 'only'), ('config_dir', 'config_dirs')],
         supports_check_mode=True,
     )
 
     # initialize
     config_dir: Path = Path(module.params.pop('config_dir'))
+    config_dirs: list[str] | None = module.params.pop('config_dirs')
+    workers: int = module.params.pop('workers')
+    cache: bool = module.params.pop('cache')
+    cache_ttl: int = module.params.pop('cache_ttl')
 
     # check flags
     flags: set[str] = set()
@@ -145,9 +250,24 @@ def main() -> None:
     # convert ansible params to packer args
     packer.ansible_to_packer(flags_args[1])
 
+    # results dependent upon data sources expire
+    ttl: int | None = cache_ttl if 'evaluate_datasources' in flags else None
+
+    # concurrently validate many templates
+    if config_dirs:
+        validate_many(module, flags, flags_args[1], config_dirs, workers, cache, ttl)
+
     # determine packer command
     command: list[str] = packer.cmd(action='validate', flags=flags, args=flags_args[1], target_dir=config_dir)
 
+    # return the cached result for an unchanged fingerprint
+    key: str = ''
+    if cache:
+        key = fingerprint(module, config_dir, flags)
+        cached: dict | None = packer.validate_cache_read(key)
+        if cached is not None:
+            module.exit_json(changed=False, cached=True, stdout=cached.get('stdout', ''), stderr=cached.get('stderr', ''), command=command)
+
     # exit early for check mode
     if module.check_mode:
         module.exit_json(changed=False, command=command)
@@ -160,7 +280,9 @@ def main() -> None:
 
     # post-process
     if return_code == 0:
-        module.exit_json(changed=False, stdout=stdout, stderr=stderr, command=command)
+        if key:
+            packer.validate_cache_write(key, {'stdout': stdout, 'stderr': stderr}, ttl)
+        module.exit_json(changed=False, cached=False, stdout=stdout, stderr=stderr, command=command)
     else:
         module.fail_json(
             msg=stderr.rstrip(),
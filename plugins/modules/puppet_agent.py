@@ -59,6 +59,17 @@ options:
         required: false
         type: str
         new_in_version: "1.4.1"
+    lock_wait:
+        description: Maximum seconds to wait with exponential backoff for an agent run in progress (e.g. the daemon) to release the catalog run lock before a O(onetime) or O(test) run, instead of failing immediately. A run which still loses the lock to another run is retried within the same bound. Set to 0 to disable.
+        required: false
+        default: 0
+        type: int
+        new_in_version: "1.4.3"
+    lockfile:
+        description: Location of the catalog run lock file (the agent_catalog_run_lockfile setting) for O(lock_wait). Defaults to agent_catalog_run.lock within O(state_dir).
+        required: false
+        type: path
+        new_in_version: "1.4.3"
     logdest:
         description: Where to send log messages. Can be 'syslog', 'eventlog', 'console', or path to log file. Multiple destinations can be comma-separated.
         required: false
@@ -84,11 +95,28 @@ options:
         required: false
         default: 8140
         type: int
+    slowest:
+        description: Number of resources with the longest evaluation times to return from the last run report. This implies O(summary). The report for a large catalog can be large, and so it is only parsed when this is positive.
+        required: false
+        default: 0
+        type: int
+        new_in_version: "1.4.3"
     sourceaddress:
         description: Set the source IP address for transactions.
         required: false
         type: str
         new_in_version: "1.4.1"
+    state_dir:
+        description: Location of the Puppet state directory containing the last_run_summary.yaml and last_run_report.yaml files. Defaults to the Puppet state directory of the executing user.
+        required: false
+        type: path
+        new_in_version: "1.4.3"
+    summary:
+        description: Parse the last run summary written by the run, and return its resource counts (e.g. changed, failed, out of sync), event counts, and phase timings (e.g. config retrieval, catalog application). A warning is issued instead if the run did not write a summary.
+        required: false
+        default: false
+        type: bool
+        new_in_version: "1.4.3"
     test:
         description: Enable the most common options used for testing. These are 'verbose', 'detailed-exitcodes', and 'show_diff'.
         required: false
@@ -157,6 +185,21 @@ EXAMPLES = r"""
     onetime: true
     job_id: ansible-run-12345
 
+# run puppet agent once and return the run summary with the twenty slowest resources
+- name: Run puppet agent once and return the run summary with the twenty slowest resources
+  mschuchard.general.puppet_agent:
+    onetime: true
+    no_daemonize: true
+    summary: true
+    slowest: 20
+
+# run puppet agent once and wait up to ten minutes for an in progress daemon run to finish
+- name: Run puppet agent once and wait up to ten minutes for an in progress daemon run to finish
+  mschuchard.general.puppet_agent:
+    onetime: true
+    no_daemonize: true
+    lock_wait: 600
+
 # disable puppet agent with message
 - name: Disable puppet agent with maintenance message
   mschuchard.general.puppet_agent:
@@ -180,12 +223,28 @@ command:
     description: The raw Puppet command executed by Ansible.
     type: str
     returned: always
+lock_wait:
+    description: Seconds waited for the catalog run lock to be released.
+    type: float
+    returned: lock_wait is positive
 return_code:
     description: The return code from the Puppet agent execution.
     type: int
     returned: always
+slowest_resources:
+    description: The resources with the longest evaluation times in seconds in descending order including their type, title, manifest file and line, and whether they changed, failed, or were out of sync.
+    type: list
+    elements: dict
+    returned: slowest is positive
+    sample: [{'resource': 'Exec[fail]', 'resource_type': 'Exec', 'title': 'fail', 'file': '/etc/puppetlabs/code/site.pp', 'line': 3, 'evaluation_time': 0.9012, 'changed': false, 'failed': true, 'out_of_sync': true}]
+summary:
+    description: The resource counts, event counts, total changes, epoch time of the run, and phase timings in seconds from the last run summary.
+    type: dict
+    returned: summary is true or slowest is positive
+    sample: {'resources': {'changed': 2, 'failed': 1, 'out_of_sync': 3, 'total': 12}, 'events': {'failure': 1, 'success': 2, 'total': 3}, 'changes': 2, 'last_run': 1700000002, 'timings': {'catalog_application': 1.2734, 'config_retrieval': 0.8461, 'total': 2.7801}}
 """
 
+import time
 from pathlib import Path
 
 from ansible.module_utils.basic import AnsibleModule
@@ -205,12 +264,17 @@ def main() -> None:
             'evaltrace': {'type': 'bool', 'required': False, 'new_in_version': '1.4.1'},
             'fingerprint': {'type': 'bool', 'required': False, 'new_in_version': '1.4.1'},
             'job_id': {'type': 'str', 'required': False, 'new_in_version': '1.4.1'},
+            'lock_wait': {'type': 'int', 'required': False, 'default': 0, 'new_in_version': '1.4.3'},
+            'lockfile': {'type': 'path', 'required': False, 'new_in_version': '1.4.3'},
             'logdest': {'type': 'str', 'required': False, 'new_in_version': '1.4.1'},
             'no_daemonize': {'type': 'bool', 'required': False},
             'no_op': {'type': 'bool', 'required': False},
             'onetime': {'type': 'bool', 'required': False},
             'server_port': {'type': 'int', 'required': False},
+            'slowest': {'type': 'int', 'required': False, 'default': 0, 'new_in_version': '1.4.3'},
             'sourceaddress': {'type': 'str', 'required': False, 'new_in_version': '1.4.1'},
+            'state_dir': {'type': 'path', 'required': False, 'new_in_version': '1.4.3'},
+            'summary': {'type': 'bool', 'required': False, 'default': False, 'new_in_version': '1.4.3'},
             'test': {'type': 'bool', 'required': False},
             'trace': {'type': 'bool', 'required': False, 'new_in_version': '1.4.1'},
             'verbose': {'type': 'bool', 'required': False},
@@ -223,6 +287,14 @@ def main() -> None:
 
     # initialize
     changed: bool = False
+    summary: bool = module.params.pop('summary')
+    slowest: int = module.params.pop('slowest')
+    state_dir: Path = Path(module.params.pop('state_dir') or puppet.state_dir())
+    lockfile: Path = Path(module.params.pop('lockfile') or state_dir / 'agent_catalog_run.lock')
+    lock_wait: int = module.params.pop('lock_wait')
+    # only catalog runs contend for the run lock
+    if not (module.params.get('onetime') or module.params.get('test')):
+        lock_wait = 0
 
     # check optional params
     flags_args: tuple[set[str], dict] = universal.params_to_flags_args(module.params, module.argument_spec)
@@ -238,7 +310,38 @@ def main() -> None:
     return_code: int
     stdout: str
     stderr: str
-    return_code, stdout, stderr = module.run_command(command, cwd=str(Path.cwd()))
+    start: float
+    lock: dict = {}
+    deadline: float = time.monotonic() + lock_wait
+    backoff: float = 1.0
+    while True:
+        # wait for an agent run in progress to release the run lock
+        if lock_wait > 0:
+            wait_start: float = time.monotonic()
+            try:
+                lock['lock_wait'] = lock.get('lock_wait', 0.0) + puppet.wait_run_lock(lockfile, max(deadline - time.monotonic(), 0))
+            except TimeoutError as exc:
+                module.fail_json(msg=str(exc), cmd=command, lock_wait=lock.get('lock_wait', 0.0) + time.monotonic() - wait_start)
+
+        start = time.time()
+        return_code, stdout, stderr = module.run_command(command, cwd=str(Path.cwd()))
+
+        # another run acquired the lock between the wait and this run
+        if not (lock_wait > 0 and return_code != 0 and puppet.RUN_IN_PROGRESS in stdout + stderr and time.monotonic() < deadline):
+            break
+        # back off in case the lock is not observable at the lockfile
+        delay: float = min(backoff, max(deadline - time.monotonic(), 0))
+        time.sleep(delay)
+        lock['lock_wait'] = lock.get('lock_wait', 0.0) + delay
+        backoff = min(backoff * 2, 10.0)
+
+    # parse the run summary and report written by this run
+    run: dict = {}
+    if summary or slowest > 0:
+        try:
+            run = puppet.run_results(state_dir, slowest, since=start)
+        except (OSError, ValueError) as exc:
+            module.warn(f'Unable to parse the Puppet last run summary or report: {exc}')
 
     # check idempotence; enable/disable always causes a change
     if (module.params.get('test') and return_code in {2, 4, 6}) or (module.params.get('enable') or module.params.get('disable')):
@@ -246,12 +349,14 @@ def main() -> None:
 
     # post-process
     if return_code == 0 or changed:
-        module.exit_json(changed=changed, stdout=stdout, stderr=stderr, return_code=return_code, command=command)
+        module.exit_json(changed=changed, stdout=stdout, stderr=stderr, return_code=return_code, command=command, **lock, **run)
     else:
         module.fail_json(
             msg=stderr.rstrip(),
             return_code=return_code,
             cmd=command,
+            **lock,
+            **run,
             stdout=stdout,
             stdout_lines=stdout.splitlines(),
             stderr=stderr,
@@ -16,7 +16,7 @@ description: The standalone Puppet execution tool used to apply individual manif
 
 options:
     catalog:
-        description: Apply a JSON catalog (such as one generated with 'puppet master --compile'). Path to JSON file.
+        description: Apply a JSON catalog (such as one generated with 'puppet master --compile'). Path to JSON file. The catalog is verified to contain the resources, edges, and version keys with an incremental scan before Puppet executes, and verified catalogs are cached by content hash.
         required: false
         type: path
         new_in_version: "1.4.1"
@@ -48,14 +48,31 @@ options:
         type: str
         new_in_version: "1.4.1"
     manifest:
-        description: The path to the Puppet manifest file to apply.
+        description: The path, or list of paths (new in version 1.4.3), to the Puppet manifest files or directories to apply. A directory applies every manifest file within it in alphabetical order. Multiple manifests are staged in order into a single directory and applied in one Puppet process, which compiles and applies one catalog instead of one per manifest, and a directory within the list contributes each of its manifest files. The resource changes of a directory or multiple manifests are attributed to the manifest files from the last run report. A single path is never split on commas.
         required: false
-        type: path
+        type: raw
     no_op:
         description: Use 'noop' mode where Puppet runs in a no-op or dry-run mode. This is useful for seeing what changes Puppet will make without actually executing the changes.
         required: false
         default: false
         type: bool
+    slowest:
+        description: Number of resources with the longest evaluation times to return from the last run report. This implies O(summary). The report for a large catalog can be large, and so it is only parsed when this is positive.
+        required: false
+        default: 0
+        type: int
+        new_in_version: "1.4.3"
+    state_dir:
+        description: Location of the Puppet state directory containing the last_run_summary.yaml and last_run_report.yaml files. Defaults to the Puppet state directory of the executing user.
+        required: false
+        type: path
+        new_in_version: "1.4.3"
+    summary:
+        description: Parse the last run summary written by the run, and return its resource counts (e.g. changed, failed, out of sync), event counts, and phase timings (e.g. config retrieval, catalog application). A warning is issued instead if the run did not write a summary.
+        required: false
+        default: false
+        type: bool
+        new_in_version: "1.4.3"
     test:
         description: Enable the most common options used for testing. These are 'verbose', 'detailed-exitcodes', and 'show_diff'.
         required: false
@@ -111,6 +128,21 @@ EXAMPLES = r"""
     detailed_exitcodes: true
     logdest: /var/log/puppet/apply.log
 
+# apply multiple puppet manifests and the manifests in a directory in one run and return their resource changes
+- name: Apply multiple puppet manifests and the manifests in a directory in one run and return their resource changes
+  mschuchard.general.puppet_apply:
+    manifest:
+    - base.pp
+    - web.pp
+    - /path/to/roles
+
+# apply a puppet manifest and return the run summary with the ten slowest resources
+- name: Apply a puppet manifest and return the run summary with the ten slowest resources
+  mschuchard.general.puppet_apply:
+    manifest: manifest.pp
+    summary: true
+    slowest: 10
+
 # apply manifest with loadclasses and write catalog summary
 - name: Apply manifest with loadclasses and write catalog summary
   mschuchard.general.puppet_apply:
@@ -124,15 +156,34 @@ command:
     description: The raw Puppet command executed by Ansible.
     type: str
     returned: always
+manifests:
+    description: The resource count, out of sync count, and changed and failed resources of each manifest file from the last run report. Resources declared outside of the manifests (e.g. within modules) are attributed to a null manifest.
+    type: list
+    elements: dict
+    returned: manifest is a directory or multiple manifests
+    sample: [{'manifest': 'base.pp', 'resources': 4, 'out_of_sync': 1, 'changed': ['File[/etc/motd]'], 'failed': []}, {'manifest': 'web.pp', 'resources': 2, 'out_of_sync': 0, 'changed': [], 'failed': []}]
 return_code:
     description: The return code from the Puppet apply execution.
     type: int
     returned: always
+slowest_resources:
+    description: The resources with the longest evaluation times in seconds in descending order including their type, title, manifest file and line, and whether they changed, failed, or were out of sync.
+    type: list
+    elements: dict
+    returned: slowest is positive
+    sample: [{'resource': 'Exec[fail]', 'resource_type': 'Exec', 'title': 'fail', 'file': '/etc/puppetlabs/code/site.pp', 'line': 3, 'evaluation_time': 0.9012, 'changed': false, 'failed': true, 'out_of_sync': true}]
+summary:
+    description: The resource counts, event counts, total changes, epoch time of the run, and phase timings in seconds from the last run summary.
+    type: dict
+    returned: summary is true, slowest is positive, or manifest is a directory or multiple manifests
+    sample: {'resources': {'changed': 2, 'failed': 1, 'out_of_sync': 3, 'total': 12}, 'events': {'failure': 1, 'success': 2, 'total': 3}, 'changes': 2, 'last_run': 1700000002, 'timings': {'catalog_application': 1.2734, 'config_retrieval': 0.8461, 'total': 2.7801}}
 """
 
+import time
 from pathlib import Path
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.common.validation import check_type_path
 from ansible_collections.mschuchard.general.plugins.module_utils import puppet, universal
 
 
@@ -147,8 +198,11 @@ def main() -> None:
             'execute': {'type': 'str', 'required': False, 'new_in_version': '1.4.1'},
             'loadclasses': {'type': 'bool', 'required': False, 'new_in_version': '1.4.1'},
             'logdest': {'type': 'str', 'required': False, 'new_in_version': '1.4.1'},
-            'manifest': {'type': 'path', 'required': False},
+            'manifest': {'type': 'raw', 'required': False},
             'no_op': {'type': 'bool', 'required': False},
+            'slowest': {'type': 'int', 'required': False, 'default': 0, 'new_in_version': '1.4.3'},
+            'state_dir': {'type': 'path', 'required': False, 'new_in_version': '1.4.3'},
+            'summary': {'type': 'bool', 'required': False, 'default': False, 'new_in_version': '1.4.3'},
             'test': {'type': 'bool', 'required': False},
             'verbose': {'type': 'bool', 'required': False},
             'write_catalog_summary': {'type': 'bool', 'required': False, 'new_in_version': '1.4.1'},
@@ -160,10 +214,31 @@ def main() -> None:
 
     # initialize
     changed: bool = False
-    manifest: Path | None = None if (m := module.params.pop('manifest', None)) is None else Path(m)
+    # normalize a single path to a list without the comma splitting of the list type, which would break paths containing commas
+    manifest_param: str | list | None = module.params.pop('manifest', None)
+    manifest_paths: list = [manifest_param] if isinstance(manifest_param, str) else manifest_param or []
+    if not isinstance(manifest_paths, list) or not all(isinstance(path, str) for path in manifest_paths):
+        module.fail_json(msg=f'Puppet manifest must be a path or a list of paths: {manifest_param}')
+    manifests: list[Path] = [Path(check_type_path(path)) for path in manifest_paths]
+    manifest: Path | None = manifests[0] if manifests else None
     catalog: Path | None = None if (c := module.params.pop('catalog', None)) is None else Path(c)
     execute: str | None = module.params.pop('execute', None)
     test: bool = module.params.get('test')
+    summary: bool = module.params.pop('summary')
+    slowest: int = module.params.pop('slowest')
+    state_dir: Path = Path(module.params.pop('state_dir') or puppet.state_dir())
+
+    # stage multiple manifests into one directory applied as a single main manifest, and map the applied files for attribution
+    attribution: dict[str, str] = {}
+    try:
+        if len(manifests) > 1:
+            manifest = Path(module.tmpdir) / 'manifests'
+            manifest.mkdir(exist_ok=True)
+            attribution = puppet.stage_manifests(manifests, manifest)
+        elif manifest is not None and manifest.is_dir():
+            attribution = {str(file.absolute()): str(file) for file in puppet.manifest_files(manifest)}
+    except OSError as exc:
+        module.fail_json(msg=str(exc))
 
     # check on optional params
     flags_args: tuple[set[str], dict] = universal.params_to_flags_args(module.params, module.argument_spec)
@@ -179,20 +254,30 @@ def main() -> None:
     return_code: int
     stdout: str
     stderr: str
+    start: float = time.time()
     return_code, stdout, stderr = module.run_command(command, cwd=str(Path.cwd()))
 
+    # parse the run summary and report written by this run
+    run: dict = {}
+    if summary or slowest > 0 or attribution:
+        try:
+            run = puppet.run_results(state_dir, slowest, since=start, manifests=attribution)
+        except (OSError, ValueError) as exc:
+            module.warn(f'Unable to parse the Puppet last run summary or report: {exc}')
+
     # check idempotence
     if (test or module.params.get('detailed_exitcodes')) and return_code in {2, 4, 6}:
         changed = True
 
     # post-process
     if return_code == 0 or changed:
-        module.exit_json(changed=changed, stdout=stdout, stderr=stderr, return_code=return_code, command=command)
+        module.exit_json(changed=changed, stdout=stdout, stderr=stderr, return_code=return_code, command=command, **run)
     else:
         module.fail_json(
             msg=stderr.rstrip(),
             return_code=return_code,
             cmd=command,
+            **run,
             stdout=stdout,
             stdout_lines=stdout.splitlines(),
             stderr=stderr,
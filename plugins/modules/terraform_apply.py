@@ -25,6 +25,18 @@ options:
         required: false
         default: false
         type: bool
+    lock_backoff:
+        description: Base number of seconds for the jittered exponential backoff between retries when the state lock is held by another process.
+        required: false
+        default: 1.0
+        type: float
+        new_in_version: "1.4.3"
+    lock_retries:
+        description: Number of times to retry when the state lock is held by another process. Executions on the same host for the same config_dir are always serialized with a local file lock regardless of this parameter.
+        required: false
+        default: 0
+        type: int
+        new_in_version: "1.4.3"
     plan_file:
         description: Location of the output file generated during a plan. Mutually exclusive with all other parameters since the parameters are all defined instead during the plan execution.
         required: false
@@ -88,6 +100,10 @@ command:
     type: str
     returned: always
     sample: 'terraform apply plan.tfplan'
+queue_wait:
+    description: The number of seconds spent waiting for the local config_dir lock and the state lock retries.
+    type: float
+    returned: success
 """
 
 from pathlib import Path
@@ -103,6 +119,8 @@ def main() -> None:
         argument_spec={
             'config_dir': {'type': 'path', 'required': False, 'default': Path.cwd()},
             'destroy': {'type': 'bool', 'required': False},
+            'lock_backoff': {'type': 'float', 'required': False, 'default': 1.0, 'new_in_version': '1.4.3'},
+            'lock_retries': {'type': 'int', 'required': False, 'default': 0, 'new_in_version': '1.4.3'},
             'plan_file': {'type': 'path', 'required': False},
             'replace': {'type': 'list', 'elements': 'str', 'required': False},
             'target': {'type': 'list', 'elements': 'str', 'required': False},
@@ -156,11 +174,16 @@ def main() -> None:
     if module.check_mode:
         module.exit_json(changed=False, command=command)
 
-    # execute terraform
+    # execute terraform serialized with other same host callers and retried while the state is locked
     return_code: int
     stdout: str
     stderr: str
-    return_code, stdout, stderr = module.run_command(command, cwd=config_dir, environ_update={'TF_IN_AUTOMATION': 'true'})
+    retry_wait: float
+    with terraform.config_lock(config_dir) as queue_wait:
+        return_code, stdout, stderr, retry_wait = terraform.retry_state_lock(
+            module.run_command, command, cwd=config_dir, retries=module.params.get('lock_retries'), backoff=module.params.get('lock_backoff')
+        )
+    queue_wait += retry_wait
 
     # check idempotence
     if '0 added, 0 changed, 0 destroyed' in stdout:
@@ -168,7 +191,7 @@ def main() -> None:
 
     # post-process
     if return_code == 0:
-        module.exit_json(changed=changed, stdout=stdout, stderr=stderr, command=command)
+        module.exit_json(changed=changed, stdout=stdout, stderr=stderr, command=command, queue_wait=queue_wait)
     else:
         module.fail_json(
             msg=stderr.rstrip(),
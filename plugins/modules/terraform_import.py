@@ -28,6 +28,18 @@ options:
         description: The object identifier value.
         required: true
         type: str
+    lock_backoff:
+        description: Base number of seconds for the jittered exponential backoff between retries when the state lock is held by another process.
+        required: false
+        default: 1.0
+        type: float
+        new_in_version: "1.4.3"
+    lock_retries:
+        description: Number of times to retry when the state lock is held by another process. Executions on the same host for the same config_dir are always serialized with a local file lock regardless of this parameter.
+        required: false
+        default: 0
+        type: int
+        new_in_version: "1.4.3"
     var:
         description: Set values for one or more of the input variables in the root module of the configuration.
         required: false
@@ -71,6 +83,10 @@ command:
     type: str
     returned: always
     sample: 'terraform import aws_instance.this i-1234567890'
+queue_wait:
+    description: The number of seconds spent waiting for the local config_dir lock and the state lock retries.
+    type: float
+    returned: success
 """
 
 from pathlib import Path
@@ -87,6 +103,8 @@ def main() -> None:
             'address': {'type': 'str', 'required': True},
             'config_dir': {'type': 'path', 'required': False, 'default': Path.cwd()},
             'id': {'type': 'str', 'required': True},
+            'lock_backoff': {'type': 'float', 'required': False, 'default': 1.0, 'new_in_version': '1.4.3'},
+            'lock_retries': {'type': 'int', 'required': False, 'default': 0, 'new_in_version': '1.4.3'},
             'var': {'type': 'dict', 'required': False},
             'var_file': {'type': 'list', 'elements': 'path', 'required': False},
         },
@@ -116,27 +134,33 @@ def main() -> None:
     # determine terraform command
     command: list[str] = terraform.cmd(action='import', args=args, target_dir=config_dir)
 
-    # check if resource already exists in state
+    # serialize the state check and import with other same host callers
     return_code: int
     stdout: str
     stderr: str
-    return_code, stdout, stderr = module.run_command(
-        ['terraform', f'-chdir={config_dir}', 'state', 'show', '-no-color', address],
-        cwd=config_dir,
-        environ_update={'TF_IN_AUTOMATION': 'true'},
-    )
+    retry_wait: float
+    with terraform.config_lock(config_dir) as queue_wait:
+        # check if resource already exists in state
+        return_code, stdout, stderr = module.run_command(
+            ['terraform', f'-chdir={config_dir}', 'state', 'show', '-no-color', address],
+            cwd=config_dir,
+            environ_update={'TF_IN_AUTOMATION': 'true'},
+        )
 
-    # resource already exists in state, and so we should not import it
-    if return_code == 0 and len(stdout) > 0:
-        module.warn(f'Resource {address} already exists in Terraform state; skipping import')
-        module.exit_json(changed=False, stdout=stdout, stderr=stderr, command=command)
+        # resource already exists in state, and so we should not import it
+        if return_code == 0 and len(stdout) > 0:
+            module.warn(f'Resource {address} already exists in Terraform state; skipping import')
+            module.exit_json(changed=False, stdout=stdout, stderr=stderr, command=command, queue_wait=queue_wait)
 
-    # exit early for check mode
-    if module.check_mode:
-        module.exit_json(changed=changed, command=command)
+        # exit early for check mode
+        if module.check_mode:
+            module.exit_json(changed=changed, command=command)
 
-    # execute terraform
-    return_code, stdout, stderr = module.run_command(command, cwd=config_dir, environ_update={'TF_IN_AUTOMATION': 'true'})
+        # execute terraform and retry while the state is locked
+        return_code, stdout, stderr, retry_wait = terraform.retry_state_lock(
+            module.run_command, command, cwd=config_dir, retries=module.params.get('lock_retries'), backoff=module.params.get('lock_backoff')
+        )
+    queue_wait += retry_wait
 
     # check idempotence
     if 'Import successful!' in stdout:
@@ -144,7 +168,7 @@ def main() -> None:
 
     # post-process
     if return_code == 0:
-        module.exit_json(changed=changed, stdout=stdout, stderr=stderr, command=command)
+        module.exit_json(changed=changed, stdout=stdout, stderr=stderr, command=command, queue_wait=queue_wait)
     else:
         module.fail_json(
             msg=stderr.rstrip(),
@@ -25,10 +25,33 @@ options:
         required: false
         default: false
         type: bool
+    drift:
+        description: Select the drift detection mode which executes a refresh only plan, and returns only the drifted resource addresses with their attribute-level differences. Mutually exclusive with destroy, generate_config, and out.
+        required: false
+        default: false
+        type: bool
+        new_in_version: "1.4.3"
+    drift_max_age:
+        description: Restrict the drift detection refresh to only the state addresses which have not been checked within this number of seconds, were drifted when last checked, or have never been checked. The check history is stored in a local index per config_dir. If no addresses require a refresh, then the plan is skipped entirely. Ignored when target is specified, in which case only the given targets are refreshed and the index is not updated.
+        required: false
+        type: int
+        new_in_version: "1.4.3"
     generate_config:
         description: If import blocks are present in configuration, then instructs Terraform to generate HCL for any imported resources not already present. The configuration is written to a new file at the parameter value which must not already exist. Terraform may still attempt to write configuration if the plan errors.
         required: false
         type: path
+    lock_backoff:
+        description: Base number of seconds for the jittered exponential backoff between retries when the state lock is held by another process.
+        required: false
+        default: 1.0
+        type: float
+        new_in_version: "1.4.3"
+    lock_retries:
+        description: Number of times to retry when the state lock is held by another process. Executions on the same host for the same config_dir are always serialized with a local file lock regardless of this parameter.
+        required: false
+        default: 0
+        type: int
+        new_in_version: "1.4.3"
     out:
         description: Write a plan file to the given parameter value. This can be used as input to the apply module.
         required: false
@@ -90,6 +113,13 @@ EXAMPLES = r"""
     var_file:
     - one.tfvars
     - two.tfvars
+
+# detect drift only for resources not checked within the last hour
+- name: Detect drift only for resources not checked within the last hour
+  mschuchard.general.terraform_plan:
+    config_dir: /path/to/terraform_config_dir
+    drift: true
+    drift_max_age: 3600
 """
 
 RETURN = r"""
@@ -98,8 +128,25 @@ command:
     type: str
     returned: always
     sample: 'terraform plan -out plan.tfplan'
+drift:
+    description: The drifted resource addresses with their planned actions and attribute-level before and after differences.
+    type: list
+    elements: dict
+    returned: drift is true
+    sample: [{'address': 'local_file.this', 'actions': ['update'], 'attributes': {'content': {'before': 'foo', 'after': 'bar'}}}]
+drift_targets:
+    description: The state addresses refreshed during drift detection. All addresses are refreshed when this is not returned.
+    type: list
+    elements: str
+    returned: drift_max_age is specified
+queue_wait:
+    description: The number of seconds spent waiting for the local config_dir lock and the state lock retries.
+    type: float
+    returned: success
 """
 
+import tempfile
+import time
 from pathlib import Path
 
 from ansible.module_utils.basic import AnsibleModule
@@ -113,7 +160,11 @@ def main() -> None:
         argument_spec={
             'config_dir': {'type': 'path', 'required': False, 'default': Path.cwd()},
             'destroy': {'type': 'bool', 'required': False},
+            'drift': {'type': 'bool', 'required': False, 'new_in_version': '1.4.3'},
+            'drift_max_age': {'type': 'int', 'required': False, 'new_in_version': '1.4.3'},
             'generate_config': {'type': 'path', 'required': False},
+            'lock_backoff': {'type': 'float', 'required': False, 'default': 1.0, 'new_in_version': '1.4.3'},
+            'lock_retries': {'type': 'int', 'required': False, 'default': 0, 'new_in_version': '1.4.3'},
             'out': {'type': 'path', 'required': False},
             'refresh_only': {'type': 'bool', 'required': False},
             'replace': {'type': 'list', 'elements': 'str', 'required': False},
@@ -121,11 +172,21 @@ def main() -> None:
             'var': {'type': 'dict', 'required': False},
             'var_file': {'type': 'list', 'elements': 'path', 'required': False},
         },
+        mutually_exclusive=[('drift', 'destroy'), ('drift', 'generate_config'), ('drift', 'out')],
+        required_by={'drift_max_age': 'drift'},
         supports_check_mode=True,
     )
 
     # initialize
     config_dir: Path = Path(module.params.pop('config_dir'))
+    drift: bool = module.params.pop('drift')
+    drift_max_age: int | None = module.params.pop('drift_max_age')
+    lock_retries: int = module.params.pop('lock_retries')
+    lock_backoff: float = module.params.pop('lock_backoff')
+
+    # drift detection is a refresh only plan
+    if drift:
+        module.params['refresh_only'] = True
 
     # check optional params
     flags_args: tuple[set[str], dict] = universal.params_to_flags_args(module.params, module.argument_spec)
@@ -133,6 +194,10 @@ def main() -> None:
     # convert ansible params to terraform args
     terraform.ansible_to_terraform(flags_args[1])
 
+    # drift detection mode has its own execution
+    if drift:
+        detect_drift(module, config_dir, flags_args, drift_max_age, lock_retries, lock_backoff)
+
     # determine terraform command
     command: list[str] = terraform.cmd(action='plan', flags=flags_args[0], args=flags_args[1], target_dir=config_dir)
 
@@ -140,15 +205,20 @@ def main() -> None:
     if module.check_mode:
         module.exit_json(changed=False, command=command)
 
-    # execute terraform
+    # execute terraform serialized with other same host callers and retried while the state is locked
     return_code: int
     stdout: str
     stderr: str
-    return_code, stdout, stderr = module.run_command(command, cwd=config_dir, environ_update={'TF_IN_AUTOMATION': 'true'})
+    retry_wait: float
+    with terraform.config_lock(config_dir) as queue_wait:
+        return_code, stdout, stderr, retry_wait = terraform.retry_state_lock(
+            module.run_command, command, cwd=config_dir, retries=lock_retries, backoff=lock_backoff
+        )
+    queue_wait += retry_wait
 
     # post-process
     if return_code == 0:
-        module.exit_json(changed=False, stdout=stdout, stderr=stderr, command=command)
+        module.exit_json(changed=False, stdout=stdout, stderr=stderr, command=command, queue_wait=queue_wait)
     else:
         module.fail_json(
             msg=stderr.rstrip(),
@@ -161,5 +231,79 @@ def main() -> None:
         )
 
 
+def detect_drift(
+    module: AnsibleModule, config_dir: Path, flags_args: tuple[set[str], dict], max_age: int | None, lock_retries: int, lock_backoff: float
+) -> None:
+    """execute a refresh only plan, and exit with the drifted resources and their attribute-level differences"""
+    # initialize
+    now: float = time.time()
+    index_key: str = universal.cache_key(str(config_dir.resolve()))
+    index: dict[str, dict] = {}
+    checked: list[str] = []
+    result: dict = {}
+    return_code: int
+    stdout: str
+    stderr: str
+
+    # restrict refresh to stale addresses according to the local drift index unless the user specified the targets
+    if max_age is not None and not flags_args[1].get('target'):
+        return_code, stdout, stderr = module.run_command(
+            ['terraform', f'-chdir={config_dir}', 'state', 'list'], cwd=config_dir, environ_update={'TF_IN_AUTOMATION': 'true'}
+        )
+        if return_code != 0:
+            module.fail_json(msg=stderr.rstrip(), return_code=return_code, stdout=stdout, stderr=stderr)
+
+        addresses: list[str] = stdout.splitlines()
+        index = (universal.cache_read('terraform_drift', index_key) or {}).get('index', {})
+        checked = terraform.stale_addresses(index, addresses, max_age, now)
+        result['drift_targets'] = checked
+
+        # nothing to refresh so skip the plan entirely
+        if not checked:
+            module.exit_json(changed=False, drift=[], **result)
+        # target only the stale addresses unless every address is stale
+        if len(checked) < len(addresses):
+            flags_args[1]['target'] = [f'-target={address}' for address in checked]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        plan_file: Path = Path(temp_dir) / 'drift.tfplan'
+        flags_args[1]['out'] = str(plan_file)
+
+        # determine terraform commands
+        command: list[str] = terraform.cmd(action='plan', flags=flags_args[0], args=flags_args[1], target_dir=config_dir)
+        result['command'] = command
+
+        # exit early for check mode
+        if module.check_mode:
+            module.exit_json(changed=False, **result)
+
+        # execute refresh only plan serialized with other same host callers and retried while the state is locked
+        retry_wait: float
+        with terraform.config_lock(config_dir) as queue_wait:
+            return_code, stdout, stderr, retry_wait = terraform.retry_state_lock(
+                module.run_command, command, cwd=config_dir, retries=lock_retries, backoff=lock_backoff
+            )
+        result['queue_wait'] = queue_wait + retry_wait
+        if return_code != 0:
+            module.fail_json(msg=stderr.rstrip(), return_code=return_code, cmd=command, stdout=stdout, stderr=stderr)
+
+        # stream the resource drift from the plan
+        drifted: list[dict]
+        return_code, drifted, stderr = terraform.stream_show_json(
+            terraform.cmd(action='show', flags={'json'}, target_dir=plan_file), cwd=config_dir, key='resource_drift'
+        )
+        if return_code != 0:
+            module.fail_json(msg=stderr.rstrip(), return_code=return_code, cmd=command, stderr=stderr)
+
+    drift: list[dict] = [terraform.drift_changes(resource_drift) for resource_drift in drifted]
+
+    # record the drift check results in the local index
+    if checked:
+        terraform.update_drift_index(index, checked, [change['address'] for change in drift], now)
+        universal.cache_write('terraform_drift', index_key, {'index': index})
+
+    module.exit_json(changed=False, drift=drift, stdout=stdout, **result)
+
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,167 @@
+#!/usr/bin/python
+
+# Copyright (c) Matthew Schuchard
+# MIT License (see LICENSE or https://opensource.org/license/mit)
+"""ansible module for terraform plan inspection"""
+
+DOCUMENTATION = r"""
+---
+module: terraform_plan_inspect
+
+short_description: Module to inspect the resource changes within a Terraform plan file.
+
+version_added: "1.4.3"
+
+description: Streams the JSON representation of a Terraform plan file, and returns only the resource changes matching the address, type, and action filters. The plan JSON is parsed incrementally, and so memory usage remains flat even for very large plans. Results are cached according to the plan file content and the filters.
+
+options:
+    action:
+        description: Return only resource changes with at least one of these planned actions.
+        required: false
+        type: list
+        elements: str
+        choices: ['no-op', 'create', 'read', 'update', 'delete', 'forget']
+    address:
+        description: Return only resource changes with an address matching one of these shell-style glob patterns.
+        required: false
+        type: list
+        elements: str
+    cache:
+        description: Cache the inspection results keyed by the plan file content hash and the filters, and return the cached results for subsequent inspections of the same plan file.
+        required: false
+        default: true
+        type: bool
+    config_dir:
+        description: Location of the directory containing the initialized Terraform root module config files associated with the plan file.
+        required: false
+        default: cwd
+        type: path
+    plan_file:
+        description: Location of the plan file generated during a plan. A relative path is relative to the config_dir, as with the out parameter of the plan module.
+        required: true
+        type: path
+    type:
+        description: Return only resource changes for these resource types.
+        required: false
+        type: list
+        elements: str
+
+requirements:
+    - terraform >= 1.0
+
+author: Matthew Schuchard (@mschuchard)
+"""
+
+EXAMPLES = r"""
+# inspect all resource changes within plan.tfplan
+- name: Inspect all resource changes within plan.tfplan
+  mschuchard.general.terraform_plan_inspect:
+    config_dir: /path/to/terraform_config_dir
+    plan_file: plan.tfplan
+
+# inspect only the deleted or replaced aws instances in the network module
+- name: Inspect only the deleted or replaced aws instances in the network module
+  mschuchard.general.terraform_plan_inspect:
+    plan_file: plan.tfplan
+    address:
+    - module.network.*
+    type:
+    - aws_instance
+    action:
+    - delete
+"""
+
+RETURN = r"""
+cached:
+    description: Whether the resource changes were returned from the cache instead of Terraform.
+    type: bool
+    returned: success
+command:
+    description: The raw Terraform command executed by Ansible.
+    type: str
+    returned: always
+    sample: 'terraform show -no-color -json plan.tfplan'
+resource_changes:
+    description: The resource changes within the plan matching the filters.
+    type: list
+    elements: dict
+    returned: success
+"""
+
+from pathlib import Path
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.mschuchard.general.plugins.module_utils import (
+    terraform,
+    universal,
+)
+
+
+def main() -> None:
+    """primary function for terraform plan inspect module"""
+    # instanstiate ansible module
+    module = AnsibleModule(
+        argument_spec={
+            'action': {'type': 'list', 'elements': 'str', 'required': False, 'choices': ['no-op', 'create', 'read', 'update', 'delete', 'forget']},
+            'address': {'type': 'list', 'elements': 'str', 'required': False},
+            'cache': {'type': 'bool', 'required': False, 'default': True},
+            'config_dir': {'type': 'path', 'required': False, 'default': Path.cwd()},
+            'plan_file': {'type': 'path', 'required': True},
+            'type': {'type': 'list', 'elements': 'str', 'required': False},
+        },
+        supports_check_mode=True,
+    )
+
+    # initialize
+    config_dir: Path = Path(module.params.get('config_dir'))
+    # a relative plan file is relative to the config dir where terraform plan wrote it
+    plan_file: Path = (config_dir / module.params.get('plan_file')).resolve()
+    filters: dict[str, list[str]] = {
+        'addresses': module.params.get('address') or [],
+        'types': module.params.get('type') or [],
+        'actions': module.params.get('action') or [],
+    }
+
+    # determine terraform command
+    command: list[str] = terraform.cmd(action='show', flags={'json'}, target_dir=plan_file)
+
+    # check for cached results keyed by plan content and filters
+    key: str = ''
+    if module.params.get('cache'):
+        key = universal.cache_key(universal.file_digest(plan_file), filters)
+        cached: dict | None = universal.cache_read('terraform_plan_inspect', key)
+        if cached is not None:
+            module.exit_json(changed=False, cached=True, resource_changes=cached['resource_changes'], command=command)
+
+    # exit early for check mode
+    if module.check_mode:
+        module.exit_json(changed=False, command=command)
+
+    # execute terraform and stream the resource changes
+    return_code: int
+    resource_changes: list[dict]
+    stderr: str
+    try:
+        return_code, resource_changes, stderr = terraform.stream_show_json(
+            command, cwd=config_dir, key='resource_changes', match=lambda change: terraform.resource_change_matches(change, **filters)
+        )
+    except (OSError, ValueError) as exc:
+        module.fail_json(msg=str(exc), cmd=command)
+
+    # post-process
+    if return_code == 0:
+        if key:
+            universal.cache_write('terraform_plan_inspect', key, {'resource_changes': resource_changes})
+        module.exit_json(changed=False, cached=False, resource_changes=resource_changes, stderr=stderr, command=command)
+    else:
+        module.fail_json(
+            msg=stderr.rstrip(),
+            return_code=return_code,
+            cmd=command,
+            stderr=stderr,
+            stderr_lines=stderr.splitlines(),
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""benchmark of process spawn time against goss vars inline payload size for the argv and vars file transports
+
+usage: python tests/benchmark/goss_vars_inline.py [executable]
+the executable defaults to goss with a render of an empty gossfile if it is installed, and otherwise to true, which isolates the spawn cost"""
+
+import json
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# encoded payload sizes in bytes; linux limits a single argument to 128KiB and so larger payloads are only possible with a vars file
+SIZES: list[int] = [1024, 8192, 32768, 65536, 120000, 1048576]
+ROUNDS: int = 20
+
+
+def payload(size: int) -> str:
+    """return a json encoded vars inline payload of approximately the size"""
+    return json.dumps({'hosts': ['x' * 94] * (size // 100)})
+
+
+def spawn(command: list[str]) -> float:
+    """return the median seconds to spawn and reap the command"""
+    durations: list[float] = []
+    for _ in range(ROUNDS):
+        start: float = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def main() -> None:
+    """print the median spawn time of each transport for each payload size"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # determine the command prefix
+        if len(sys.argv) > 1:
+            prefix: list[str] = [sys.argv[1]]
+            suffix: list[str] = []
+        elif shutil.which('goss'):
+            gossfile: Path = Path(temp_dir) / 'goss.yaml'
+            gossfile.write_text('{}', encoding='UTF-8')
+            prefix, suffix = ['goss', '-g', str(gossfile)], ['render']
+        else:
+            prefix, suffix = [shutil.which('true') or 'true'], []
+
+        print(f'{"bytes":>10} {"argv ms":>10} {"file ms":>10}')
+        for size in SIZES:
+            vars_json: str = payload(size)
+
+            # the vars file transport includes the cost of writing the file
+            vars_file: Path = Path(temp_dir) / 'vars.json'
+            start: float = time.perf_counter()
+            vars_file.write_text(vars_json, encoding='UTF-8')
+            write: float = time.perf_counter() - start
+            file_ms: float = (spawn(prefix + ['--vars', str(vars_file)] + suffix) + write) * 1000
+
+            try:
+                argv_ms: str = f'{spawn(prefix + ["--vars-inline", vars_json] + suffix) * 1000:.2f}'
+            # argument exceeds the system limit
+            except OSError:
+                argv_ms = 'E2BIG'
+
+            print(f'{len(vars_json):>10} {argv_ms:>10} {file_ms:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
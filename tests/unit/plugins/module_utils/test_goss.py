@@ -1,10 +1,18 @@
 """unit test for goss module util"""
 
+import http.server
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
 from pathlib import Path
+from typing import ClassVar
 
 import pytest
 
-from ansible_collections.mschuchard.general.plugins.module_utils import goss
+from ansible_collections.mschuchard.general.plugins.module_utils import goss, universal
 
 
 def test_goss_cmd_errors():
@@ -103,3 +111,315 @@ def test_goss_cmd():
         '-l',
         ':8765',
     ]
+
+
+def test_goss_spill_vars_inline(tmp_path):
+    """test goss vars inline spillover to a vars file"""
+    # test payload above the threshold spilled once to an owner-only temporary vars file
+    vars_inline: dict = {'packages': ['package'] * goss.VARS_INLINE_MAX_BYTES}
+    command: list[str] = goss.cmd(action='validate', args={'vars_inline': vars_inline})
+    assert command[1] == '--vars'
+    vars_file: Path = Path(command[2])
+    assert json.loads(vars_file.read_text(encoding='UTF-8')) == vars_inline
+    assert vars_file.stat().st_mode & 0o777 == 0o600
+    assert goss.cmd(action='render', args={'vars_inline': vars_inline})[2] == str(vars_file)
+
+    # test payload at the threshold remains inline
+    payload: str = 'a' * (goss.VARS_INLINE_MAX_BYTES - len('{"foo": ""}'))
+    assert goss.cmd(action='render', args={'vars_inline': {'foo': payload}})[1:3] == ['--vars-inline', json.dumps({'foo': payload})]
+
+    # test spill to a persistent vars file
+    assert goss.spill_vars_inline('{"foo": "bar"}', tmp_path / 'serve' / 'vars.json') == tmp_path / 'serve' / 'vars.json'
+    assert (tmp_path / 'serve' / 'vars.json').read_text(encoding='UTF-8') == '{"foo": "bar"}'
+    assert (tmp_path / 'serve' / 'vars.json').stat().st_mode & 0o777 == 0o600
+
+    # test temporary vars file removal at interpreter exit
+    result = subprocess.run(
+        [sys.executable, '-c', 'from ansible_collections.mschuchard.general.plugins.module_utils import goss; print(goss.spill_vars_inline("{}"))'],
+        env=os.environ | {'PYTHONPATH': os.pathsep.join(sys.path)},
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    assert result.stdout.strip().endswith('.json')
+    assert not Path(result.stdout.strip()).exists()
+
+
+def test_goss_parse_results():
+    """test goss json report parsing"""
+    stdout: str = json.dumps(
+        {
+            'results': [
+                {'resource-type': 'File', 'resource-id': '/etc', 'property': 'exists', 'successful': True, 'duration': 1000000, 'summary-line': 'ok'},
+                {'resource-type': 'Command', 'resource-id': 'sleep 2', 'property': 'exit-status', 'successful': False, 'duration': 2000000000, 'err': None},
+                {'resource-type': 'HTTP', 'resource-id': 'http://localhost', 'property': 'status', 'skipped': True, 'duration': 0},
+            ],
+            'summary': {'failed-count': 1, 'skipped-count': 1, 'summary-line': 'Count: 3, Failed: 1', 'test-count': 3, 'total-duration': 2001000000},
+        }
+    )
+
+    report: dict = goss.parse_results(stdout, slowest=2)
+    assert report['results'][0] == {
+        'resource_type': 'File',
+        'resource_id': '/etc',
+        'property': 'exists',
+        'title': '',
+        'success': True,
+        'skipped': False,
+        'duration': 0.001,
+        'summary_line': 'ok',
+        'err': None,
+    }
+    assert report['summary'] == {'test_count': 3, 'failed_count': 1, 'skipped_count': 1, 'duration': 2.001}
+    assert [result['resource_id'] for result in report['slowest']] == ['sleep 2', '/etc']
+
+    # test report without summary or results, and invalid report
+    assert goss.parse_results('{"results": null}', slowest=0) == {
+        'results': [],
+        'summary': {'test_count': 0, 'failed_count': 0, 'skipped_count': 0, 'duration': 0.0},
+        'slowest': [],
+    }
+    with pytest.raises(ValueError):
+        goss.parse_results('Count: 3')
+
+
+def test_goss_gossfiles_concurrency(monkeypatch):
+    """test gossfiles concurrency within the cpu budget"""
+    # test processes are the budget bounded by the gossfiles
+    assert goss.gossfiles_concurrency(16, 30) == 16
+    assert goss.gossfiles_concurrency(16, 2) == 2
+    # test default budget of the cpu cores runs processes in parallel
+    monkeypatch.setattr(goss.os, 'cpu_count', lambda: 8)
+    assert goss.gossfiles_concurrency(None, 30) == 8
+    monkeypatch.setattr(goss.os, 'cpu_count', lambda: None)
+    assert goss.gossfiles_concurrency(None, 30) == 1
+
+
+def test_goss_validate_gossfiles(tmp_path):
+    """test concurrent validation of gossfiles and merged reports"""
+    report: str = json.dumps(
+        {
+            'results': [{'resource-type': 'Command', 'resource-id': 'true', 'property': 'exit-status', 'successful': True, 'duration': 3000000000}],
+            'summary': {'failed-count': 0, 'test-count': 1, 'total-duration': 3000000000},
+        }
+    )
+    commands: dict[str, list[str]] = {
+        str(tmp_path / 'pass.yaml'): ['echo', report],
+        str(tmp_path / 'fail.yaml'): ['sh', '-c', 'echo "Error: file does not exist" >&2; exit 1'],
+    }
+
+    reports: dict[str, dict] = goss.validate_gossfiles(commands, workers=2)
+    assert list(reports) == list(commands)
+    assert reports[str(tmp_path / 'pass.yaml')]['success']
+    assert reports[str(tmp_path / 'pass.yaml')]['summary']['test_count'] == 1
+    assert not reports[str(tmp_path / 'fail.yaml')]['success']
+    assert reports[str(tmp_path / 'fail.yaml')]['error'] == 'Error: file does not exist'
+
+    # test merged summary and slowest checks attributed to gossfiles
+    merged: dict = goss.merge_reports(reports)
+    assert merged['summary'] == {'test_count': 1, 'failed_count': 0, 'skipped_count': 0, 'duration': 3.0}
+    assert merged['slowest'][0]['gossfile'] == str(tmp_path / 'pass.yaml')
+
+
+def test_goss_textfile_metrics(tmp_path):
+    """test goss node_exporter textfile metrics"""
+    check: dict = {'resource_type': 'Command', 'resource_id': 'echo "hi"', 'property': 'stdout', 'success': True, 'skipped': False, 'duration': 0.25}
+    reports: dict[str, dict] = {
+        '/goss.yaml': {
+            'success': False,
+            'results': [check, check | {'success': False, 'duration': 0.5}, check | {'property': 'exit-status', 'skipped': True, 'success': False}],
+            'summary': {'test_count': 3, 'failed_count': 1, 'skipped_count': 1, 'duration': 1.5},
+        },
+        # goss error without results
+        '/error.yaml': {'success': False, 'error': 'invalid gossfile'},
+    }
+    metrics: str = goss.textfile_metrics(reports, run_duration=2.0, timestamp=1700000000.0)
+    labels: str = '{gossfile="/goss.yaml",resource_type="Command",resource_id="echo \\"hi\\"",property="stdout"}'
+
+    # test checks with identical labels are combined
+    assert f'goss_check_success{labels} 0\n' in metrics
+    assert f'goss_check_duration_seconds{labels} 0.75\n' in metrics
+    assert metrics.count('goss_check_success{') == 2
+    assert 'goss_check_skipped{gossfile="/goss.yaml",resource_type="Command",resource_id="echo \\"hi\\"",property="exit-status"} 1\n' in metrics
+    assert 'goss_validate_failed{gossfile="/goss.yaml"} 1\n' in metrics
+    assert 'goss_validate_tests{gossfile="/error.yaml"} 0\n' in metrics
+    assert 'goss_validate_success{gossfile="/goss.yaml"} 0\n' in metrics
+    assert '# TYPE goss_validate_run_duration_seconds gauge\ngoss_validate_run_duration_seconds 2.0\n' in metrics
+    assert metrics.endswith('goss_validate_last_run_timestamp_seconds 1700000000.0\n')
+    assert goss.parse_prometheus(metrics)['metrics'][0]['labels']['resource_id'] == 'echo "hi"'
+
+    # test textfile write
+    goss.write_textfile(tmp_path / 'goss.prom', metrics)
+    assert (tmp_path / 'goss.prom').read_text(encoding='UTF-8') == metrics
+    assert (tmp_path / 'goss.prom').stat().st_mode & 0o777 == 0o644
+    assert [file.name for file in tmp_path.iterdir()] == ['goss.prom']
+
+
+def test_goss_retry_helpers():
+    """test failed check isolation and retry result merging"""
+    results: list[dict] = [
+        {'resource_type': 'File', 'resource_id': '/etc', 'success': True, 'skipped': False, 'duration': 0.1},
+        {'resource_type': 'KernelParam', 'resource_id': 'net.ipv4.ip_forward', 'success': False, 'skipped': False, 'duration': 0.2},
+        {'resource_type': 'KernelParam', 'resource_id': 'net.ipv4.ip_forward', 'success': True, 'skipped': False, 'duration': 0.2},
+        {'resource_type': 'HTTP', 'resource_id': 'http://localhost', 'success': False, 'skipped': True, 'duration': 0},
+    ]
+    resources: set[tuple[str, str]] = goss.failed_checks(results)
+    assert resources == {('KernelParam', 'net.ipv4.ip_forward')}
+
+    # test filtered gossfile contains only the failed resources
+    rendered: dict = {'file': {'/etc': {'exists': True}}, 'kernel-param': {'net.ipv4.ip_forward': {'value': '1'}}}
+    assert goss.filter_gossfile(rendered, resources) == {'kernel-param': {'net.ipv4.ip_forward': {'value': '1'}}}
+    assert goss.filter_gossfile(rendered, {('Service', 'sshd')}) is None
+
+    # test merged results and recomputed summary
+    retried: list[dict] = [{'resource_type': 'KernelParam', 'resource_id': 'net.ipv4.ip_forward', 'success': True, 'skipped': False, 'duration': 0.3}]
+    merged: dict = goss.merge_attempt(results, retried, resources, duration=1.5, slowest=1)
+    assert merged['results'] == [results[0], results[3], retried[0]]
+    assert merged['summary'] == {'test_count': 3, 'failed_count': 0, 'skipped_count': 1, 'duration': 1.5}
+    assert merged['slowest'] == retried
+
+
+def test_goss_render_fingerprint(tmp_path):
+    """test gossfile include tree and render fingerprint"""
+    (tmp_path / 'roles').mkdir()
+    (tmp_path / 'goss.yaml').write_text('gossfile:\n  roles/*.yaml: {}\n  missing.yaml: {}\n', encoding='UTF-8')
+    (tmp_path / 'roles' / 'web.yaml').write_text('gossfile:\n  ../goss.yaml: {}\nport:\n  tcp:80:\n    listening: true\n', encoding='UTF-8')
+    (tmp_path / 'roles' / 'db.yaml').write_text('port:\n  tcp:5432:\n    listening: {{ .Vars.listening }}\n', encoding='UTF-8')
+
+    # test recursive includes with cycle, and templated gossfile fallback to directory content
+    assert goss.gossfile_tree(tmp_path / 'goss.yaml') == [tmp_path / 'goss.yaml', tmp_path / 'roles' / 'db.yaml', tmp_path / 'roles' / 'web.yaml']
+
+    # test templated gossfile includes, and templated include path fallback to only the directory gossfiles
+    templated: Path = tmp_path / 'templated'
+    (templated / 'sub').mkdir(parents=True)
+    (templated / 'main.yaml').write_text(
+        'gossfile:\n  "{{ .Vars.role }}.yaml": {}\n  \'common.yml\':\n    skip: false\nport:\n  tcp:22:\n    listening: {{ .Vars.listening }}\n',
+        encoding='UTF-8',
+    )
+    for file in ('web.yaml', 'common.yml', 'disk.img', 'sub/nested.yaml'):
+        (templated / file).touch()
+    assert goss.gossfile_includes((templated / 'main.yaml').read_text(encoding='UTF-8')) == ['{{ .Vars.role }}.yaml', 'common.yml']
+    assert goss.gossfile_tree(templated / 'main.yaml') == [templated / 'common.yml', templated / 'main.yaml', templated / 'web.yaml']
+
+    # test fingerprint sensitivity to included content, vars, and options
+    key: str = goss.render_fingerprint(tmp_path / 'goss.yaml', vars_inline={'listening': True})
+    assert key == goss.render_fingerprint(tmp_path / 'goss.yaml', vars_inline={'listening': True})
+    assert key != goss.render_fingerprint(tmp_path / 'goss.yaml', vars_inline={'listening': False})
+    assert key != goss.render_fingerprint(tmp_path / 'goss.yaml', vars_inline={'listening': True}, debug=True)
+    (tmp_path / 'roles' / 'web.yaml').write_text('port: {}\n', encoding='UTF-8')
+    assert key != goss.render_fingerprint(tmp_path / 'goss.yaml', vars_inline={'listening': True})
+
+
+def test_goss_server_lifecycle(tmp_path):
+    """test background server start, readiness, and stop"""
+    # find a free port
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port: int = sock.getsockname()[1]
+    (tmp_path / 'goss').mkdir()
+    pid_file: Path = tmp_path / 'serve.pid'
+
+    # pseudo goss server whose command line contains goss
+    command: list[str] = [sys.executable, '-m', 'http.server', str(port), '--bind', '127.0.0.1', '--directory', str(tmp_path / 'goss')]
+    pid: int = goss.start_server(command, tmp_path, pid_file)
+    try:
+        assert goss.wait_ready(pid, port, '/healthz', timeout=10) < 10
+        assert goss.server_pid(pid_file) == pid
+        assert goss.server_fingerprint(pid_file) == universal.cache_key(command, str(tmp_path))
+    finally:
+        assert goss.stop_server(pid_file)
+
+    # test stopped server and stale pid file
+    assert goss.server_pid(pid_file) is None
+    assert goss.server_fingerprint(pid_file) is None
+    assert not goss.stop_server(pid_file)
+    with subprocess.Popen(['sleep', '5']) as process:
+        pid_file.write_text(f'{process.pid}\n', encoding='UTF-8')
+        assert goss.server_pid(pid_file) is None
+        process.kill()
+
+    # test server which exits before ready
+    pid = goss.start_server([sys.executable, '-c', 'import sys; sys.exit("goss")'], tmp_path, pid_file)
+    with pytest.raises(RuntimeError, match='GoSS server exited before it was ready'):
+        goss.wait_ready(pid, port, '/healthz', timeout=10)
+
+
+class GossStandIn(http.server.BaseHTTPRequestHandler):
+    """stand-in goss serve endpoint which negotiates the report format and records the client connections"""
+
+    protocol_version = 'HTTP/1.1'
+    connections: ClassVar[set[int]] = set()
+
+    def do_GET(self):
+        """respond with a passing json or prometheus report at /healthz, a failing report at /failing, and not found otherwise"""
+        GossStandIn.connections.add(self.client_address[1])
+        if self.path not in ('/healthz', '/failing'):
+            body: bytes = b'404 page not found\n'
+        elif self.headers['Accept'] == goss.HEALTH_ACCEPT['prometheus']:
+            body = b'# HELP goss_tests_outcomes_total outcomes\n# TYPE goss_tests_outcomes_total counter\ngoss_tests_outcomes_total{outcome="pass",type="command"} 2\n'
+        else:
+            successful: bool = self.path == '/healthz'
+            body = json.dumps(
+                {
+                    'results': [{'resource-type': 'Command', 'resource-id': 'echo', 'property': 'exit-status', 'successful': successful, 'duration': 2000000}],
+                    'summary': {'test-count': 1, 'failed-count': int(not successful), 'total-duration': 3000000},
+                }
+            ).encode('UTF-8')
+        self.send_response({'/healthz': 200, '/failing': 503}.get(self.path, 404))
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        """silence request logging"""
+
+
+def test_goss_parse_prometheus():
+    """test goss prometheus format parsing"""
+    parsed: dict = goss.parse_prometheus(
+        '# TYPE goss_tests_outcomes_total counter\n'
+        'goss_tests_outcomes_total{outcome="pass",type="file"} 3\n'
+        'goss_tests_outcomes_total{outcome="fail",type="file"} 1\n'
+        'goss_tests_outcomes_total{outcome="pass",type="command"} 2\n'
+        'goss_tests_run_duration_milliseconds{outcome="fail",note="a \\"b\\""} 12.5\n'
+        '\n'
+        'up 1\n'
+    )
+    assert parsed['outcomes'] == {'pass': 5, 'fail': 1}
+    assert len(parsed['metrics']) == 5
+    assert parsed['metrics'][3] == {'name': 'goss_tests_run_duration_milliseconds', 'labels': {'outcome': 'fail', 'note': 'a "b"'}, 'value': 12.5}
+    assert parsed['metrics'][4] == {'name': 'up', 'labels': {}, 'value': 1.0}
+    with pytest.raises(ValueError, match='Invalid Prometheus exposition format line'):
+        goss.parse_prometheus('{outcome="pass"} 1')
+
+
+def test_goss_query_health():
+    """test goss health queries against a stand-in server"""
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), GossStandIn)
+    port: int = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        # test json format with keep-alive connection reuse
+        GossStandIn.connections.clear()
+        results: list[dict] = goss.query_health('127.0.0.1', [(port, '/healthz')] * 4 + [(port, '/failing'), (port, '/missing')], workers=1)
+        assert len(GossStandIn.connections) == 1
+        assert [result['status'] for result in results] == [200, 200, 200, 200, 503, 404]
+        assert [result['healthy'] for result in results] == [True, True, True, True, False, False]
+        assert results[0]['url'] == f'http://127.0.0.1:{port}/healthz'
+        assert results[0]['summary'] == {'test_count': 1, 'failed_count': 0, 'skipped_count': 0, 'duration': 0.003}
+        assert results[4]['results'][0]['success'] is False
+        assert 'error' not in results[0]
+        assert 'error' in results[5]
+
+        # test prometheus format with concurrent queries
+        results = goss.query_health('127.0.0.1', [(port, '/healthz')] * 3, format='prometheus', workers=3)
+        assert all(result['outcomes'] == {'pass': 2} for result in results)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    # test unreachable server
+    results = goss.query_health('127.0.0.1', [(port, '/healthz')], timeout=1)
+    assert results[0]['status'] is None
+    assert not results[0]['healthy']
+    assert results[0]['error']
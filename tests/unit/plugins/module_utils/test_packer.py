@@ -1,5 +1,6 @@
 """unit test for packer module util"""
 
+import time
 from pathlib import Path
 
 import pytest
@@ -101,3 +102,412 @@ def test_ansible_to_packer():
         'var': ['-var', "var1='value1'", '-var', "var2='value2'", '-var', "var3='value3'"],
         'var_file': ['-var-file=galaxy.yml', '-var-file=galaxy.yml', '-var-file=galaxy.yml'],
     }
+
+
+def test_machine_readable_events():
+    """test machine-readable output parsing"""
+    assert list(
+        packer.machine_readable_events(
+            [
+                '1700000000,,ui,say,==> docker.ubuntu: foo%!(PACKER_COMMA) bar\\nbaz\n',
+                'not machine readable\n',
+                '1700000001,docker.ubuntu,artifact-count,1\n',
+            ]
+        )
+    ) == [
+        (1700000000, '', 'ui', ['say', '==> docker.ubuntu: foo, bar\nbaz']),
+        (1700000001, 'docker.ubuntu', 'artifact-count', ['1']),
+    ]
+
+
+def test_summarize_events():
+    """test machine-readable events summary"""
+    output: list[str] = [
+        '1700000000,,ui,say,==> docker.ubuntu: Creating a temporary directory',
+        '1700000001,,ui,say,==> null.fail: Running local shell script',
+        '1700000002,,ui,error,==> null.fail: Script exited with non-zero exit status: 1',
+        "1700000003,,ui,error,Build 'null.fail' errored after 2 seconds: bad",
+        '1700000004,null.fail,error,bad',
+        "1700000010,,ui,say,Build 'docker.ubuntu' finished after 10 seconds.",
+        '1700000010,docker.ubuntu,artifact-count,1',
+        '1700000010,docker.ubuntu,artifact,0,builder-id,packer.docker',
+        '1700000010,docker.ubuntu,artifact,0,id,sha256:abc',
+        '1700000010,docker.ubuntu,artifact,0,string,Imported Docker image: sha256:abc',
+        '1700000010,docker.ubuntu,artifact,0,files-count,1',
+        '1700000010,docker.ubuntu,artifact,0,file,0,image.tar',
+        '1700000010,docker.ubuntu,artifact,0,end',
+        '1700000011,,ui,error,Error: Could not find any config file',
+    ]
+    assert packer.summarize_events(packer.machine_readable_events(output)) == {
+        'builds': {
+            'docker.ubuntu': {
+                'start': 1700000000,
+                'end': 1700000010,
+                'duration': 10,
+                'artifacts': [{'builder_id': 'packer.docker', 'id': 'sha256:abc', 'string': 'Imported Docker image: sha256:abc', 'files': ['image.tar']}],
+                'errors': [],
+            },
+            'null.fail': {
+                'start': 1700000001,
+                'end': 1700000004,
+                'duration': 3,
+                'artifacts': [],
+                'errors': ['Script exited with non-zero exit status: 1', 'bad', 'bad'],
+            },
+        },
+        'errors': ['Error: Could not find any config file'],
+        'steps': [
+            {'build': 'docker.ubuntu', 'type': 'builder', 'name': 'docker', 'start': 1700000000, 'end': 1700000010, 'duration': 10},
+            {'build': 'null.fail', 'type': 'builder', 'name': 'null', 'start': 1700000001, 'end': 1700000003, 'duration': 2},
+        ],
+    }
+
+
+def test_timing_profile():
+    """test builder, provisioner, and post-processor timing profile"""
+    output: list[str] = [
+        '1700000000,,ui,say,==> docker.ubuntu: Pulling Docker image: ubuntu',
+        '1700000005,,ui,say,==> docker.ubuntu: Provisioning with shell script: /tmp/packer-shell123',
+        '1700000006,,ui,message,    docker.ubuntu: installing packages',
+        '1700000030,,ui,say,==> docker.ubuntu: Provisioning with Ansible...',
+        '1700000042,,ui,say,==> docker.ubuntu: Running post-processor: docker-tag',
+        '1700000043,,ui,say,==> docker.ubuntu (docker-tag): Tagging image',
+        "1700000044,,ui,say,Build 'docker.ubuntu' finished after 44 seconds.",
+        '1700000050,,ui,say,==> Builds finished. The artifacts of successful builds are:',
+    ]
+    summary: dict = packer.summarize_events(packer.machine_readable_events(output))
+    assert summary['steps'] == [
+        {'build': 'docker.ubuntu', 'type': 'builder', 'name': 'docker', 'start': 1700000000, 'end': 1700000005, 'duration': 5},
+        {'build': 'docker.ubuntu', 'type': 'provisioner', 'name': 'shell script: /tmp/packer-shell123', 'start': 1700000005, 'end': 1700000030, 'duration': 25},
+        {'build': 'docker.ubuntu', 'type': 'provisioner', 'name': 'Ansible', 'start': 1700000030, 'end': 1700000042, 'duration': 12},
+        {'build': 'docker.ubuntu', 'type': 'post-processor', 'name': 'docker-tag', 'start': 1700000042, 'end': 1700000044, 'duration': 2},
+    ]
+
+    # test sorted profile
+    assert [(span['type'], span['duration']) for span in packer.timing_profile(summary)] == [
+        ('build', 44),
+        ('provisioner', 25),
+        ('provisioner', 12),
+        ('builder', 5),
+        ('post-processor', 2),
+    ]
+
+
+def test_run_machine_readable():
+    """test streaming command execution"""
+    # test output summary and bounded stdout tail
+    return_code, summary, stdout, stderr = packer.run_machine_readable(
+        ['sh', '-c', 'for i in 1 2 3; do echo "170000000$i,,ui,say,==> null.this: $i"; done; echo oops >&2'], cwd=Path.cwd(), tail=1
+    )
+    assert return_code == 0
+    assert summary['builds']['null.this']['duration'] == 2
+    assert stdout == '1700000003,,ui,say,==> null.this: 3\n'
+    assert stderr == 'oops\n'
+    # test full stdout by default
+    _, _, stdout, _ = packer.run_machine_readable(['sh', '-c', 'for i in 1 2 3; do echo "170000000$i,,ui,say,==> null.this: $i"; done'], cwd=Path.cwd())
+    assert stdout.splitlines() == [f'170000000{i},,ui,say,==> null.this: {i}' for i in range(1, 4)]
+
+
+def test_build_fingerprint(tmp_path):
+    """test build fingerprint"""
+    (tmp_path / 'foo.pkr.hcl').write_text('foo', encoding='UTF-8')
+    fingerprint: str = packer.build_fingerprint(tmp_path, var={'foo': 'bar'}, var_file=[Path('galaxy.yml')], only=['null.this', 'null.that'])
+
+    # test fingerprint is deterministic and independent of selection order
+    assert fingerprint == packer.build_fingerprint(tmp_path, var={'foo': 'bar'}, var_file=[Path('galaxy.yml')], only=['null.that', 'null.this'])
+
+    # test fingerprint changes with vars, selection, and template content
+    assert fingerprint != packer.build_fingerprint(tmp_path, var={'foo': 'baz'}, var_file=[Path('galaxy.yml')], only=['null.this', 'null.that'])
+    assert fingerprint != packer.build_fingerprint(tmp_path, var={'foo': 'bar'}, var_file=[Path('galaxy.yml')], excepts=['null.this', 'null.that'])
+
+    # test fingerprint ignores build output written into the template directory
+    (tmp_path / 'output-qemu').mkdir()
+    (tmp_path / 'output-qemu' / 'image.qcow2').write_text('image', encoding='UTF-8')
+    (tmp_path / 'manifest.json').write_text('{}', encoding='UTF-8')
+    assert fingerprint == packer.build_fingerprint(tmp_path, var={'foo': 'bar'}, var_file=[Path('galaxy.yml')], only=['null.this', 'null.that'])
+
+    # test fingerprint changes with template and variable definition content
+    (tmp_path / 'foo.pkr.hcl').write_text('bar', encoding='UTF-8')
+    fingerprint_template: str = packer.build_fingerprint(tmp_path, var={'foo': 'bar'}, var_file=[Path('galaxy.yml')], only=['null.this', 'null.that'])
+    assert fingerprint != fingerprint_template
+    (tmp_path / 'foo.auto.pkrvars.hcl').write_text('foo = "bar"', encoding='UTF-8')
+    assert fingerprint_template != packer.build_fingerprint(tmp_path, var={'foo': 'bar'}, var_file=[Path('galaxy.yml')], only=['null.this', 'null.that'])
+
+    # test template files
+    assert packer.template_files(tmp_path) == [tmp_path / 'foo.auto.pkrvars.hcl', tmp_path / 'foo.pkr.hcl']
+    assert packer.template_files(tmp_path / 'foo.pkr.hcl') == [tmp_path / 'foo.pkr.hcl']
+
+
+def test_artifact_exists(tmp_path):
+    """test artifact existence probes"""
+    # test artifact without files is assumed to exist
+    assert packer.artifact_exists({'id': 'foo', 'files': []})
+
+    # test artifact files existence
+    (tmp_path / 'image.qcow2').touch()
+    assert packer.artifact_exists({'id': 'foo', 'files': ['image.qcow2']}, cwd=tmp_path)
+    assert not packer.artifact_exists({'id': 'foo', 'files': ['image.qcow2', 'missing.qcow2']}, cwd=tmp_path)
+
+    # test probe command with id substitution
+    assert packer.artifact_exists({'id': 'image.qcow2', 'files': []}, probe='test -f {id}', cwd=tmp_path)
+    assert not packer.artifact_exists({'id': 'missing.qcow2', 'files': []}, probe='test -f {id}', cwd=tmp_path)
+
+
+def test_matrix_commands():
+    """test matrix combination commands"""
+    combinations: list[dict] = packer.matrix_commands(
+        flags={'force'},
+        args={'var': {'foo': 'bar', 'baz': 'bot'}, 'var_file': ['galaxy.yml']},
+        config_dir=Path('/home'),
+        matrix=[{'name': 'east', 'var': {'foo': 'east'}, 'var_file': ['README.md']}, {'var': {'foo': 'west'}}],
+    )
+
+    # test names, combination inputs, and merged commands
+    assert [combination['name'] for combination in combinations] == ['east', '1']
+    assert combinations[0]['var'] == {'foo': 'east'}
+    assert combinations[0]['command'] == [
+        'packer',
+        'build',
+        '-machine-readable',
+        '-color=false',
+        '-force',
+        '-var',
+        "foo='east'",
+        '-var',
+        "baz='bot'",
+        f'-var-file={Path("galaxy.yml").resolve()}',
+        f'-var-file={Path("README.md").resolve()}',
+        '/home',
+    ]
+    assert "foo='west'" in combinations[1]['command']
+    assert f'-var-file={Path("README.md").resolve()}' not in combinations[1]['command']
+
+
+def test_run_matrix(tmp_path):
+    """test matrix combination execution"""
+    template: Path = tmp_path / 'template'
+    template.mkdir()
+    (template / 'foo.pkr.hcl').touch()
+    (template / 'output-null').mkdir()
+    (template / 'output-null' / 'disk.img').touch()
+    script: str = 'test -f "$0/foo.pkr.hcl" && echo "1700000000,null.this,artifact,0,id,$0"'
+    results: list[dict] = packer.run_matrix(
+        [{'name': 'pass', 'command': ['sh', '-c', script, str(template)]}, {'name': 'fail', 'command': ['sh', '-c', 'exit 1', str(template)]}],
+        work_dir=tmp_path / 'work',
+        workers=2,
+    )
+
+    # test each combination executes against its own template copy
+    assert results[0]['working_dir'] == str(tmp_path / 'work' / '0')
+    assert results[0]['builds']['null.this']['artifacts'][0]['id'] == str(tmp_path / 'work' / '0')
+    assert results[0]['profile'][0]['type'] == 'build'
+    assert not results[0]['failed']
+    assert (tmp_path / 'work' / '1' / 'foo.pkr.hcl').is_file()
+    assert not (tmp_path / 'work' / '1' / 'output-null').exists()
+    assert results[1]['failed']
+    assert results[1]['return_code'] == 1
+
+    # test fails on working directory within template directory
+    with pytest.raises(ValueError, match=f'Matrix working directory must not be within the template directory: {template}/work'):
+        packer.run_matrix([{'name': 'foo', 'command': ['true', str(template)]}], work_dir=template / 'work', workers=1)
+
+
+def test_count_sources(tmp_path):
+    """test template source selection count"""
+    (tmp_path / 'foo.pkr.hcl').write_text('source "docker" "ubuntu" {\n}\nsource "docker" "debian" {}\n  source "qemu" "ubuntu" {}\n', encoding='UTF-8')
+
+    # test all sources, and only and excepts selection
+    assert packer.count_sources(tmp_path) == 3
+    assert packer.count_sources(tmp_path, only=['docker.*']) == 2
+    assert packer.count_sources(tmp_path, only=['build.qemu.ubuntu']) == 1
+    assert packer.count_sources(tmp_path, excepts=['*.ubuntu']) == 1
+
+    # test no hcl2 sources
+    assert packer.count_sources(Path('galaxy.yml')) is None
+
+
+def test_auto_parallel_builds():
+    """test parallel builds derivation"""
+    # test limits by sources, cores, and memory
+    assert packer.auto_parallel_builds(sources=2, cores=8, available_memory=64 * 1024**3) == 2
+    assert packer.auto_parallel_builds(sources=10, cores=4, available_memory=64 * 1024**3) == 4
+    assert packer.auto_parallel_builds(sources=10, cores=8, available_memory=6 * 1024**3) == 3
+
+    # test at least one build and unknown values
+    assert packer.auto_parallel_builds(sources=0, cores=8, available_memory=0) == 1
+    assert packer.auto_parallel_builds(sources=None, cores=None, available_memory=None) == 1
+
+
+def test_sample_resources():
+    """test resource usage sampling"""
+    total, available = packer.memory_info()
+    assert total is None or total >= available
+
+    with packer.sample_resources(interval=0.01) as usage:
+        time.sleep(0.05)
+    assert usage['samples'] >= 1
+    assert usage['peak_load_average'] >= 0
+    assert usage['peak_memory_used'] >= 0
+
+
+def test_required_plugins(tmp_path):
+    """test required plugins parsing"""
+    (tmp_path / 'foo.pkr.hcl').write_text(
+        'packer {\n  required_plugins {\n    docker = {\n      version = "~> 1.0"\n      source  = "github.com/hashicorp/docker"\n    }\n'
+        '    amazon = { source = "github.com/hashicorp/amazon" }\n  }\n}\nsource "docker" "ubuntu" {}\n',
+        encoding='UTF-8',
+    )
+
+    assert packer.required_plugins(tmp_path) == {
+        'docker': {'source': 'github.com/hashicorp/docker', 'version': '~> 1.0'},
+        'amazon': {'source': 'github.com/hashicorp/amazon', 'version': ''},
+    }
+
+    # test no hcl2 templates
+    with pytest.raises(FileNotFoundError, match='No HCL2 Packer templates found'):
+        packer.required_plugins(tmp_path / 'bar')
+
+
+def test_version_satisfies():
+    """test version constraint evaluation"""
+    assert packer.version_satisfies('1.0.8', '~> 1.0')
+    assert not packer.version_satisfies('2.0.0', '~> 1.0')
+    assert packer.version_satisfies('1.2.9', '~> 1.2.3')
+    assert not packer.version_satisfies('1.3.0', '~> 1.2.3')
+    assert packer.version_satisfies('1.5.0', '>= 1.2, < 2')
+    assert not packer.version_satisfies('1.5.0', '>= 1.2, != 1.5.0')
+    assert packer.version_satisfies('1.5.0', '1.5')
+    assert packer.version_satisfies('1.5.0', '')
+    assert not packer.version_satisfies('1.5.0', '>= foo')
+
+
+def test_plugins_satisfied(tmp_path, monkeypatch):
+    """test local plugin index"""
+    monkeypatch.setattr(packer.platform, 'system', lambda: 'Linux')
+    monkeypatch.setattr(packer.platform, 'machine', lambda: 'x86_64')
+    (tmp_path / 'foo.pkr.hcl').write_text(
+        'packer {\n  required_plugins {\n    docker = {\n      version = ">= 1.0.0"\n      source = "github.com/hashicorp/docker"\n    }\n  }\n}\n',
+        encoding='UTF-8',
+    )
+    plugins: Path = tmp_path / 'plugins'
+    source_dir: Path = plugins / 'github.com' / 'hashicorp' / 'docker'
+    source_dir.mkdir(parents=True)
+
+    # test missing plugin
+    assert packer.plugins_satisfied(tmp_path, plugins) is None
+
+    # test verified plugins and highest satisfying version
+    for version in ['1.0.8', '1.1.0']:
+        binary: Path = source_dir / f'packer-plugin-docker_v{version}_x5.0_linux_amd64'
+        binary.write_bytes(version.encode())
+        binary.with_name(f'{binary.name}_SHA256SUM').write_text(packer.universal.file_digest(binary), encoding='UTF-8')
+    assert sorted(packer.installed_plugin_versions('github.com/hashicorp/docker', plugins)) == ['1.0.8', '1.1.0']
+    assert packer.plugins_satisfied(tmp_path, plugins) == {'docker': '1.1.0'}
+
+    # test checksum mismatch and other platform are ignored
+    (source_dir / 'packer-plugin-docker_v1.1.0_x5.0_linux_amd64').write_bytes(b'tampered')
+    (source_dir / 'packer-plugin-docker_v1.2.0_x5.0_darwin_arm64').write_bytes(b'1.2.0')
+    assert packer.plugins_satisfied(tmp_path, plugins) == {'docker': '1.0.8'}
+
+    # test unsatisfied constraint
+    (source_dir / 'packer-plugin-docker_v1.0.8_x5.0_linux_amd64').unlink()
+    assert packer.plugins_satisfied(tmp_path, plugins) is None
+
+
+def test_fmt_files(tmp_path):
+    """test fmt file selection"""
+    (tmp_path / 'sub').mkdir()
+    for file in ['foo.pkr.hcl', 'bar.pkrvars.hcl', 'baz.pkr.json', 'sub/qux.pkr.hcl']:
+        (tmp_path / file).touch()
+
+    assert packer.fmt_files(tmp_path) == [tmp_path / 'bar.pkrvars.hcl', tmp_path / 'foo.pkr.hcl']
+    assert packer.fmt_files(tmp_path, recursive=True) == [tmp_path / 'bar.pkrvars.hcl', tmp_path / 'foo.pkr.hcl', tmp_path / 'sub' / 'qux.pkr.hcl']
+    assert packer.fmt_files(tmp_path / 'foo.pkr.hcl') == [tmp_path / 'foo.pkr.hcl']
+
+
+def test_fmt_batches(tmp_path):
+    """test batched fmt of staged files"""
+    (tmp_path / 'sub').mkdir()
+    files: list[Path] = [tmp_path / 'foo.pkr.hcl', tmp_path / 'sub' / 'foo.pkr.hcl', tmp_path / 'bar.pkr.hcl']
+    files[0].write_text('a  =  1\n', encoding='UTF-8')
+    files[1].write_text('b  =  2\n', encoding='UTF-8')
+    files[2].write_text('c = 3\n', encoding='UTF-8')
+
+    # pseudo fmt which collapses whitespace and lists rewritten files
+    command: list[str] = ['sh', '-c', 'for f in "$1"/*; do grep -q "  " "$f" && sed -i "s/  */ /g" "$f" && echo "$f"; done; exit 0', 'sh']
+    return_code, rewritten, stdout, stderr = packer.fmt_batches(command, files, batch_size=2)
+    assert return_code == 0
+    assert rewritten == files[:2]
+    assert stdout.splitlines() == [str(file) for file in files[:2]]
+    assert not stderr
+    assert files[0].read_text(encoding='UTF-8') == 'a = 1\n'
+    assert files[1].read_text(encoding='UTF-8') == 'b = 2\n'
+
+    # test listed but unmodified files when not writing, and return code
+    command = ['sh', '-c', 'for f in "$1"/*; do echo "$f"; done; exit 3', 'sh']
+    return_code, rewritten, stdout, _ = packer.fmt_batches(command, files[2:])
+    assert return_code == 3
+    assert rewritten == files[2:]
+    assert stdout == f'{files[2]}\n'
+
+
+def test_expand_config_dirs(tmp_path):
+    """test config directory and glob expansion"""
+    for name in ['foo', 'bar']:
+        (tmp_path / name).mkdir()
+
+    assert packer.expand_config_dirs([str(tmp_path / '*'), str(tmp_path / 'foo'), 'baz']) == [tmp_path / 'bar', tmp_path / 'foo', Path('baz')]
+
+    # test glob without matches
+    with pytest.raises(FileNotFoundError, match='No Packer config directories or files match the pattern'):
+        packer.expand_config_dirs([str(tmp_path / 'qux*')])
+
+
+def test_validate_templates(tmp_path):
+    """test concurrent template validation"""
+    for name in ['foo', 'bar']:
+        (tmp_path / name).mkdir()
+
+    # pseudo validate which fails for the bar directory
+    command: list[str] = [
+        'sh',
+        '-c',
+        'case "$1" in *bar) echo "1700000000,,ui,error,Error: Unsupported argument"; exit 1;; *) echo "1700000000,,ui,say,The configuration is valid.";; esac',
+        'sh',
+    ]
+    results: dict[str, dict] = packer.validate_templates(command, [tmp_path / 'foo', tmp_path / 'bar'], workers=2)
+
+    assert list(results) == [str(tmp_path / 'foo'), str(tmp_path / 'bar')]
+    assert results[str(tmp_path / 'foo')]['passed']
+    assert results[str(tmp_path / 'foo')]['errors'] == []
+    assert results[str(tmp_path / 'foo')]['command'][-1] == str(tmp_path / 'foo')
+    assert not results[str(tmp_path / 'bar')]['passed']
+    assert results[str(tmp_path / 'bar')]['return_code'] == 1
+    assert results[str(tmp_path / 'bar')]['errors'] == ['Error: Unsupported argument']
+
+
+def test_validate_cache(tmp_path, monkeypatch):
+    """test validation fingerprint and cache expiry"""
+    monkeypatch.setenv('PACKER_PLUGIN_PATH', str(tmp_path / 'plugins'))
+    template: Path = tmp_path / 'foo.pkr.hcl'
+    template.write_text('packer {\n  required_plugins {\n    docker = {\n      source = "github.com/hashicorp/docker"\n    }\n  }\n}\n', encoding='UTF-8')
+
+    # test fingerprint sensitivity to flags, vars, and template content
+    key: str = packer.validate_fingerprint(tmp_path, {'syntax_only'})
+    assert key == packer.validate_fingerprint(tmp_path, {'syntax_only'})
+    assert key != packer.validate_fingerprint(tmp_path, {'evaluate_datasources'})
+    assert key != packer.validate_fingerprint(tmp_path, {'syntax_only'}, var={'foo': 'bar'})
+    template.write_text('packer {}\n', encoding='UTF-8')
+    assert key != packer.validate_fingerprint(tmp_path, {'syntax_only'})
+    # test legacy json template without required plugins
+    (tmp_path / 'bar.json').write_text('{}', encoding='UTF-8')
+    assert packer.validate_fingerprint(tmp_path / 'bar.json', set()) != packer.validate_fingerprint(tmp_path, set())
+
+    # test cache read and ttl expiry
+    cache_dir: Path = tmp_path / 'cache'
+    assert packer.validate_cache_read(key, cache_dir=cache_dir) is None
+    packer.validate_cache_write(key, {'stdout': 'foo'}, cache_dir=cache_dir)
+    assert packer.validate_cache_read(key, cache_dir=cache_dir) == {'stdout': 'foo'}
+    packer.validate_cache_write(key, {'stdout': 'bar'}, ttl=60, now=1000.0, cache_dir=cache_dir)
+    assert packer.validate_cache_read(key, now=1059.0, cache_dir=cache_dir) == {'stdout': 'bar'}
+    assert packer.validate_cache_read(key, now=1060.0, cache_dir=cache_dir) is None
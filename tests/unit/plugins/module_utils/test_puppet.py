@@ -1,13 +1,21 @@
 """unit test for puppet module util"""
 
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
 from pathlib import Path
 
 import pytest
+import yaml
 
-from ansible_collections.mschuchard.general.plugins.module_utils import puppet
+from ansible_collections.mschuchard.general.plugins.module_utils import puppet, universal
+from ansible_collections.mschuchard.general.tests.unit.plugins.modules import utils
 
 
-def test_puppet_cmd_errors():
+def test_puppet_cmd_errors(tmp_path):
     """test various cmd errors"""
     # test fails on unsupported action
     with pytest.raises(RuntimeError, match='Unsupported Puppet action attempted: foo'):
@@ -27,9 +35,9 @@ def test_puppet_cmd_errors():
     ):
         puppet.cmd(action='apply', args={'foo': 'bar'}, manifest=Path('/etc/group'))
 
-    # test fails on directory specified for manifest
-    with pytest.raises(FileNotFoundError, match='Puppet manifest is not a file or does not exist: /home'):
-        puppet.cmd(action='apply', manifest=Path('/home'))
+    # test fails on directory without manifests specified for manifest
+    with pytest.raises(FileNotFoundError, match=f'Puppet manifest is not a file or a directory containing manifests, or does not exist: {tmp_path}'):
+        puppet.cmd(action='apply', manifest=tmp_path)
 
     # test fails on nonexistent catalog file
     with pytest.raises(FileNotFoundError, match='Puppet catalog file does not exist or is invalid: /nonexistent.json'):
@@ -70,3 +78,234 @@ def test_puppet_cmd():
         '--waitforcert',
         '60',
     ]
+
+
+def test_puppet_run_results(tmp_path):
+    """test puppet last run summary and report parsing"""
+    # test report with ruby tagged objects
+    report: dict = puppet.load_state_file(utils.fixtures_dir() / 'last_run_report.yaml')
+    assert report['status'] == 'failed'
+    assert report['resource_statuses']['File[/tmp/motd]']['events'][0]['desired_value'] == 'file'
+
+    # test summary and slowest resources
+    shutil.copy(utils.fixtures_dir() / 'last_run_summary.yaml', tmp_path)
+    shutil.copy(utils.fixtures_dir() / 'last_run_report.yaml', tmp_path)
+    results: dict = puppet.run_results(tmp_path, slowest=2)
+    assert results['summary']['resources']['changed'] == 2
+    assert results['summary']['resources']['failed'] == 1
+    assert results['summary']['resources']['out_of_sync'] == 3
+    assert results['summary']['events'] == {'failure': 1, 'success': 2, 'total': 3}
+    assert results['summary']['changes'] == 2
+    assert results['summary']['last_run'] == 1700000002
+    assert results['summary']['timings']['config_retrieval'] == 0.8461
+    assert results['summary']['timings']['catalog_application'] == 1.2734
+    assert 'last_run' not in results['summary']['timings']
+    assert [resource['resource'] for resource in results['slowest_resources']] == ['Exec[fail]', 'File[/tmp/motd]']
+    assert results['slowest_resources'][0] == {
+        'resource': 'Exec[fail]',
+        'resource_type': 'Exec',
+        'title': 'fail',
+        'file': '/etc/puppetlabs/code/site.pp',
+        'line': 3,
+        'evaluation_time': 0.9012,
+        'changed': False,
+        'failed': True,
+        'out_of_sync': True,
+    }
+    assert 'slowest_resources' not in puppet.run_results(tmp_path)
+
+    # test manifest attribution with and without slowest resources
+    attributed: dict = puppet.run_results(tmp_path, slowest=1, manifests={'/etc/puppetlabs/code/site.pp': 'site.pp', '/tmp/web.pp': 'web.pp'})
+    assert [resource['resource'] for resource in attributed['slowest_resources']] == ['Exec[fail]']
+    assert attributed['manifests'] == [
+        {'manifest': 'site.pp', 'resources': 4, 'out_of_sync': 3, 'changed': ['Notify[hello world]', 'File[/tmp/motd]'], 'failed': ['Exec[fail]']},
+        {'manifest': 'web.pp', 'resources': 0, 'out_of_sync': 0, 'changed': [], 'failed': []},
+    ]
+    attributed = puppet.run_results(tmp_path, manifests={'/tmp/web.pp': 'web.pp'})
+    assert 'slowest_resources' not in attributed
+    assert attributed['manifests'][1] == {
+        'manifest': None,
+        'resources': 4,
+        'out_of_sync': 3,
+        'changed': ['Notify[hello world]', 'File[/tmp/motd]'],
+        'failed': ['Exec[fail]'],
+    }
+
+    # test attribution passes the statuses through in a single pass, and is complete once they are exhausted
+    attribution: list[dict] = []
+    statuses = puppet.manifest_attribution(
+        iter([('File[/a]', {'file': '/a.pp', 'changed': True}), ('Exec[b]', {'file': None})]), {'/a.pp': 'a.pp'}, attribution
+    )
+    assert next(statuses)[0] == 'File[/a]'
+    assert not attribution
+    assert [name for name, _ in statuses] == ['Exec[b]']
+    assert attribution == [
+        {'manifest': 'a.pp', 'resources': 1, 'out_of_sync': 0, 'changed': ['File[/a]'], 'failed': []},
+        {'manifest': None, 'resources': 1, 'out_of_sync': 0, 'changed': [], 'failed': []},
+    ]
+
+    # test stale summary from a previous run
+    os.utime(tmp_path / 'last_run_summary.yaml', (0, 0))
+    with pytest.raises(FileNotFoundError, match='Puppet last run summary was not written by this run'):
+        puppet.run_results(tmp_path, since=time.time())
+
+    # test invalid state file
+    (tmp_path / 'last_run_summary.yaml').write_text('- [', encoding='UTF-8')
+    with pytest.raises(ValueError, match='Puppet state file does not contain valid YAML'):
+        puppet.run_results(tmp_path)
+
+
+def test_puppet_stage_manifests(tmp_path):
+    """test puppet manifest staging into a single main manifest directory"""
+    (tmp_path / 'web').mkdir()
+    (tmp_path / 'web' / 'site.pp').write_text('notify { "web": }', encoding='UTF-8')
+    (tmp_path / 'site.pp').write_text('notify { "base": }', encoding='UTF-8')
+    (tmp_path / 'staged').mkdir()
+
+    # test staged manifests preserve order and disambiguate file names
+    staged: dict[str, str] = puppet.stage_manifests([tmp_path / 'web' / 'site.pp', tmp_path / 'site.pp'], tmp_path / 'staged')
+    assert staged == {
+        str(tmp_path / 'staged' / '0000_site.pp'): str(tmp_path / 'web' / 'site.pp'),
+        str(tmp_path / 'staged' / '0001_site.pp'): str(tmp_path / 'site.pp'),
+    }
+    assert puppet.manifest_files(tmp_path / 'staged') == [tmp_path / 'staged' / '0000_site.pp', tmp_path / 'staged' / '0001_site.pp']
+    assert (tmp_path / 'staged' / '0001_site.pp').read_text(encoding='UTF-8') == 'notify { "base": }'
+    assert puppet.cmd(action='apply', manifest=tmp_path / 'staged') == ['puppet', 'apply', str(tmp_path / 'staged')]
+
+    # test manifest directories are expanded into their manifest files
+    (tmp_path / 'web' / 'db.pp').write_text('notify { "db": }', encoding='UTF-8')
+    (tmp_path / 'dirs').mkdir()
+    staged = puppet.stage_manifests([tmp_path / 'site.pp', tmp_path / 'web'], tmp_path / 'dirs')
+    assert list(staged.values()) == [str(tmp_path / 'site.pp'), str(tmp_path / 'web' / 'db.pp'), str(tmp_path / 'web' / 'site.pp')]
+    assert [file.name for file in puppet.manifest_files(tmp_path / 'dirs')] == ['0000_site.pp', '0001_db.pp', '0002_site.pp']
+
+    # test nonexistent manifest and directory without manifests
+    (tmp_path / 'empty').mkdir()
+    for invalid in [Path('/nonexistent.pp'), tmp_path / 'empty']:
+        with pytest.raises(FileNotFoundError, match=f'Puppet manifest is not a file or a directory containing manifests, or does not exist: {invalid}'):
+            puppet.stage_manifests([tmp_path / 'site.pp', invalid], tmp_path / 'staged')
+
+
+class PureReportLoader(yaml.SafeLoader):
+    """pure python report loader for comparison with the libyaml report loader"""
+
+
+PureReportLoader.add_multi_constructor('!ruby/', puppet.construct_ruby)
+
+
+def test_puppet_stream_resource_statuses(tmp_path):
+    """test puppet report streaming with the libyaml and pure python parsers"""
+    report: dict = puppet.load_state_file(utils.fixtures_dir() / 'last_run_report.yaml')
+    for loader in (puppet.ReportLoader, PureReportLoader):
+        statuses: list[tuple[str, dict]] = list(puppet.stream_resource_statuses(utils.fixtures_dir() / 'last_run_report.yaml', loader=loader))
+        assert statuses == list(report['resource_statuses'].items())
+
+    # test report with resource statuses after the skipped sections, anchors, and many resources
+    generated: Path = tmp_path / 'last_run_report.yaml'
+    with generated.open('w', encoding='UTF-8') as file_handle:
+        file_handle.write('--- !ruby/object:Puppet::Transaction::Report\nlogs:\n')
+        file_handle.writelines(f'- level: info\n  message: &message{index} "log {index}"\n' for index in range(1000))
+        file_handle.write('metrics:\n  time: {values: [[total, Total, 1.0]]}\nresource_statuses:\n')
+        file_handle.writelines(
+            f'  File[/tmp/{index}]:\n    resource_type: &type File\n    title: !ruby/sym f{index}\n    evaluation_time: {index / 1000}\n    events: []\n    tags: [*type]\n'
+            for index in range(2000)
+        )
+        file_handle.write('status: changed\n')
+    for loader in (puppet.ReportLoader, PureReportLoader):
+        statuses = list(puppet.stream_resource_statuses(generated, loader=loader))
+        assert len(statuses) == 2000
+        assert statuses[1] == ('File[/tmp/1]', {'resource_type': 'File', 'title': 'f1', 'evaluation_time': 0.001, 'events': [], 'tags': ['File']})
+        assert [resource['resource'] for resource in puppet.slowest_resources(iter(statuses), 2)] == ['File[/tmp/1999]', 'File[/tmp/1998]']
+
+    # test aliases to anchors within skipped sections and other resources
+    (tmp_path / 'aliases.yaml').write_text(
+        '--- !ruby/object:Puppet::Transaction::Report\nhost: &h node.example.com\nlogs:\n- message: &m applied\n  source: &s Puppet\n'
+        'resource_statuses:\n  File[/tmp/a]:\n    title: *h\n    resource_type: &t File\n    tags: [*s]\n'
+        '  File[/tmp/b]:\n    title: *m\n    resource_type: *t\nstatus: changed\n',
+        encoding='UTF-8',
+    )
+    report = puppet.load_state_file(tmp_path / 'aliases.yaml')
+    for loader in (puppet.ReportLoader, PureReportLoader):
+        statuses = list(puppet.stream_resource_statuses(tmp_path / 'aliases.yaml', loader=loader))
+        assert statuses == list(report['resource_statuses'].items())
+        assert statuses[1] == ('File[/tmp/b]', {'title': 'applied', 'resource_type': 'File'})
+
+    # test report without resource statuses and invalid report
+    (tmp_path / 'empty.yaml').write_text('--- !ruby/object:Puppet::Transaction::Report\nstatus: unchanged\n', encoding='UTF-8')
+    assert not list(puppet.stream_resource_statuses(tmp_path / 'empty.yaml'))
+    (tmp_path / 'list.yaml').write_text('- foo\n', encoding='UTF-8')
+    with pytest.raises(ValueError, match='Puppet report does not contain a YAML mapping'):
+        list(puppet.stream_resource_statuses(tmp_path / 'list.yaml'))
+    (tmp_path / 'invalid.yaml').write_text('resource_statuses:\n  File[/tmp]: {\n', encoding='UTF-8')
+    with pytest.raises(ValueError, match='Puppet report does not contain valid YAML'):
+        list(puppet.stream_resource_statuses(tmp_path / 'invalid.yaml'))
+    (tmp_path / 'undefined.yaml').write_text('resource_statuses:\n  File[/tmp]: {title: *h}\n', encoding='UTF-8')
+    with pytest.raises(ValueError, match='Puppet report'):
+        list(puppet.stream_resource_statuses(tmp_path / 'undefined.yaml'))
+
+
+def test_puppet_run_lock(tmp_path, monkeypatch):
+    """test puppet agent catalog run lock detection and waiting"""
+    lockfile: Path = tmp_path / 'agent_catalog_run.lock'
+
+    # test unlocked and stale lock
+    assert puppet.run_lock_pid(lockfile) is None
+    assert puppet.wait_run_lock(lockfile, timeout=0) < 1
+    with subprocess.Popen(['sleep', '0']) as process:
+        process.wait()
+        lockfile.write_text(str(process.pid), encoding='UTF-8')
+    assert puppet.run_lock_pid(lockfile) is None
+
+    # test lock held until timeout
+    with subprocess.Popen(['sleep', '30']) as process:
+        lockfile.write_text(str(process.pid), encoding='UTF-8')
+        assert puppet.run_lock_pid(lockfile) == process.pid
+        with pytest.raises(TimeoutError, match=f'Run of Puppet configuration client already in progress with pid {process.pid} after waiting 0.3 seconds'):
+            puppet.wait_run_lock(lockfile, timeout=0.3, interval=0.1)
+        process.kill()
+
+    # test lock released during the wait
+    with subprocess.Popen(['sleep', '30']) as process:
+        lockfile.write_text(str(process.pid), encoding='UTF-8')
+        # the run exits and is reaped
+        threading.Timer(0.5, lambda: process.kill() or process.wait()).start()
+        waited: float = puppet.wait_run_lock(lockfile, timeout=10, interval=0.1)
+        assert 0.3 < waited < 5
+
+    # test lock held by a process of another user
+    lockfile.write_text('1', encoding='UTF-8')
+
+    def kill(pid: int, signal: int) -> None:
+        raise PermissionError(1, 'Operation not permitted')
+
+    monkeypatch.setattr(puppet.os, 'kill', kill)
+    assert puppet.run_lock_pid(lockfile) == 1
+
+
+def test_puppet_validate_catalog(tmp_path):
+    """test puppet catalog pre-check and its cache"""
+    catalog: Path = tmp_path / 'catalog.json'
+    catalog.write_text(
+        json.dumps(
+            {'tags': ['settings'], 'name': 'node', 'version': 1700000000, 'resources': [{'type': 'Notify', 'title': 'edges'}], 'edges': [], 'classes': []}
+        ),
+        encoding='UTF-8',
+    )
+
+    # test valid catalog is cached by content digest
+    assert puppet.validate_catalog(catalog, cache_dir=tmp_path / 'cache')
+    assert [file.name for file in (tmp_path / 'cache' / 'puppet_catalog').iterdir()] == [f'{universal.file_digest(catalog)}.json']
+    assert puppet.validate_catalog(catalog, cache_dir=tmp_path / 'cache')
+
+    # test catalog missing required keys and invalid catalog are not cached
+    catalog.write_text('{"version": 1, "resources": [{"title": "edges"}]}', encoding='UTF-8')
+    with pytest.raises(ValueError, match='Puppet catalog is missing required top-level keys edges: '):
+        puppet.validate_catalog(catalog, cache_dir=tmp_path / 'cache')
+    catalog.write_text('{"version": 1, "resources": [], "edges": [}', encoding='UTF-8')
+    with pytest.raises(ValueError, match='Puppet catalog is not valid JSON: .*Expecting value'):
+        puppet.validate_catalog(catalog, cache_dir=tmp_path / 'cache')
+    assert len(list((tmp_path / 'cache' / 'puppet_catalog').iterdir())) == 1
+
+    # test catalog which is not a json object is validated as yaml
+    catalog.write_text('version: 1\nresources: []\n', encoding='UTF-8')
+    assert puppet.validate_catalog(catalog, cache_dir=tmp_path / 'cache')
@@ -1,5 +1,6 @@
 """unit test for terraform module util"""
 
+import sys
 from pathlib import Path
 
 import pytest
@@ -69,6 +70,15 @@ def test_terraform_cmd():
         )
     ) == {'terraform', '-chdir=/home', 'init', '-no-color', '-input=false', '-force-copy', '-migrate-state', '-plugin-dir=/tmp', '-plugin-dir=/home'}
 
+    # test show json with plan file
+    assert terraform.cmd(action='show', flags={'json'}, target_dir=utils.fixtures_dir() / 'plan.tfplan') == [
+        'terraform',
+        'show',
+        '-no-color',
+        '-json',
+        str(utils.fixtures_dir() / 'plan.tfplan'),
+    ]
+
     # test bare apply with plan file
     assert terraform.cmd(action='apply', target_dir=Path(f'{str(utils.fixtures_dir())}/config.tf')) == [
         'terraform',
@@ -123,3 +133,107 @@ def test_ansible_to_terraform():
         'var': ['-var', "var1='value1'", '-var', "var2='value2'", '-var', "var3='value3'"],
         'var_file': ['-var-file=galaxy.yml', '-var-file=galaxy.yml', '-var-file=galaxy.yml'],
     }
+
+
+def test_resource_change_matches():
+    """test resource change filter matching"""
+    resource_change: dict = {'address': 'module.net.aws_instance.this', 'type': 'aws_instance', 'change': {'actions': ['delete', 'create']}}
+
+    # test empty filters match everything
+    assert terraform.resource_change_matches(resource_change)
+
+    # test address glob, type, and action filters
+    assert terraform.resource_change_matches(resource_change, addresses=['module.net.*'], types=['aws_instance'], actions=['create'])
+    assert not terraform.resource_change_matches(resource_change, addresses=['module.db.*'])
+    assert not terraform.resource_change_matches(resource_change, types=['local_file'])
+    assert not terraform.resource_change_matches(resource_change, actions=['update'])
+
+
+def test_stream_show_json(tmp_path):
+    """test terraform show json streaming and early termination"""
+
+    # stand-in for terraform show writing a large remainder after the array
+    def show(document: str) -> list[str]:
+        return [sys.executable, '-c', f'import json, sys; sys.stdout.write(json.dumps({document}))']
+
+    # test matching elements of an array followed by a large remainder
+    command: list[str] = show("{'resource_changes': [{'address': 'a'}, {'address': 'b'}], 'trailer': 'x' * 2000000}")
+    assert terraform.stream_show_json(command, tmp_path, 'resource_changes', match=lambda change: change['address'] == 'b') == (0, [{'address': 'b'}], '')
+
+    # test empty array followed by a large remainder terminates terraform instead of blocking
+    command = show("{'resource_changes': [], 'trailer': 'x' * 2000000}")
+    assert terraform.stream_show_json(command, tmp_path, 'resource_changes') == (0, [], '')
+
+    # test missing array and terraform error
+    assert terraform.stream_show_json(show("{'format_version': '1.2'}"), tmp_path, 'resource_changes') == (0, [], '')
+    return_code, matches, stderr = terraform.stream_show_json([sys.executable, '-c', 'import sys; sys.exit("Error: no plan")'], tmp_path, 'resource_changes')
+    assert (return_code, matches, stderr) == (1, [], 'Error: no plan\n')
+
+
+def test_drift_changes():
+    """test resource drift conversion to attribute-level differences"""
+    # test updated attributes only
+    assert terraform.drift_changes(
+        {'address': 'local_file.this', 'change': {'actions': ['update'], 'before': {'content': 'foo', 'id': '1'}, 'after': {'content': 'bar', 'id': '1'}}}
+    ) == {'address': 'local_file.this', 'actions': ['update'], 'attributes': {'content': {'before': 'foo', 'after': 'bar'}}}
+
+    # test deleted object
+    assert terraform.drift_changes({'address': 'local_file.this', 'change': {'actions': ['delete'], 'before': {'id': '1'}, 'after': None}}) == {
+        'address': 'local_file.this',
+        'actions': ['delete'],
+        'attributes': {'id': {'before': '1', 'after': None}},
+    }
+
+
+def test_drift_index():
+    """test drift index staleness and updates"""
+    index: dict[str, dict] = {
+        'fresh': {'checked': 100, 'drifted': False},
+        'old': {'checked': 0, 'drifted': False},
+        'drifted': {'checked': 100, 'drifted': True},
+    }
+
+    # test stale, drifted, and unknown addresses require refresh
+    assert terraform.stale_addresses(index, ['fresh', 'old', 'drifted', 'new'], max_age=50, now=120) == ['old', 'drifted', 'new']
+
+    # test index update
+    assert terraform.update_drift_index(index, ['old', 'new'], ['new'], now=200) == {
+        'fresh': {'checked': 100, 'drifted': False},
+        'old': {'checked': 200, 'drifted': False},
+        'drifted': {'checked': 100, 'drifted': True},
+        'new': {'checked': 200, 'drifted': True},
+    }
+
+
+def test_config_lock(tmp_path):
+    """test local config directory lock"""
+    # test lock is acquired without waiting, and is reentrant across sequential callers
+    with terraform.config_lock(Path('/home'), lock_dir=tmp_path) as queue_wait:
+        assert 0 <= queue_wait < 1
+    with terraform.config_lock(Path('/home'), lock_dir=tmp_path) as queue_wait:
+        assert 0 <= queue_wait < 1
+    assert len(list(tmp_path.glob('*.lock'))) == 1
+
+
+def test_retry_state_lock():
+    """test state lock retries"""
+    results: list[tuple[int, str, str]] = [(1, '', f'{terraform.LOCK_ERROR}: held'), (1, '', f'{terraform.LOCK_ERROR}: held'), (0, 'done', '')]
+
+    def run_command(command: list[str], cwd: Path, environ_update: dict) -> tuple[int, str, str]:
+        """stand-in for AnsibleModule.run_command"""
+        return results.pop(0)
+
+    # test retries until success
+    return_code, stdout, _, waited = terraform.retry_state_lock(run_command, ['terraform'], Path.cwd(), retries=3, backoff=0.01)
+    assert (return_code, stdout) == (0, 'done')
+    assert 0 <= waited <= 0.03
+
+    # test no retry for unrelated failure
+    results.extend([(1, '', 'Error: other'), (0, 'done', '')])
+    assert terraform.retry_state_lock(run_command, ['terraform'], Path.cwd(), retries=3)[0:3] == (1, '', 'Error: other')
+
+    # test retries exhausted
+    results.clear()
+    results.extend([(1, '', terraform.LOCK_ERROR), (1, '', terraform.LOCK_ERROR)])
+    assert terraform.retry_state_lock(run_command, ['terraform'], Path.cwd(), retries=1, backoff=0.01)[0] == 1
+    assert not results
@@ -1,5 +1,7 @@
 """unit test for universal module util"""
 
+import io
+import json
 from pathlib import Path
 
 import pytest
@@ -83,3 +85,144 @@ def test_params_to_flags_args():
     }
 
     assert universal.params_to_flags_args(params, spec) == ({'baz'}, {'foo': 'bar', 'path': str(Path('/tmp'))})
+
+
+def test_file_digest():
+    """test streaming file digest"""
+    # test digest is independent of chunk size
+    assert universal.file_digest(Path('galaxy.yml')) == universal.file_digest(Path('galaxy.yml'), chunk_size=7)
+
+    # test fails on nonexistent file
+    with pytest.raises(FileNotFoundError):
+        universal.file_digest(Path('/1234567890'))
+
+
+def test_cache(tmp_path):
+    """test cache key, read, and write"""
+    # test cache key is deterministic and order independent for dicts
+    assert universal.cache_key('foo', {'a': 1, 'b': 2}) == universal.cache_key('foo', {'b': 2, 'a': 1})
+    assert universal.cache_key('foo') != universal.cache_key('bar')
+
+    # test cache miss
+    assert universal.cache_read('test', 'foo', cache_dir=tmp_path) is None
+
+    # test cache hit after write
+    universal.cache_write('test', 'foo', {'bar': ['baz']}, cache_dir=tmp_path)
+    assert universal.cache_read('test', 'foo', cache_dir=tmp_path) == {'bar': ['baz']}
+
+    # test corrupted cache entry is a miss
+    (tmp_path / 'test' / 'foo.json').write_text('{', encoding='UTF-8')
+    assert universal.cache_read('test', 'foo', cache_dir=tmp_path) is None
+
+
+def test_json_stream_array():
+    """test incremental json top-level array extraction"""
+    document: str = json.dumps(
+        {
+            'decoy': '"resource_changes":[1]',
+            'planned_values': {'resource_changes': [{'address': 'nested'}]},
+            'resource_changes': [{'address': 'local_file.this', 'escaped': 'a\\"b]'}, {'address': 'local_file.that'}],
+            'after': [1, 2],
+        }
+    )
+
+    # test extraction is accurate regardless of chunk size
+    for chunk_size in [1, 3, 64, 65536]:
+        assert list(universal.json_stream_array(io.StringIO(document), 'resource_changes', chunk_size=chunk_size)) == [
+            {'address': 'local_file.this', 'escaped': 'a\\"b]'},
+            {'address': 'local_file.that'},
+        ]
+
+    # test missing key and empty array, and whether the array was found
+    assert not list(universal.json_stream_array(io.StringIO(document), 'foo'))
+    assert not list(universal.json_stream_array(io.StringIO('{"foo": []}'), 'foo'))
+    elements = universal.json_stream_array(io.StringIO('{"foo": [], "bar": 1}'), 'foo')
+    with pytest.raises(StopIteration) as stop:
+        next(elements)
+    assert stop.value.value is True
+    elements = universal.json_stream_array(io.StringIO(document), 'foo')
+    with pytest.raises(StopIteration) as stop:
+        next(elements)
+    assert stop.value.value is False
+
+    # test fails on truncated array
+    with pytest.raises(ValueError, match='Unterminated array in JSON stream for key: foo'):
+        list(universal.json_stream_array(io.StringIO('{"foo": [{"bar": 1}'), 'foo'))
+
+
+def test_atomic_write(tmp_path):
+    """test atomic file write"""
+    universal.atomic_write(tmp_path / 'foo', 'bar', mode=0o640)
+    assert (tmp_path / 'foo').read_text(encoding='UTF-8') == 'bar'
+    assert (tmp_path / 'foo').stat().st_mode & 0o777 == 0o640
+    assert list(tmp_path.iterdir()) == [tmp_path / 'foo']
+
+
+def test_json_stream_keys():
+    """test incremental json top-level object key scanning"""
+    document: str = json.dumps(
+        {
+            'version': 1700000000,
+            'decoy': '"edges":[1],{"nested": 1}',
+            'resources': [{'type': 'File', 'title': 'a\\"b]}', 'parameters': {'edges': []}}],
+            'esc\\"aped': None,
+            'edges': [],
+            'metrics': {'ratio': 1.25e-3, 'nested': {'edges': [-0.5, 2e10]}, 'empty': {}},
+        },
+        indent=2,
+    )
+
+    # test keys are accurate regardless of chunk size
+    for chunk_size in [1, 3, 64, 65536]:
+        assert list(universal.json_stream_keys(io.StringIO(document), chunk_size=chunk_size)) == [
+            'version',
+            'decoy',
+            'resources',
+            'esc\\"aped',
+            'edges',
+            'metrics',
+        ]
+    assert not list(universal.json_stream_keys(io.StringIO(' {} \n')))
+
+    # test fails on documents which are not objects, or are invalid, unterminated, or have trailing content
+    for invalid, message in [
+        ('[{"foo": 1}]', 'JSON stream does not contain an object'),
+        ('"foo"', 'JSON stream does not contain an object'),
+        ('', 'JSON stream does not contain an object'),
+        ('{foo: 1}', 'Expected one of " but found f in JSON stream'),
+        ('{"foo": [1, 2}', 'Expected one of , ] but found } in JSON stream'),
+        ('{"foo": [1, tru]}', 'Expecting value'),
+        ('{"foo": {"bar": 1 "baz": 2}}', 'Expected one of , } but found " in JSON stream'),
+        ('{"foo": {"bar": 1.}}', 'Expected one of , } but found . in JSON stream'),
+        ('{"foo": [{"bar": 1}]', 'Unterminated object in JSON stream'),
+        ('{"foo": 12', 'Unterminated object in JSON stream'),
+        ('{"foo": "bar', 'Unterminated string'),
+        ('{"foo": 1} {}', 'Unexpected content after object in JSON stream'),
+    ]:
+        with pytest.raises(ValueError, match=message):
+            list(universal.json_stream_keys(io.StringIO(invalid), chunk_size=4))
+
+
+class CountingStringIO(io.StringIO):
+    """string stream which counts its reads"""
+
+    reads: int = 0
+
+    def read(self, size: int | None = -1) -> str:
+        self.reads += 1
+        return super().read(size)
+
+
+def test_json_stream_keys_reads():
+    """test incremental json scanning reads large values in growing chunks and fails at the first invalid chunk"""
+    # test large value is re-decoded logarithmically many times
+    stream = CountingStringIO(json.dumps({'large': 'x' * 1000000, 'edges': []}))
+    assert list(universal.json_stream_keys(stream, chunk_size=64)) == ['large', 'edges']
+    assert stream.reads < 40
+
+    # test invalid content fails without reading the remaining stream
+    for invalid in ['{"foo": {"bar": x, "baz": "', '{"foo": [1, 2 3, "']:
+        stream = CountingStringIO(invalid + 'x' * 1000000 + '"}}')
+        with pytest.raises(ValueError):
+            list(universal.json_stream_keys(stream, chunk_size=64))
+        assert stream.reads == 1
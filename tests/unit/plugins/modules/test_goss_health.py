@@ -0,0 +1,63 @@
+"""unit test for goss health module"""
+
+import http.server
+import json
+import threading
+
+import pytest
+from ansible_collections.mschuchard.general.plugins.modules import goss_health
+from ansible_collections.mschuchard.general.tests.unit.plugins.modules import utils
+
+
+class GossStandIn(http.server.BaseHTTPRequestHandler):
+    """stand-in goss serve endpoint with a passing json report"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        """respond with a passing json report"""
+        body: bytes = json.dumps({'results': [], 'summary': {'test-count': 0, 'failed-count': 0, 'total-duration': 1000000}}).encode('UTF-8')
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        """silence request logging"""
+
+
+def test_goss_health_endpoints(capfd):
+    """test goss health with multiple endpoints"""
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), GossStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        utils.set_module_args({'ports': [server.server_address[1]], 'endpoints': ['/healthz', '/check']})
+        with pytest.raises(SystemExit, match='0'):
+            goss_health.main()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    stdout, stderr = capfd.readouterr()
+    assert not stderr
+
+    info = json.loads(stdout)
+    assert not info['changed']
+    assert info['healthy']
+    assert [result['endpoint'] for result in info['results']] == ['/healthz', '/check']
+    assert info['results'][0]['summary']['duration'] == 0.001
+
+
+def test_goss_health_unreachable(capfd):
+    """test goss health with an unreachable server"""
+    utils.set_module_args({'ports': [1], 'timeout': 1})
+    with pytest.raises(SystemExit, match='1'):
+        goss_health.main()
+
+    stdout, stderr = capfd.readouterr()
+    assert not stderr
+
+    info = json.loads(stdout)
+    assert not info['healthy']
+    assert info['msg'] == 'GoSS health endpoints are unreachable or unhealthy: http://127.0.0.1:1/healthz'
+    assert info['results'][0]['status'] is None
@@ -4,6 +4,7 @@ import json
 
 import pytest
 
+from ansible_collections.mschuchard.general.plugins.module_utils import universal
 from ansible_collections.mschuchard.general.plugins.modules import goss_render
 from ansible_collections.mschuchard.general.tests.unit.plugins.modules import utils
 
@@ -59,3 +60,20 @@ def test_goss_render_vars_inline(capfd):
     assert '{"my_service": "httpd", "my_package": "apache"}' in info['command']
     assert 'size: 4096' in info['stdout']
     assert f'{utils.fixtures_dir()}/goss.yaml' in info['command']
+
+
+def test_goss_render_cache_dest(capfd, monkeypatch, tmp_path):
+    """test goss render with cache and dest"""
+    monkeypatch.setattr(universal, 'CACHE_DIR', tmp_path / 'cache')
+    for changed, cached in [(True, False), (False, True)]:
+        utils.set_module_args({'gossfile': f'{utils.fixtures_dir()}/goss.yaml', 'cache': True, 'dest': str(tmp_path / 'rendered.yaml')})
+        with pytest.raises(SystemExit, match='0'):
+            goss_render.main()
+
+        stdout, stderr = capfd.readouterr()
+        assert not stderr
+
+        info = json.loads(stdout)
+        assert info['changed'] == changed
+        assert info['cached'] == cached
+        assert (tmp_path / 'rendered.yaml').read_text(encoding='UTF-8') == info['stdout']
@@ -82,3 +82,43 @@ def test_goss_serve_package_vars_inline(capfd):
     assert '--vars-inline' in info['cmd']
     assert '{"my_service": "httpd", "my_package": "apache"}' in info['cmd']
     assert 'file error: open ./goss.yaml: no such file or directory' in info['stderr']
+
+
+def test_goss_serve_state_stopped(capfd, tmp_path):
+    """test goss serve with stopped state and no running server"""
+    utils.set_module_args({'gossfile': f'{utils.fixtures_dir()}/goss.yaml', 'port': 8765, 'pid_file': str(tmp_path / 'serve.pid'), 'state': 'stopped'})
+    with pytest.raises(SystemExit, match='0'):
+        goss_serve.main()
+
+    stdout, stderr = capfd.readouterr()
+    assert not stderr
+
+    info = json.loads(stdout)
+    assert not info['changed']
+    assert info['pid'] is None
+    assert info['url'] == 'http://127.0.0.1:8765/healthz'
+    assert 'serve' in info['command']
+
+
+def test_goss_serve_state_check_mode(capfd, tmp_path):
+    """test goss serve with started state in check mode and a large inline vars payload"""
+    pid_file = tmp_path / 'serve.pid'
+    utils.set_module_args(
+        {
+            'gossfile': f'{utils.fixtures_dir()}/goss.yaml',
+            'pid_file': str(pid_file),
+            'state': 'started',
+            'vars_inline': {'packages': ['package'] * 32768},
+            '_ansible_check_mode': True,
+        }
+    )
+    with pytest.raises(SystemExit, match='0'):
+        goss_serve.main()
+
+    stdout, stderr = capfd.readouterr()
+    assert not stderr
+
+    info = json.loads(stdout)
+    assert info['changed']
+    assert info['command'][1:3] == ['--vars', str(pid_file.with_suffix('.vars.json'))]
+    assert not pid_file.with_suffix('.vars.json').exists()
@@ -83,3 +83,51 @@ def test_goss_validate_package_vars_inline(capfd):
     assert '--vars-inline' in info['cmd']
     assert '{"my_service": "httpd", "my_package": "apache"}' in info['cmd']
     assert 'File: /etc: size:' in info['stdout']
+
+
+def test_goss_validate_structured(capfd):
+    """test goss validate with structured results"""
+    utils.set_module_args({'structured': True, 'slowest': 1, 'gossfile': f'{utils.fixtures_dir()}/goss.yaml'})
+    with pytest.raises(SystemExit, match='1'):
+        goss_validate.main()
+
+    stdout, stderr = capfd.readouterr()
+    assert not stderr
+
+    info = json.loads(stdout)
+    assert 'json' in info['cmd']
+    assert info['summary']['test_count'] == 6
+    assert info['summary']['failed_count'] == 1
+    assert len(info['slowest']) == 1
+    assert any(not result['success'] for result in info['results'])
+
+
+def test_goss_validate_gossfiles(capfd):
+    """test goss validate with gossfiles"""
+    utils.set_module_args({'gossfiles': [f'{utils.fixtures_dir()}/goss.yaml'], 'cpu_budget': 2})
+    with pytest.raises(SystemExit, match='1'):
+        goss_validate.main()
+
+    stdout, stderr = capfd.readouterr()
+    assert not stderr
+
+    info = json.loads(stdout)
+    assert info['summary']['failed_count'] == 1
+    assert info['gossfiles'][f'{utils.fixtures_dir()}/goss.yaml']['return_code'] == 1
+    assert '--max-concurrent' not in info['command'][0]
+
+
+def test_goss_validate_retries(capfd):
+    """test goss validate with retries of failed checks"""
+    utils.set_module_args({'retries': 2, 'retry_backoff': 0.1, 'gossfile': f'{utils.fixtures_dir()}/goss.yaml'})
+    with pytest.raises(SystemExit, match='1'):
+        goss_validate.main()
+
+    stdout, stderr = capfd.readouterr()
+    assert not stderr
+
+    info = json.loads(stdout)
+    assert len(info['attempts']) == 3
+    assert info['attempts'][0]['checks'] == 6
+    assert info['attempts'][1]['checks'] == 6
+    assert info['summary']['failed_count'] == 1
@@ -4,6 +4,7 @@ import json
 
 import pytest
 
+from ansible_collections.mschuchard.general.plugins.module_utils import universal
 from ansible_collections.mschuchard.general.plugins.modules import packer_build
 from ansible_collections.mschuchard.general.tests.unit.plugins.modules import utils
 
@@ -78,3 +79,62 @@ def test_packer_build_var_varfile(capfd):
     assert f'-var-file={utils.fixtures_dir()}/foo.pkrvars.hcl' in info['cmd']
     assert f'-var-file={utils.fixtures_dir()}/foo.pkrvars.hcl' in info['cmd']
     assert 'ui,error,Error: Could not find any config file in' in info['stdout']
+
+
+def test_packer_build_cache(capfd, monkeypatch, tmp_path):
+    """test packer build with cache"""
+    monkeypatch.setattr(universal, 'CACHE_DIR', tmp_path / 'cache')
+    utils.set_module_args({'config_dir': '/tmp', 'cache': True, 'cache_probe': 'docker image inspect {id}'})
+    with pytest.raises(SystemExit, match='1'):
+        packer_build.main()
+
+    stdout, stderr = capfd.readouterr()
+    assert not stderr
+
+    info = json.loads(stdout)
+    assert '/tmp' == info['cmd'][-1]
+    assert any('Error: Could not find any config file in /tmp' in error for error in info['errors'])
+
+
+def test_packer_build_matrix(capfd):
+    """test packer build with matrix"""
+    utils.set_module_args(
+        {'config_dir': str(utils.fixtures_dir()), 'matrix': [{'name': 'east', 'var': {'region': 'us-east-1'}}, {'var': {'region': 'us-west-2'}}]}
+    )
+    with pytest.raises(SystemExit, match='1'):
+        packer_build.main()
+
+    stdout, stderr = capfd.readouterr()
+    assert not stderr
+
+    info = json.loads(stdout)
+    assert info['msg'] == 'Packer build failed for matrix combinations: east, 1'
+    assert "region='us-east-1'" in info['matrix'][0]['command']
+    assert "region='us-west-2'" in info['matrix'][1]['command']
+
+
+def test_packer_build_parallel_auto(capfd):
+    """test packer build with auto parallel_builds"""
+    utils.set_module_args({'config_dir': str(utils.fixtures_dir()), 'parallel_builds': 'auto'})
+    with pytest.raises(SystemExit, match='1'):
+        packer_build.main()
+
+    stdout, stderr = capfd.readouterr()
+    assert not stderr
+
+    info = json.loads(stdout)
+    assert '-parallel-builds=1' in info['cmd']
+
+
+def test_packer_build_profile(capfd, tmp_path):
+    """test packer build with profile file"""
+    utils.set_module_args({'config_dir': str(utils.fixtures_dir()), 'profile_file': str(tmp_path / 'profile.json')})
+    with pytest.raises(SystemExit, match='1'):
+        packer_build.main()
+
+    stdout, stderr = capfd.readouterr()
+    assert not stderr
+
+    info = json.loads(stdout)
+    assert isinstance(info['profile'], list)
+    assert json.loads((tmp_path / 'profile.json').read_text(encoding='UTF-8'))['profile'] == info['profile']
@@ -4,6 +4,7 @@ import json
 
 import pytest
 
+from ansible_collections.mschuchard.general.plugins.module_utils import universal
 from ansible_collections.mschuchard.general.plugins.modules import packer_fmt
 from ansible_collections.mschuchard.general.tests.unit.plugins.modules import utils
 
@@ -54,3 +55,18 @@ def test_packer_fmt_recursive_check(capfd):
     assert '-check' in info['command']
     assert '-recursive' in info['command']
     assert not info['stdout']
+
+
+def test_packer_fmt_incremental(capfd, monkeypatch, tmp_path):
+    """test packer fmt incremental"""
+    monkeypatch.setattr(universal, 'CACHE_DIR', tmp_path / 'cache')
+    utils.set_module_args({'incremental': True, 'write': False, 'config_dir': str(utils.fixtures_dir())})
+    with pytest.raises(SystemExit, match='0'):
+        packer_fmt.main()
+
+    stdout, stderr = capfd.readouterr()
+    assert not stderr
+
+    info = json.loads(stdout)
+    assert not info['changed']
+    assert info['files'] == []
@@ -4,6 +4,7 @@ import json
 
 import pytest
 
+from ansible_collections.mschuchard.general.plugins.module_utils import universal
 from ansible_collections.mschuchard.general.plugins.modules import packer_validate
 from ansible_collections.mschuchard.general.tests.unit.plugins.modules import utils
 
@@ -78,3 +79,33 @@ def test_packer_validate_var_varfile(capfd):
     assert f'-var-file={utils.fixtures_dir()}/foo.pkrvars.hcl' in info['cmd']
     assert 'ui,error,Warning: Undefined variable' in info['stdout']
     assert str(utils.fixtures_dir()) == info['cmd'][-1]
+
+
+def test_packer_validate_config_dirs(capfd):
+    """test packer validate with config dirs"""
+    utils.set_module_args({'config_dirs': [str(utils.fixtures_dir()), f'{utils.fixtures_dir()}/*.pkr.hcl'], 'syntax_only': True, 'workers': 2})
+    with pytest.raises(SystemExit, match='0'):
+        packer_validate.main()
+
+    stdout, stderr = capfd.readouterr()
+    assert not stderr
+
+    info = json.loads(stdout)
+    assert str(utils.fixtures_dir()) in info['results']
+    assert all(result['passed'] for result in info['results'].values())
+    assert '-syntax-only' in info['command']
+
+
+def test_packer_validate_cache(capfd, monkeypatch, tmp_path):
+    """test packer validate with cache"""
+    monkeypatch.setattr(universal, 'CACHE_DIR', tmp_path / 'cache')
+    for cached in [False, True]:
+        utils.set_module_args({'config_dir': str(utils.fixtures_dir()), 'syntax_only': True, 'cache': True})
+        with pytest.raises(SystemExit, match='0'):
+            packer_validate.main()
+
+        stdout, stderr = capfd.readouterr()
+        assert not stderr
+
+        info = json.loads(stdout)
+        assert info['cached'] == cached
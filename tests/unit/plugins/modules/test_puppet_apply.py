@@ -115,3 +115,31 @@ def test_puppet_apply_loadclasses_write_catalog(capfd):
     assert '-L' in info['command']
     assert '--write-catalog-summary' in info['command']
     assert f'{utils.fixtures_dir()}/manifest.pp' == info['command'][-1]
+
+
+def test_puppet_apply_manifests(capfd, tmp_path):
+    """test puppet apply with a path containing a comma, and with multiple manifests including a directory"""
+    (tmp_path / 'a,b.pp').write_text('notify { "a": }', encoding='UTF-8')
+    (tmp_path / 'roles').mkdir()
+    (tmp_path / 'roles' / 'web.pp').write_text('notify { "web": }', encoding='UTF-8')
+
+    # test single path is not split on commas
+    utils.set_module_args({'manifest': str(tmp_path / 'a,b.pp'), '_ansible_check_mode': True})
+    with pytest.raises(SystemExit, match='0'):
+        puppet_apply.main()
+
+    stdout, stderr = capfd.readouterr()
+    assert not stderr
+    assert json.loads(stdout)['command'] == ['puppet', 'apply', str(tmp_path / 'a,b.pp')]
+
+    # test multiple manifests are staged into one directory
+    utils.set_module_args({'manifest': [str(tmp_path / 'a,b.pp'), str(tmp_path / 'roles')], '_ansible_check_mode': True})
+    with pytest.raises(SystemExit, match='0'):
+        puppet_apply.main()
+
+    stdout, stderr = capfd.readouterr()
+    assert not stderr
+
+    info = json.loads(stdout)
+    assert info['command'][:2] == ['puppet', 'apply']
+    assert info['command'][-1].endswith('manifests')
@@ -4,6 +4,7 @@ import json
 
 import pytest
 
+from ansible_collections.mschuchard.general.plugins.module_utils import universal
 from ansible_collections.mschuchard.general.plugins.modules import terraform_plan
 from ansible_collections.mschuchard.general.tests.unit.plugins.modules import utils
 
@@ -83,3 +84,38 @@ def test_terraform_plan_multiple_args(capfd):
     assert f'-var-file={utils.fixtures_dir()}/foo.tfvars' in info['command']
     assert f'-var-file={utils.fixtures_dir()}/foo.tfvars' in info['command']
     assert 'No changes.' in info['stdout']
+
+
+def test_terraform_plan_drift(capfd, monkeypatch, tmp_path):
+    """test terraform plan with drift detection"""
+    monkeypatch.setattr(universal, 'CACHE_DIR', tmp_path / 'cache')
+    utils.set_module_args({'config_dir': str(utils.fixtures_dir()), 'drift': True})
+    with pytest.raises(SystemExit, match='0'):
+        terraform_plan.main()
+
+    stdout, stderr = capfd.readouterr()
+    assert not stderr
+
+    info = json.loads(stdout)
+    assert not info['changed']
+    assert '-refresh-only' in info['command']
+    assert any(arg.startswith('-out=') for arg in info['command'])
+    assert info['drift'] == []
+
+
+def test_terraform_plan_drift_target(capfd, monkeypatch, tmp_path):
+    """test terraform plan with drift detection restricted to user targets"""
+    monkeypatch.setattr(universal, 'CACHE_DIR', tmp_path / 'cache')
+    utils.set_module_args(
+        {'config_dir': str(utils.fixtures_dir()), 'drift': True, 'drift_max_age': 60, 'target': ['local_file.foo'], '_ansible_check_mode': True}
+    )
+    with pytest.raises(SystemExit, match='0'):
+        terraform_plan.main()
+
+    stdout, stderr = capfd.readouterr()
+    assert not stderr
+
+    info = json.loads(stdout)
+    assert not info['changed']
+    assert 'drift_targets' not in info
+    assert [arg for arg in info['command'] if arg.startswith('-target')] == ['-target=local_file.foo']
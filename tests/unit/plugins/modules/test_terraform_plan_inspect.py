@@ -0,0 +1,56 @@
+"""unit test for terraform plan inspect module"""
+
+import json
+
+import pytest
+from ansible_collections.mschuchard.general.plugins.modules import (
+    terraform_plan_inspect,
+)
+from ansible_collections.mschuchard.general.tests.unit.plugins.modules import utils
+
+
+def test_terraform_plan_inspect_nonexistent_plan():
+    """test terraform plan inspect with nonexistent plan file"""
+    utils.set_module_args({'plan_file': '/1234567890'})
+    with pytest.raises(RuntimeError, match='Targeted plan file or root module directory does not exist: /1234567890'):
+        terraform_plan_inspect.main()
+
+
+def test_terraform_plan_inspect_filters(capfd):
+    """test terraform plan inspect with filters"""
+    utils.set_module_args(
+        {
+            'config_dir': str(utils.fixtures_dir()),
+            'plan_file': str(utils.fixtures_dir() / 'plan.tfplan'),
+            'address': ['local_file.*'],
+            'action': ['create'],
+            'cache': False,
+        }
+    )
+    with pytest.raises(SystemExit, match='0'):
+        terraform_plan_inspect.main()
+
+    stdout, stderr = capfd.readouterr()
+    assert not stderr
+
+    info = json.loads(stdout)
+    assert not info['changed']
+    assert not info['cached']
+    assert 'show' in info['command']
+    assert '-json' in info['command']
+    assert str(utils.fixtures_dir() / 'plan.tfplan') == info['command'][-1]
+    assert info['resource_changes'] == []
+
+
+def test_terraform_plan_inspect_relative_plan(capfd):
+    """test terraform plan inspect with plan file relative to config dir"""
+    utils.set_module_args({'config_dir': str(utils.fixtures_dir()), 'plan_file': 'plan.tfplan', 'cache': False, '_ansible_check_mode': True})
+    with pytest.raises(SystemExit, match='0'):
+        terraform_plan_inspect.main()
+
+    stdout, stderr = capfd.readouterr()
+    assert not stderr
+
+    info = json.loads(stdout)
+    assert not info['changed']
+    assert str(utils.fixtures_dir() / 'plan.tfplan') == info['command'][-1]